@@ -0,0 +1,86 @@
+"""
+Start-up cost of pospyt, as paid by every short-lived worker.
+
+Each measure runs in a fresh interpreter: the import of requests (the
+floor of pospyt), the import of pospyt and the creation of a first
+client with one registered module. The title extraction of a large
+HTML error page is compared with BeautifulSoup when it is installed.
+
+    python benchmarks/bench_import.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from pospyt.ultil import extract_html_title  # noqa: E402
+
+RUNS = 10
+
+SCENARIOS = [
+    ('import requests', 'import requests'),
+    ('import pospyt', 'import pospyt'),
+    ('first client', (
+        'import pospyt; '
+        'client = pospyt.PosWebServiceDict("http://localhost:8000/api", "k"); '
+        'client.product'
+    )),
+]
+
+
+def spawn(code):
+    """Wall time of a fresh interpreter running code, in seconds."""
+    timer = (
+        'import time; started = time.perf_counter(); %s; '
+        'print(time.perf_counter() - started)' % code
+    )
+    output = subprocess.check_output(
+        [sys.executable, '-c', timer], cwd=ROOT
+    )
+    return float(output)
+
+
+def error_page(rows=20000):
+    body = ''.join(
+        '<tr><td>#%d</td><td>vendor/laravel/framework/src/Illuminate/'
+        'Routing/Pipeline.php</td></tr>' % row
+        for row in range(rows)
+    )
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        '<title>Server Error</title></head><body><table>%s</table>'
+        '</body></html>' % body
+    ).encode('utf-8')
+
+
+def main():
+    for name, code in SCENARIOS:
+        times = [spawn(code) for _ in range(RUNS)]
+        print("%-16s %7.1f ms (median of %d)" % (
+            name, statistics.median(times) * 1e3, RUNS
+        ))
+
+    page = error_page()
+    print("error page of %.1f MB" % (len(page) / 1e6))
+    number = 20
+    elapsed = timeit.timeit(lambda: extract_html_title(page), number=number)
+    print("%-16s %7.3f ms" % ('title extractor', elapsed / number * 1e3))
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("%-16s not installed" % 'BeautifulSoup')
+        return
+    assert BeautifulSoup(page, 'html.parser').title.string \
+        == extract_html_title(page)
+    elapsed = timeit.timeit(
+        lambda: BeautifulSoup(page, 'html.parser').title.string, number=1
+    )
+    print("%-16s %7.1f ms" % ('BeautifulSoup', elapsed * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Decoding and encoding cost of a large `order/list` page.
+
+Compare the previous decoding (json.loads(resp.text), where requests
+guesses the charset of a response without one) with the decoding of
+the raw bytes by every installed codec, and the encoding of a large
+order payload.
+
+    python benchmarks/bench_json_codec.py
+"""
+import json
+import os
+import sys
+import timeit
+
+from requests import Response
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pospyt.codec import CODECS  # noqa: E402
+
+
+def order_page(orders=2000, lines=10):
+    return {
+        'success': True,
+        'message': 'Get list order successfully',
+        'data': [
+            {
+                'id': order_id,
+                'user_id': order_id % 97,
+                'status': 'done',
+                'total': '%d.00' % (order_id * 32000),
+                'note': 'Giao hàng trước 10 giờ',
+                'updated_at': '2021-11-11T15:09:29.000000Z',
+                'created_at': '2021-11-10T08:00:00.000000Z',
+                'lines': [
+                    {
+                        'product_id': line,
+                        'name': 'Cà Phê Sữa Đá',
+                        'quantity': 2,
+                        'price': '32000.00',
+                    }
+                    for line in range(lines)
+                ],
+            }
+            for order_id in range(orders)
+        ],
+    }
+
+
+def make_response(content):
+    # no charset in Content-Type, like the webservice responses
+    response = Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = content
+    return response
+
+
+def installed_codecs():
+    codecs = []
+    for name, codec_class in CODECS.items():
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            print("%-8s not installed" % name)
+    return codecs
+
+
+def main():
+    page = order_page()
+    content = json.dumps(page, ensure_ascii=False).encode('utf-8')
+    print("page of %d orders, %.1f MB" % (
+        len(page['data']), len(content) / 1e6
+    ))
+    number = 5
+
+    def legacy():
+        # a new response each time, requests caches the guessed encoding
+        return json.loads(make_response(content).text)
+
+    reference = legacy()
+    legacy_time = timeit.timeit(legacy, number=number) / number
+    print("%-22s %8.1f ms" % ('decode json(resp.text)', legacy_time * 1e3))
+
+    codecs = installed_codecs()
+    for codec in codecs:
+        def decode():
+            return codec.loads(make_response(content).content)
+
+        assert decode() == reference
+        elapsed = timeit.timeit(decode, number=number) / number
+        print("%-22s %8.1f ms   x%.1f" % (
+            'decode ' + codec.name, elapsed * 1e3, legacy_time / elapsed
+        ))
+
+    payload = {'action': 'create', 'lines': page['data'][0]['lines'] * 100}
+    for codec in codecs:
+        assert json.loads(codec.dumps(payload)) == payload
+        elapsed = timeit.timeit(
+            lambda: codec.dumps(payload), number=number * 20
+        ) / (number * 20)
+        print("%-22s %8.1f ms" % ('encode ' + codec.name, elapsed * 1e3))
+
+
+if __name__ == "__main__":
+    main()
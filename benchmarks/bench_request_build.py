@@ -0,0 +1,100 @@
+"""
+Per-call overhead of building a request, before any byte is sent.
+
+Compare the previous construction path (deepcopy of the options,
+headers copy, requests.Request(...).prepare()) with the current
+PosWebservice._build_request, on a small `find` and on an `order`
+create payload with hundreds of lines.
+
+    python benchmarks/bench_request_build.py
+"""
+import copy
+import os
+import sys
+import timeit
+from datetime import datetime
+
+from requests import Request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pospyt  # noqa: E402
+from pospyt.ultil import convert_to_valid_format  # noqa: E402
+
+BASE_URL = "http://localhost:8000/api"
+API_KEY = "BVWPFFYBT97WKM959D7AVVD0M4815Y1L"
+
+
+def legacy_build(client, uri, method, action, data):
+    """Construction path of pospyt before the copy-free rework."""
+    url = client._base_url + '/' + uri + '/' + action
+    headers = client.client.headers.copy()
+    headers.update({})
+    headers.update({"X-API-Key": client._api_key})
+    request = Request(method, url, headers=headers)
+    request_data = copy.deepcopy(data)
+    if 'date' in request_data and isinstance(request_data['date'], dict):
+        for bound in ('start', 'end'):
+            if request_data['date'].get(bound) is not None:
+                request_data['date'][bound] = convert_to_valid_format(
+                    request_data['date'][bound]
+                )
+    request.json = request_data
+    return request.prepare()
+
+
+def current_build(client, uri, method, action, data):
+    return client._build_request(uri, method, action, None, data)
+
+
+def payloads():
+    find = {'action': 'find', 'id': 42}
+    order = {
+        'action': 'create',
+        'customer_id': 7,
+        'date': {
+            'start': datetime(2021, 10, 20),
+            'end': datetime(2021, 11, 20),
+        },
+        'lines': [
+            {
+                'product_id': i,
+                'quantity': 2,
+                'price': '32000.00',
+                'note': 'Cà Phê Sữa Đá',
+            }
+            for i in range(500)
+        ],
+    }
+    return [
+        ('find', 'GET', 'product', 'find', find, 5000),
+        ('order create', 'POST', 'order', 'create', order, 300),
+    ]
+
+
+def main():
+    # the stdlib codec encodes bodies like requests did
+    client = pospyt.PosWebservice(BASE_URL, API_KEY, codec="json")
+
+    for name, method, uri, action, data, number in payloads():
+        before = legacy_build(client, uri, method, action, data)
+        after = current_build(client, uri, method, action, data)
+        assert before.url == after.url
+        assert before.body == after.body
+        assert dict(before.headers) == dict(after.headers)
+
+        legacy = timeit.timeit(
+            lambda: legacy_build(client, uri, method, action, data),
+            number=number
+        ) / number
+        current = timeit.timeit(
+            lambda: current_build(client, uri, method, action, data),
+            number=number
+        ) / number
+        print("%-14s before %9.1f us   after %9.1f us   x%.1f" % (
+            name, legacy * 1e6, current * 1e6, legacy / current
+        ))
+
+
+if __name__ == "__main__":
+    main()
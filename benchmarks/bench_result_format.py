@@ -0,0 +1,76 @@
+"""
+Memory kept by a large list result in each result_format.
+
+100k product rows are decoded from a JSON page like the webservice
+answers, then kept as dicts (the default), as records or as columns.
+The memory still allocated once the result is built is measured with
+tracemalloc; the JSON body and intermediate dicts are freed first.
+
+    python benchmarks/bench_result_format.py
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pospyt.records import format_records  # noqa: E402
+
+ROWS = 100000
+
+
+def page_content(rows=ROWS):
+    return json.dumps({
+        'success': True,
+        'message': 'ok',
+        'data': [
+            {
+                'id': product_id,
+                'category_id': product_id % 12,
+                'name': 'Cà Phê %d' % product_id,
+                'price': '%d.00' % (32000 + product_id % 5 * 1000),
+                'quantity': product_id % 50,
+                'updated_at': '2021-11-11T15:09:29.000000Z',
+                'created_at': '2021-10-01T08:00:00.000000Z',
+            }
+            for product_id in range(rows)
+        ],
+    }, ensure_ascii=False).encode('utf-8')
+
+
+def build(content, result_format):
+    records = json.loads(content)['data']
+    return format_records('product', records, result_format)
+
+
+def main():
+    content = page_content()
+    print("%d rows, page of %.1f MB" % (ROWS, len(content) / 1e6))
+
+    reference = None
+    for result_format in ('dicts', 'records', 'columns'):
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = build(content, result_format)
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        kept = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if result_format == 'dicts':
+            reference = kept
+            ratio = ''
+        else:
+            ratio = '   x%.2f' % (reference / kept)
+        print("%-8s kept %7.1f MB   built in %6.1f ms%s" % (
+            result_format, kept / 1e6, elapsed * 1e3, ratio
+        ))
+        del result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Requests sent by threads asking the same hot records at the same time.
+
+32 threads of an order pipeline each call `find('product', id)` on a
+handful of hot products and `list('category')`, against a local HTTP
+server answering in 50 ms. The same workload runs without and with
+single_flight; the requests received by the server and the coalescing
+ratio of the client are reported.
+
+    python benchmarks/bench_single_flight.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pospyt  # noqa: E402
+
+API_KEY = "BVWPFFYBT97WKM959D7AVVD0M4815Y1L"
+THREADS = 32
+ROUNDS = 20
+HOT_PRODUCTS = 4
+LATENCY = 0.05
+
+received = {'requests': 0}
+received_lock = threading.Lock()
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        options = json.loads(self.rfile.read(length) or b'{}')
+        with received_lock:
+            received['requests'] += 1
+        time.sleep(LATENCY)
+        if self.path.endswith('/find'):
+            data = {'id': options.get('id'), 'name': 'Cà Phê Sữa',
+                    'price': '32000.00'}
+        else:
+            data = [{'id': i, 'name': 'Category %d' % i} for i in range(20)]
+        raw = json.dumps({'success': True, 'message': 'ok', 'data': data})
+        raw = raw.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def pipeline(client, worker):
+    for round_ in range(ROUNDS):
+        client.find('product', (worker + round_) % HOT_PRODUCTS + 1)
+        client.list('category')
+
+
+def run(base_url, single_flight):
+    client = pospyt.PosWebServiceDict(
+        base_url, API_KEY, pool_maxsize=THREADS, single_flight=single_flight
+    )
+    received['requests'] = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(
+            lambda worker: pipeline(client, worker), range(THREADS)
+        ))
+    return client, received['requests'], time.perf_counter() - started
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CatalogHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = 'http://127.0.0.1:%d/api' % server.server_address[1]
+
+    calls = THREADS * ROUNDS * 2
+    print("%d threads, %d calls" % (THREADS, calls))
+    for single_flight in (False, True):
+        client, requests, elapsed = run(base_url, single_flight)
+        line = "single_flight=%-5s %5d requests sent  %6.2f s" % (
+            single_flight, requests, elapsed
+        )
+        if client.single_flight is not None:
+            line += "  coalescing ratio %.2f" % (
+                client.single_flight.stats()['coalescing_ratio'],
+            )
+        print(line)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
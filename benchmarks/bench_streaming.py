@@ -0,0 +1,113 @@
+"""
+Time to first record and peak memory of a large `order/list` page.
+
+A local HTTP server answers a page of orders, read once with `list`
+(whole body buffered and parsed) and once with `stream_list` (records
+decoded as the body is read). The server sends the page slowly, like a
+backend building a large export. Memory is traced with tracemalloc,
+which slows both readers down.
+
+    python benchmarks/bench_streaming.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pospyt  # noqa: E402
+
+API_KEY = "BVWPFFYBT97WKM959D7AVVD0M4815Y1L"
+ORDERS = 5000
+# seconds spent by the server on every block of records sent
+SEND_DELAY = 0.002
+
+
+def order(order_id):
+    return {
+        'id': order_id,
+        'user_id': order_id % 97,
+        'total': '%d.00' % (order_id * 32000),
+        'note': 'Giao hàng trước 10 giờ',
+        'updated_at': '2021-11-11T15:09:29.000000Z',
+        'lines': [
+            {'product_id': line, 'quantity': 2, 'price': '32000.00'}
+            for line in range(10)
+        ],
+    }
+
+
+class OrderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(text):
+            raw = text.encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(raw), raw))
+
+        send('{"success": true, "message": "ok", "data": [')
+        block = []
+        for order_id in range(ORDERS):
+            block.append(json.dumps(order(order_id), ensure_ascii=False))
+            if len(block) == 100:
+                send(('' if order_id < 100 else ',') + ','.join(block))
+                block = []
+                time.sleep(SEND_DELAY)
+        if block:
+            send(',' + ','.join(block))
+        send(']}')
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def measure(read):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first = None
+    count = 0
+    for _ in read():
+        if first is None:
+            first = time.perf_counter() - started
+        count += 1
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, first, total, peak
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OrderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = 'http://127.0.0.1:%d/api' % server.server_address[1]
+
+    client = pospyt.PosWebServiceDict(base_url, API_KEY)
+    options = {'limit': ORDERS, 'page': 1}
+    try:
+        for name, read in (
+            ('list', lambda: client.list('order', dict(options))),
+            ('stream_list', lambda: client.stream_list('order', dict(options))),
+        ):
+            count, first, total, peak = measure(read)
+            print("%-12s %d records   first %7.1f ms   total %7.1f ms"
+                  "   peak %6.1f MB" % (
+                      name, count, first * 1e3, total * 1e3, peak / 1e6
+                  ))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,41 @@ __all__ = ["Client"]
 
 from .pospyt import PosWebServiceError
 from .pospyt import PosAuthenticationError
+from .pospyt import PosCircuitOpenError
+from .pospyt import PosConflictError
 from .pospyt import PosWebservice
-from .pospyt import PosWebServiceDict
\ No newline at end of file
+from .pospyt import PosWebServiceDict
+from .cache import ResponseCache
+from .cache import Revalidator
+from .session import make_session
+from .session import shared_session
+from .retry import RetryPolicy
+from .retry import CircuitBreaker
+from .ratelimit import RateLimiter
+from .ratelimit import AdaptiveConcurrency
+from .sync import MemoryCheckpointStore
+from .sync import FileCheckpointStore
+from .bulk import BulkResult
+from .snapshot import RecordCache
+from .singleflight import SingleFlight
+from .loader import Loader
+from .metrics import Metrics
+
+# imported on first access: sqlite3 and asyncio are not needed by
+# processes which only use the synchronous client
+_lazy_attributes = {
+    "LocalMirror": ".mirror",
+    "AsyncPosWebservice": ".aio",
+    "AsyncPosWebServiceDict": ".aio",
+    "AsyncLoader": ".aio",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        from importlib import import_module
+        module = import_module(_lazy_attributes[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
\ No newline at end of file
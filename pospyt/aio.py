@@ -0,0 +1,810 @@
+"""asyncio flavour of the Pos webservice clients.
+
+The request building, option validation, date conversion and error
+mapping are the ones of pospyt.py, only the transport is replaced by an
+aiohttp ClientSession. aiohttp is an optional dependency, it is only
+required when an asynchronous client is created.
+"""
+import asyncio
+import threading
+import time
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from .bulk import (
+    BulkItemResult, BulkResult, batch_results, chunk_items, retry_items
+)
+from .cache import BlankCache
+from .codec import get_codec
+from .loader import DEFAULT_WINDOW, Loader
+from .metrics import CONNECTION, TIMEOUT
+from .pagination import aiter_records, aiter_streamed_records
+from .streaming import DEFAULT_CHUNK_SIZE, DataStream
+from .pospyt import PosWebservice, PosWebServiceDict
+from .pospyt import PosAuthenticationError, PosConflictError
+from .pospyt import PosWebServiceError
+from .singleflight import SingleFlight, raise_shared
+from .sync import aincremental_sync
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            "aiohttp is required to use the asynchronous clients, "
+            "install it with `pip install aiohttp`"
+        )
+    return aiohttp
+
+
+class AsyncSingleFlight(SingleFlight):
+    """Share one in-flight call between the tasks asking the same key.
+
+    The calls are keyed per event loop thread, a key is only shared by
+    tasks of the same loop.
+    """
+
+    async def do(self, key, function):
+        """Await function(), or the running call of key.
+
+        :param key: hashable key of the call
+        :param function: coroutine function without argument
+        :return: tuple with (result, leader)
+        """
+        key = (threading.get_ident(), key)
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = \
+                    asyncio.get_running_loop().create_future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return await asyncio.shield(future), False
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the leader was cancelled, not this task: run it again
+                return await self.do(key[1], function)
+            except Exception as err:
+                raise_shared(err)
+
+        try:
+            result = await function()
+        except BaseException as err:
+            if isinstance(err, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(err)
+                # retrieved here, no warning when nobody waits for it
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncLoader(Loader):
+    """Batch and memoize the find calls of one resource across tasks.
+
+    See Loader, the ids loaded by the tasks of the loop within the
+    window are sent in one batch.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncLoader, self).__init__(*args, **kwargs)
+        self._tasks = set()
+
+    def _new_future(self):
+        return asyncio.get_running_loop().create_future()
+
+    def _queued(self, size):
+        loop = asyncio.get_running_loop()
+        if size >= self.max_batch_size:
+            self._spawn_dispatch(loop)
+        elif size == 1:
+            loop.call_later(self.window, self._spawn_dispatch, loop)
+
+    def _spawn_dispatch(self, loop):
+        task = loop.create_task(self.dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load(self, resource_id):
+        """Return the record of an id, see Loader.load."""
+        # shielded, cancelling a task does not fail the other loads
+        return self._found(await asyncio.shield(self.submit(resource_id)))
+
+    async def load_many(self, ids):
+        """Return the records of several ids, see Loader.load_many."""
+        futures = [self.submit(resource_id) for resource_id in ids]
+        await self.dispatch()
+        return list(await asyncio.gather(
+            *[asyncio.shield(future) for future in futures]
+        ))
+
+    async def dispatch(self):
+        """Send the ids queued so far in one batch and resolve them."""
+        batch = self._take_batch()
+        if not batch:
+            return
+        try:
+            records, missing = await self.client.find_many(
+                *self._fetch_args(batch)
+            )
+        except BaseException as err:
+            self._fail(batch, err)
+            if not isinstance(err, Exception):
+                raise
+            return
+        self._resolve(batch, records, missing)
+
+
+class AsyncPosWebservice(PosWebservice):
+    """Asynchronous PosWebservice, every request method is a coroutine.
+
+    Registered modules work the same way, e.g.
+    `await client.order.list(options)`.
+    """
+
+    def __init__(self, base_url, api_key, debug=False, session=None,
+                 verbose=False, cache=None, revalidate=False, retry=None,
+                 circuit_breaker=None, rate_limiter=None, concurrency=None,
+                 codec=None, single_flight=False, metrics=None):
+        """
+        Create an instance of AsyncPosWebservice.
+
+        async with AsyncPosWebservice(BASE_URL, API_KEY) as client:
+            orders = await client.order.list(options)
+
+        :param base_url: Root URL for the shop
+        :param api_key: Authentification key
+        :param debug: activate Pos's webservice debug mode
+        :param session: pass a custom aiohttp ClientSession, it is
+            created on first request otherwise
+        :param verbose: unused, enable the "aiohttp.client" logger instead
+        :param cache: True or a ResponseCache, see PosWebservice
+        :param revalidate: True or a Revalidator, see PosWebservice
+        :param retry: True or a RetryPolicy, see PosWebservice
+        :param circuit_breaker: True or a CircuitBreaker, see PosWebservice
+        :param rate_limiter: rate or RateLimiter, see PosWebservice
+        :param concurrency: True or an AdaptiveConcurrency,
+            see PosWebservice
+        :param codec: JSON codec name or object, see PosWebservice
+        :param single_flight: True or an AsyncSingleFlight to share one
+            request between the tasks sending the same GET or HEAD
+        :param metrics: True or a Metrics registry, see PosWebservice
+        """
+        self._aiohttp = _import_aiohttp()
+        self._api_key = api_key
+        self._base_url = base_url
+
+        # optional arguments
+        self.debug = debug
+        self.verbose = verbose
+
+        self.client = session
+        self._owns_session = session is None
+
+        self.cache = self._make_cache(cache)
+        self.revalidator = self._make_revalidator(revalidate)
+        self.retry = self._make_retry(retry)
+        self.circuit_breaker = self._make_circuit_breaker(
+            base_url, circuit_breaker
+        )
+        self.rate_limiter = self._make_rate_limiter(rate_limiter)
+        self.concurrency = self._make_concurrency(concurrency)
+        self.codec = get_codec(codec)
+        if single_flight is True:
+            single_flight = AsyncSingleFlight()
+        self.single_flight = single_flight or None
+        self.metrics = self._make_metrics(metrics)
+
+        self.CACHED_MODULE = {}
+        self._url_cache = {}
+        self._headers_template = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the aiohttp session if it was created by the client."""
+        if self._owns_session and self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    def _get_session(self):
+        if self.client is None or self.client.closed:
+            self.client = self._aiohttp.ClientSession()
+            self._owns_session = True
+        return self.client
+
+    def _session_headers(self):
+        # aiohttp merges the session headers by itself
+        return {}
+
+    def pool_stats(self):
+        """Describe the utilization of the connector of the aiohttp session.
+
+        aiohttp shares one pool between the hosts (limit), and only
+        counts the connections of each host when limit_per_host is set:
+        the connector is described as a whole.
+
+        :return: list with a dict of the maxsize (limit, None when
+            unlimited), limit_per_host, in_use and idle connections of
+            the connector, empty before the first request
+        """
+        connector = getattr(self.client, 'connector', None)
+        if connector is None:
+            return []
+        # only the limits are public, the connections are tracked by the
+        # private set and dict of BaseConnector
+        idle = getattr(connector, '_conns', {})
+        return [{
+            'maxsize': connector.limit or None,
+            'limit_per_host': connector.limit_per_host or None,
+            'in_use': len(getattr(connector, '_acquired', ())),
+            'idle': sum(len(connections) for connections in idle.values()),
+        }]
+
+    @staticmethod
+    def _error_kind(error):
+        return TIMEOUT if isinstance(error, asyncio.TimeoutError) \
+            else CONNECTION
+
+    @staticmethod
+    def _make_response(resp, content):
+        """Wrap an aiohttp response into a requests Response.
+
+        It lets _check_status_code and _build_response be reused as is.
+
+        :param content: body of the response, None when it is streamed
+            from response.raw
+        """
+        response = Response()
+        response.status_code = resp.status
+        response.headers = CaseInsensitiveDict(resp.headers)
+        response.url = str(resp.url)
+        response.encoding = resp.charset
+        response.raw = resp
+        if content is not None:
+            response._content = content
+        return response
+
+    async def _execute(self, uri, method, action=None, data=None,
+                       add_headers=None):
+        """Execute a request on the Pos Webservice.
+
+        Same as PosWebservice._execute but awaitable.
+        """
+        cache_key, cached = self._cache_lookup(uri, method, action, data)
+        if cached is not None:
+            return self._parse(cached)
+
+        flight_key = self._flight_key(uri, method, action, data, add_headers)
+        if flight_key is None:
+            result, _ = await self._execute_once(
+                uri, method, action, data, add_headers, cache_key
+            )
+            return result
+        (result, content), leader = await self.single_flight.do(
+            flight_key,
+            lambda: self._execute_once(
+                uri, method, action, data, add_headers, cache_key
+            )
+        )
+        if leader:
+            return result
+        return self._shared_copy(result, content)
+
+    async def _execute_once(self, uri, method, action, data, add_headers,
+                            cache_key):
+        revalidation_key, add_headers = self._conditional_request(
+            uri, method, action, data, add_headers
+        )
+        prepped, timeout = self._prepare_execute(
+            uri, method, action, data, add_headers
+        )
+
+        try:
+            response = await self._send(prepped, timeout, uri, action)
+        finally:
+            self._cache_invalidate(uri, method)
+
+        if self.metrics is None:
+            result = self._handle_response(method, response, revalidation_key)
+        else:
+            result = self._observe_response(
+                uri, action, method, response, revalidation_key
+            )
+        if response.status_code != 304:
+            self._cache_store(cache_key, result, response.content)
+            return result, response.content
+        return result, None
+
+    async def _send(self, prepped, timeout, uri=None, action=None,
+                    stream=False):
+        """Send a prepared request, retrying it according to the policy.
+
+        Same as PosWebservice._send but awaitable.
+        """
+        attempt = 0
+        while True:
+            self._check_circuit()
+            try:
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.reserve(uri or '', action)
+                    if delay:
+                        await asyncio.sleep(delay)
+                if self.metrics is not None:
+                    started = time.perf_counter()
+                response = await self._send_once(prepped, timeout, stream)
+            except (self._aiohttp.ClientConnectionError,
+                    asyncio.TimeoutError) as err:
+                self._record_outcome(None)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, error=err
+                    )
+                delay = self._retry_delay(prepped.method, attempt)
+                if delay is None:
+                    raise
+            except self._aiohttp.ClientError as err:
+                self._record_outcome(None)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, error=err
+                    )
+                raise
+            except BaseException:
+                # e.g. cancelled by asyncio.wait_for
+                self._release_circuit()
+                raise
+            else:
+                self._record_outcome(response.status_code)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, response,
+                        stream=stream
+                    )
+                delay = self._retry_delay(
+                    prepped.method,
+                    attempt,
+                    response.status_code,
+                    response.headers.get('Retry-After')
+                )
+                if delay is None:
+                    return response
+                response.raw.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send_once(self, prepped, timeout, stream=False):
+        if self.concurrency is not None:
+            # the limit is shared with threads, poll instead of blocking
+            # the event loop
+            while not self.concurrency.try_acquire():
+                await asyncio.sleep(0.005)
+        started = time.monotonic()
+        status_code = None
+        try:
+            resp = await self._get_session().request(
+                prepped.method,
+                prepped.url,
+                headers=dict(prepped.headers),
+                data=prepped.body,
+                timeout=self._aiohttp.ClientTimeout(total=timeout),
+            )
+            if stream:
+                response = self._make_response(resp, None)
+            else:
+                async with resp:
+                    content = await resp.read()
+                    response = self._make_response(resp, content)
+            status_code = response.status_code
+            return response
+        finally:
+            if self.concurrency is not None:
+                self.concurrency.release(
+                    time.monotonic() - started, status_code
+                )
+
+    async def _stream(self, uri, method='GET', action=None, data=None,
+                      add_headers=None, chunk_size=None):
+        """Asynchronous version of PosWebservice._stream.
+
+        :return: asynchronous generator of the items of the 'data' array
+        """
+        prepped, timeout = self._prepare_execute(
+            uri, method, action, data, add_headers
+        )
+        response = await self._send(
+            prepped, timeout, uri, action, stream=True
+        )
+        resp = response.raw
+        try:
+            status_code = response.status_code
+            if status_code not in (200, 201):
+                response._content = await resp.read()
+            self._check_status_code(
+                status_code,
+                None if status_code in (200, 201) else response.content
+            )
+            stream = DataStream()
+            try:
+                async for chunk in resp.content.iter_chunked(
+                        chunk_size or DEFAULT_CHUNK_SIZE):
+                    for item in stream.feed(chunk):
+                        yield item
+                items = stream.close()
+            except ValueError as err:
+                raise PosWebServiceError(
+                    'HTTP Json response is not parsable : %s' % (err,)
+                )
+            for item in items:
+                yield item
+        finally:
+            resp.release()
+
+        if stream.envelope is not None:
+            data = self._unwrap_data(stream.envelope)
+            if data and not isinstance(data, list):
+                yield data
+
+    def _iter_records(self, fetch, options=None, page_size=None,
+                      prefetch=0, max_workers=None, stream=False):
+        """Asynchronous version of PosWebservice._iter_records.
+
+        :param max_workers: unused, pages are prefetched as asyncio tasks
+        :return: asynchronous generator of records
+        """
+        if stream:
+            if prefetch:
+                raise PosWebServiceError('Streamed pages are not prefetched')
+            return aiter_streamed_records(fetch, options, page_size)
+
+        async def fetch_page(page_options):
+            return self._unwrap_data(await fetch(page_options))
+
+        return aiter_records(fetch_page, options, page_size, prefetch)
+
+    async def _bulk(self, items, send_one=None, send_batch=None,
+                    chunk_size=100, max_workers=4, idempotent=True):
+        """Asynchronous version of PosWebservice._bulk.
+
+        :param max_workers: number of requests in flight
+        :return: BulkResult
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+        errors = (PosWebServiceError, self._aiohttp.ClientError,
+                  asyncio.TimeoutError)
+
+        async def send(sender, payload):
+            async with semaphore:
+                return self._unwrap_data(await sender(payload))
+
+        async def send_item(index, item):
+            try:
+                data = await send(send_one, item)
+            except PosAuthenticationError:
+                raise
+            except errors as err:
+                return BulkItemResult(index, item, error=err)
+            return BulkItemResult(index, item, data)
+
+        async def send_chunk(offset, chunk):
+            if send_batch is not None:
+                try:
+                    data = await send(send_batch, chunk)
+                except PosAuthenticationError:
+                    raise
+                except errors as err:
+                    if send_one is None or not retry_items(err, idempotent):
+                        return [
+                            BulkItemResult(offset + position, item, error=err)
+                            for position, item in enumerate(chunk)
+                        ]
+                else:
+                    return batch_results(offset, chunk, data)
+            return await asyncio.gather(*[
+                send_item(offset + position, item)
+                for position, item in enumerate(chunk)
+            ])
+
+        chunks = chunk_items(items, chunk_size if send_batch else 1)
+        tasks = [
+            asyncio.ensure_future(send_chunk(offset, chunk))
+            for offset, chunk in chunks
+        ]
+        try:
+            chunk_results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return BulkResult(
+            result for results in chunk_results for result in results
+        )
+
+
+class AsyncPosWebServiceDict(AsyncPosWebservice, PosWebServiceDict):
+    """Asynchronous PosWebServiceDict, use dict for messages."""
+
+    def __init__(self, *args, **kwargs):
+        """
+        Create an instance of AsyncPosWebServiceDict.
+
+        Same arguments as AsyncPosWebservice, plus the mirror, source,
+        record_cache, mirror_snapshots, blank_ttl and prewarm_blanks
+        arguments of PosWebServiceDict. No request is sent by the
+        constructor: with prewarm_blanks, the envelopes are fetched by
+        the first blank_envelope or partial_add call, or warmed earlier
+        with `await client.prewarm_blanks()`.
+        """
+        mirror = kwargs.pop('mirror', None)
+        source = kwargs.pop('source', 'remote')
+        record_cache = kwargs.pop('record_cache', None)
+        mirror_snapshots = kwargs.pop('mirror_snapshots', False)
+        blank_ttl = kwargs.pop('blank_ttl', 3600)
+        prewarm = kwargs.pop('prewarm_blanks', False)
+        AsyncPosWebservice.__init__(self, *args, **kwargs)
+        self._init_source(mirror, source)
+        self._init_record_cache(record_cache, mirror_snapshots)
+        self.blanks = BlankCache(blank_ttl)
+        # True until the first blank_envelope starts the prewarm task
+        self._prewarming = prewarm or None
+
+    async def refresh_mirror(self, resource=None, incremental=False,
+                             page_size=500):
+        """Refresh the local mirror from the webservice.
+
+        See PosWebServiceDict.refresh_mirror
+        """
+        if self.mirror is None:
+            raise PosWebServiceError('No local mirror configured')
+        return await self.mirror.arefresh(
+            self, resource, incremental=incremental, page_size=page_size
+        )
+
+    async def search(self, resource, options=None, source=None):
+        """Retrieve (GET) a resource and return a list of its ids.
+
+        See PosWebServiceDict.search
+        """
+        options = self._search_options(options)
+        if self._use_mirror(resource, source):
+            return self._parse_ids(
+                {'id': resource_id}
+                for resource_id in self.mirror.query(resource, options, 'id')
+            )
+        response = await PosWebservice.search(self, resource, options)
+        return self._parse_ids(self._unwrap_data(response))
+
+    async def list(self, resource, options=None, source=None,
+                   result_format='dicts'):
+        """Retrieve (GET) a resource and return a list of its data.
+
+        See PosWebServiceDict.list
+        """
+        self._check_result_format(result_format)
+        options = self._with_action(options, 'list')
+        if self._use_mirror(resource, source):
+            records = self.mirror.query(resource, options)
+        else:
+            response = await PosWebservice.search(self, resource, options)
+            records = self._unwrap_data(response)
+            self._remember(resource, records)
+        return self._format_records(resource, records, options, result_format)
+
+    async def find(self, resource, resource_id, options=None, source=None):
+        """Retrieve (GET) a resource and return its data.
+
+        See PosWebServiceDict.find
+        """
+        options = self._with_action(options, 'find')
+        if self._use_mirror(resource, source):
+            record = self.mirror.find(resource, resource_id)
+            if record is None:
+                raise PosWebServiceError('Not Found', 404)
+            return record
+        response = await PosWebservice.get(
+            self, resource=resource, resource_id=resource_id, options=options
+        )
+        record = self._unwrap_data(response)
+        self._remember(resource, record)
+        return record
+
+    async def find_many(self, resource, ids, batch_size=100, max_workers=8,
+                        options=None):
+        """Retrieve (GET) several records of a resource by id.
+
+        See PosWebServiceDict.find_many
+
+        :param max_workers: number of find calls in flight when
+            the server can't filter by id
+        """
+        wanted = self._unique_ids(ids)
+        records = {}
+        filter_by_id = True
+
+        for chunk in self._chunk_ids(wanted, batch_size):
+            found = None
+            if filter_by_id:
+                try:
+                    data = await self.list(
+                        resource, self._id_filter_options(options, chunk)
+                    )
+                except PosWebServiceError as err:
+                    if not self._is_filter_rejected(err):
+                        raise
+                    data = None
+                found = self._match_chunk(chunk, data)
+                filter_by_id = found is not None
+            if found is None:
+                found = await self._find_each(
+                    resource, chunk, max_workers, options
+                )
+            records.update(found)
+
+        missing = [resource_id for resource_id in wanted
+                   if resource_id not in records]
+        return records, missing
+
+    async def _find_each(self, resource, chunk, max_workers, options=None):
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def find(resource_id):
+            async with semaphore:
+                try:
+                    return await self.find(
+                        resource, resource_id, dict(options or {})
+                    )
+                except PosWebServiceError as err:
+                    if self._is_missing_error(err):
+                        return None
+                    raise
+
+        results = await asyncio.gather(*[find(i) for i in chunk])
+        return dict(
+            (resource_id, record)
+            for resource_id, record in zip(chunk, results)
+            if record
+        )
+
+    async def blank_envelope(self, resource, refresh=False):
+        """Return the blank envelope (default record) of a resource.
+
+        See PosWebServiceDict.blank_envelope
+        """
+        if not refresh:
+            if self._prewarming is not None:
+                await self._wait_prewarm()
+            envelope = self.blanks.get(resource)
+            if envelope is not None:
+                return envelope
+        envelope = self._unwrap_data(
+            await self._execute(resource, 'GET', self.BLANK_ACTION)
+        )
+        self.blanks.set(resource, envelope)
+        return envelope
+
+    async def _wait_prewarm(self):
+        # the tasks asking an envelope meanwhile wait for the same prewarm
+        if self._prewarming is True:
+            self._prewarming = asyncio.ensure_future(self.prewarm_blanks())
+        task = self._prewarming
+        try:
+            await asyncio.shield(task)
+        finally:
+            if task.done() and self._prewarming is task:
+                self._prewarming = None
+
+    async def prewarm_blanks(self, resources=None, max_workers=4):
+        """Fetch and cache the blank envelopes of several resources.
+
+        See PosWebServiceDict.prewarm_blanks
+        """
+        resources = list(resources or self._registered_resources())
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def fetch(resource):
+            async with semaphore:
+                try:
+                    await self.blank_envelope(resource, refresh=True)
+                except PosAuthenticationError:
+                    raise
+                except (PosWebServiceError, self._aiohttp.ClientError,
+                        asyncio.TimeoutError) as err:
+                    return err
+                return None
+
+        errors = await asyncio.gather(*[fetch(r) for r in resources])
+        return dict(
+            (resource, error)
+            for resource, error in zip(resources, errors)
+            if error is not None
+        )
+
+    async def sync(self, resource, sink, checkpoint_store, options=None,
+                   page_size=100, field='updated_at', key=None):
+        """Deliver to sink the records changed since the last checkpoint.
+
+        See PosWebServiceDict.sync, sink may also be a coroutine function.
+        """
+        return await aincremental_sync(
+            self, resource, sink, checkpoint_store, options=options,
+            page_size=page_size, field=field, key=key
+        )
+
+    async def export(self, resource, path, export_format=None, options=None,
+                     page_size=500, prefetch=2, stream=False):
+        """Export every record of a resource to a CSV, JSON Lines or
+        Parquet file, written atomically as pages are received.
+
+        See PosWebServiceDict.export
+        """
+        from .export import aexport_resource
+        return await aexport_resource(
+            self, resource, path, export_format=export_format,
+            options=options, page_size=page_size, prefetch=prefetch,
+            stream=stream
+        )
+
+    def loader(self, resource, options=None, window=DEFAULT_WINDOW,
+               max_batch_size=100, max_workers=8, memoize=True):
+        """Return an AsyncLoader batching the find calls of resource.
+
+        See PosWebServiceDict.loader
+        """
+        return AsyncLoader(
+            self, resource, options=options, window=window,
+            max_batch_size=max_batch_size, max_workers=max_workers,
+            memoize=memoize
+        )
+
+    async def partial_add(self, resource, fields):
+        """Add (POST) a resource without necessary all the content.
+
+        See PosWebServiceDict.partial_add
+        """
+        record = await self.blank_envelope(resource)
+        record.update(fields)
+        return await self._execute(resource, 'POST', 'create', record)
+
+    async def partial_edit(self, resource, resource_id, fields,
+                           snapshot=None, check_conflict=True):
+        """Edit (PUT) only the fields of a resource which changed.
+
+        See PosWebServiceDict.partial_edit
+        """
+        if snapshot is None:
+            snapshot = self._snapshot_of(resource, resource_id)
+        if snapshot is None:
+            snapshot = await self.find(resource, resource_id, source='remote')
+        request = self._edit_request(
+            resource_id, fields, snapshot, check_conflict
+        )
+        if request is None:
+            return None
+        changes, body, headers = request
+        try:
+            response = await self._execute(
+                resource, 'PUT', 'update', body, add_headers=headers
+            )
+        except PosConflictError:
+            if self.record_cache is not None:
+                self.record_cache.discard(resource, resource_id)
+            raise
+        self._edit_done(resource, resource_id, snapshot, changes, response)
+        return response
@@ -2,5 +2,97 @@ class BaseModule(object):
     """
         webservice base api
     """
+    resource = None
+
     def __init__(self, client):
-        self.client = client
\ No newline at end of file
+        self.client = client
+
+    def stream_list(self, options=None, chunk_size=None):
+        """
+        Use this call to get a list of the resource, its records being
+        yielded as the response is read instead of once it is parsed.
+        :param options:
+        :param chunk_size: number of bytes read at once
+        :return: generator of records
+        """
+        return self.client._stream(
+            self.resource, "GET", "list", options, chunk_size=chunk_size
+        )
+
+    def iter_list(self, options=None, page_size=None, prefetch=0,
+                  max_workers=None, stream=False):
+        """
+        Use this call to iterate over every record of the resource,
+        page by page, keeping only one page in memory unless pages
+        are prefetched, or only one record when pages are streamed.
+        :param options:
+        :param page_size:
+        :param prefetch: number of pages kept in flight
+        :param max_workers:
+        :param stream: stream the records of each page
+        :return: generator of records
+        """
+        if stream:
+            return self.client._iter_records(
+                self.stream_list, options, page_size, stream=True
+            )
+        return self.client._iter_records(
+            self.list, options, page_size, prefetch, max_workers
+        )
+
+    def _batch_sender(self, batch_action):
+        if batch_action is None:
+            return None
+        return lambda chunk: self.client._execute(
+            self.resource, "POST", batch_action, {'data': list(chunk)}
+        )
+
+    def bulk_create(self, items, chunk_size=100, max_workers=4,
+                    batch_action=None):
+        """
+        Use this call to create several records, each one getting its
+        own success or error instead of stopping at the first failure.
+        :param items: records to create
+        :param chunk_size: number of records of a batch request
+        :param max_workers: number of requests in flight
+        :param batch_action: action of the server creating a list of
+            records sent as {'data': [...]}, None for one request per record
+        :return: BulkResult
+        """
+        return self.client._bulk(
+            items, self.create, self._batch_sender(batch_action),
+            chunk_size, max_workers, idempotent=False
+        )
+
+    def bulk_update(self, items, chunk_size=100, max_workers=4,
+                    batch_action=None):
+        """
+        Use this call to update several records, each one getting its
+        own success or error instead of stopping at the first failure.
+        :param items: records to update, with their id
+        :param chunk_size: number of records of a batch request
+        :param max_workers: number of requests in flight
+        :param batch_action: action of the server updating a list of
+            records sent as {'data': [...]}, None for one request per record
+        :return: BulkResult
+        """
+        return self.client._bulk(
+            items, self.update, self._batch_sender(batch_action),
+            chunk_size, max_workers
+        )
+
+    def bulk_delete(self, ids, chunk_size=100, max_workers=4):
+        """
+        Use this call to delete several records by chunks of ids, a
+        chunk which fails is deleted again id by id.
+        :param ids: ids to delete
+        :param chunk_size: number of ids of a delete request
+        :param max_workers: number of requests in flight
+        :return: BulkResult
+        """
+        return self.client._bulk(
+            ids,
+            lambda resource_id: self.delete({'id': [resource_id]}),
+            lambda chunk: self.delete({'id': list(chunk)}),
+            chunk_size, max_workers
+        )
@@ -0,0 +1,109 @@
+"""Results of the bulk writes of PosWebservice._bulk.
+
+Every item of a bulk write gets its own result, a failed item does not
+stop the others.
+"""
+
+
+class BulkItemResult(object):
+    """Outcome of one item of a bulk write."""
+
+    __slots__ = ('index', 'item', 'response', 'error')
+
+    def __init__(self, index, item, response=None, error=None):
+        """
+        :param index: position of the item in the bulk
+        :param item: record or id sent
+        :param response: data of the response, shared by the items of
+            a batch request unless the server answers one entry per item
+        :param error: exception raised for the item, None on success
+        """
+        self.index = index
+        self.item = item
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return 'BulkItemResult(index=%d, ok)' % self.index
+        return 'BulkItemResult(index=%d, error=%r)' % (self.index, self.error)
+
+
+class BulkResult(object):
+    """Results of a bulk write, in the order of the items."""
+
+    def __init__(self, results):
+        self.results = sorted(results, key=lambda result: result.index)
+
+    @property
+    def succeeded(self):
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        failed = len(self.failed)
+        return 'BulkResult(succeeded=%d, failed=%d)' % (
+            len(self.results) - failed, failed
+        )
+
+
+def chunk_items(items, chunk_size):
+    """Split items into (offset, chunk) tuples of chunk_size items."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer")
+    items = list(items)
+    return [
+        (start, items[start:start + chunk_size])
+        for start in range(0, len(items), chunk_size)
+    ]
+
+
+def retry_items(error, idempotent):
+    """Whether the items of a failed batch request are sent again one by
+    one to know which of them failed.
+
+    A batch of writes which are not idempotent (creates) may have been
+    applied before its response failed, sending its items again would
+    duplicate them: they are only retried when the server rejected the
+    batch with a 4xx status, before writing anything.
+
+    :param error: exception raised by the batch request
+    :param idempotent: the items can be written twice safely
+    """
+    if idempotent:
+        return True
+    error_code = getattr(error, 'error_code', None)
+    return isinstance(error_code, int) and 400 <= error_code < 500
+
+
+def batch_results(offset, chunk, data):
+    """Results of the items of a successful batch request.
+
+    A list with one entry per item is split between the items, any
+    other data is the response of every item.
+    """
+    if isinstance(data, list) and len(data) == len(chunk):
+        responses = data
+    else:
+        responses = [data] * len(chunk)
+    return [
+        BulkItemResult(offset + position, item, response)
+        for position, (item, response) in enumerate(zip(chunk, responses))
+    ]
@@ -0,0 +1,298 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# GET actions whose response can be served from the cache
+CACHEABLE_ACTIONS = ('find', 'list', 'search', 'read')
+
+
+def resource_of(uri):
+    """Root resource of an uri, e.g. 'product' for 'product/list'."""
+    return uri.strip('/').split('/')[0]
+
+
+def make_key(uri, action, options):
+    """Build the cache key of a request.
+
+    Options are normalized so that the same query written with keys in
+    a different order shares the same entry.
+    """
+    if isinstance(options, dict):
+        options = dict(
+            (key, value) for key, value in options.items() if key != 'timeout'
+        )
+    normalized = json.dumps(options, sort_keys=True, default=str)
+    return (resource_of(uri), uri, action, normalized)
+
+
+class ResponseCache(object):
+    """In-process TTL/LRU cache of raw response bodies.
+
+    Bodies are stored as bytes and parsed again on every hit, so callers
+    never share (and mutate) the same object.
+    """
+
+    def __init__(self, ttl=60, resource_ttl=None, max_entries=1024,
+                 max_bytes=None):
+        """
+        :param ttl: default time to live of an entry in seconds,
+            None to keep entries until they are evicted or invalidated
+        :param resource_ttl: dict of ttl by resource, e.g. {'category': 600},
+            a ttl of 0 disables the cache for that resource
+        :param max_entries: maximum number of entries
+        :param max_bytes: maximum total size of the bodies, None for no limit
+        """
+        self.ttl = ttl
+        self.resource_ttl = dict(resource_ttl or {})
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _ttl_of(self, resource):
+        return self.resource_ttl.get(resource, self.ttl)
+
+    def _pop(self, key):
+        content, _ = self._entries.pop(key)
+        self._bytes -= len(content)
+
+    def get(self, key):
+        """Return the cached body of key, None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None \
+                    and entry[1] < time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, content):
+        """Store the body of key, evicting the least recently used entries.
+
+        :param key: key built by make_key
+        :param content: raw body of the response as bytes
+        """
+        ttl = self._ttl_of(key[0])
+        if ttl == 0 or not content:
+            return
+        if self.max_bytes is not None and len(content) > self.max_bytes:
+            return
+        expires = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (content, expires)
+            self._bytes += len(content)
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None
+                    and self._bytes > self.max_bytes)
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, resource=None):
+        """Drop the entries of a resource, or every entry.
+
+        :param resource: resource or uri, e.g. 'product' or 'product/list'
+        """
+        with self._lock:
+            if resource is None:
+                keys = list(self._entries)
+            else:
+                resource = resource_of(resource)
+                keys = [key for key in self._entries if key[0] == resource]
+            for key in keys:
+                self._pop(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        """Return the counters of the cache as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+class Revalidator(object):
+    """Remember ETag/Last-Modified validators of GET responses.
+
+    Later requests with the same key are sent conditionally and a
+    304 Not Modified is answered with a copy of the body parsed the
+    first time, without downloading nor decoding it again.
+    """
+
+    def __init__(self, max_entries=256):
+        """
+        :param max_entries: maximum number of remembered responses
+        """
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.modified = 0
+
+    def conditional_headers(self, key):
+        """Return the If-None-Match/If-Modified-Since headers of key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return {}
+            self.conditional_requests += 1
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def store(self, key, headers, body):
+        """Remember the validators and the parsed body of a response.
+
+        Nothing is stored when the server sent no validator.
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if etag or last_modified:
+            # the caller gets body itself and may change it
+            body = copy.deepcopy(body)
+        with self._lock:
+            if key in self._entries:
+                self.modified += 1
+            if not (etag or last_modified):
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (etag, last_modified, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def revalidated(self, key):
+        """Return a copy of the stored body of key after a 304, None if
+        forgotten."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.not_modified += 1
+        return copy.deepcopy(entry[2])
+
+    def invalidate(self, resource=None):
+        """Forget the responses of a resource, or every response."""
+        with self._lock:
+            if resource is None:
+                self._entries.clear()
+                return
+            resource = resource_of(resource)
+            for key in [key for key in self._entries if key[0] == resource]:
+                del self._entries[key]
+
+    def stats(self):
+        """Return the counters of the revalidations as a dict."""
+        with self._lock:
+            requests = self.conditional_requests
+            return {
+                'conditional_requests': requests,
+                'not_modified': self.not_modified,
+                'modified': self.modified,
+                'hit_rate': (
+                    float(self.not_modified) / requests if requests else 0.0
+                ),
+                'entries': len(self._entries),
+            }
+
+
+class BlankCache(object):
+    """Blank envelopes (default records) by resource, used by partial_add.
+
+    Envelopes are copied in and out, callers can fill them freely.
+    """
+
+    def __init__(self, ttl=3600):
+        """
+        :param ttl: time to live of an envelope in seconds, None to keep
+            envelopes until they are refreshed, 0 to disable the cache
+        """
+        self.ttl = ttl
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resource):
+        """Return a copy of the envelope of resource, None if missing."""
+        with self._lock:
+            entry = self._entries.get(resource)
+            if entry is not None and entry[1] is not None \
+                    and entry[1] < time.monotonic():
+                del self._entries[resource]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def set(self, resource, envelope):
+        if self.ttl == 0 or not isinstance(envelope, dict):
+            return
+        expires = time.monotonic() + self.ttl \
+            if self.ttl is not None else None
+        with self._lock:
+            self._entries[resource] = (copy.deepcopy(envelope), expires)
+
+    def invalidate(self, resource=None):
+        """Drop the envelope of a resource, or every envelope."""
+        with self._lock:
+            if resource is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(resource_of(resource), None)
+
+    def resources(self):
+        with self._lock:
+            return sorted(self._entries)
+
+    def stats(self):
+        """Return the counters of the cache as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+            }
@@ -2,13 +2,15 @@ from .base import BaseModule
 
 
 class Category(BaseModule):
+    resource = "category"
+
     def create(self, category_data):
         """
         Use this call to add a product category.
         :param category_data:
         :return:
         """
-        return self.client._execute("category", "create", "POST", category_data)
+        return self.client._execute("category", "POST", "create", category_data)
     
     def read(self, options=None):
         """
@@ -16,7 +18,7 @@ class Category(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("category", "read", "GET", options)
+        return self.client._execute("category", "GET", "read", options)
     
     def delete(self, options=None):
         """
@@ -24,7 +26,7 @@ class Category(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("category", "delete", "POST", options)
+        return self.client._execute("category", "POST", "delete", options)
 
     def update(self, options=None):
         """
@@ -32,7 +34,7 @@ class Category(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("category", "update", "PUT", options)
+        return self.client._execute("category", "PUT", "update", options)
     
     def list(self, options=None):
         """
@@ -40,4 +42,4 @@ class Category(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("category", "list", "GET", options)
\ No newline at end of file
+        return self.client._execute("category", "GET", "list", options)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""JSON codecs used to encode request bodies and decode responses.
+
+Every codec encodes to UTF-8 bytes and decodes bytes directly, so the
+response body never goes through requests' charset detection. Decoding
+errors are raised as ValueError subclasses by every backend.
+"""
+import json
+
+
+class StdlibCodec(object):
+    """Codec of the standard json module, always available."""
+
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj):
+        # same output as requests' own json= encoding
+        return json.dumps(obj, allow_nan=False).encode('utf-8')
+
+    @staticmethod
+    def loads(content):
+        return json.loads(content)
+
+
+class OrjsonCodec(object):
+    """Codec of orjson, used when it is installed."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj, option=self._options)
+
+    def loads(self, content):
+        return self._orjson.loads(content)
+
+
+class UjsonCodec(object):
+    """Codec of ujson, used when it is installed and orjson is not."""
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        return self._ujson.dumps(
+            obj, ensure_ascii=False, escape_forward_slashes=False
+        ).encode('utf-8')
+
+    def loads(self, content):
+        return self._ujson.loads(content)
+
+
+CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': StdlibCodec,
+}
+
+# order of preference of 'auto'
+PREFERENCE = ('orjson', 'ujson', 'json')
+
+
+def get_codec(codec=None):
+    """Return a codec instance.
+
+    :param codec: None or 'auto' for the fastest installed codec,
+        'orjson', 'ujson', 'json', or an object with dumps(obj) -> bytes
+        and loads(bytes) methods which is returned as is
+    :return: codec instance
+    """
+    if codec is None or codec == 'auto':
+        for name in PREFERENCE:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(
+                "Unknown codec %r, expected one of %s"
+                % (codec, ', '.join(CODECS))
+            )
+        try:
+            return CODECS[codec]()
+        except ImportError:
+            raise ValueError("Codec %r is not installed" % (codec,))
+    return codec
@@ -0,0 +1,401 @@
+"""Export every record of a resource to a CSV, JSON Lines or Parquet file.
+
+Pages are written as they are received, through a bounded write buffer
+(or a bounded batch of rows for Parquet), so memory stays flat however
+many records are exported. The file is written next to its destination
+and renamed over it once complete, a failed export leaves the previous
+file untouched.
+
+    python -m pospyt.export order orders.csv --date-start 2021-01-01 \\
+        --display id,user_id,total,updated_at
+
+The base url and the api key are read from --base-url/--api-key or the
+POSPYT_BASE_URL/POSPYT_API_KEY environment variables.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .codec import StdlibCodec
+from .ultil import parse_datetime, replace_file
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet',
+}
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BATCH_SIZE = 10000
+
+
+def format_of(path):
+    """Export format matching the extension of path."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(
+            "Unknown export format of %r, expected one of %s"
+            % (path, ', '.join(sorted(EXTENSIONS)))
+        )
+    return EXTENSIONS[extension]
+
+
+def columns_of(options, record):
+    """Columns of the export: id + display, or the fields of record."""
+    display = (options or {}).get('display')
+    if display:
+        return ['id'] + [field for field in display if field != 'id']
+    return list(record)
+
+
+def _flat(value, dumps):
+    # nested values are kept as JSON in flat formats
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode('utf-8')
+    return value
+
+
+class CsvWriter(object):
+    """Write records as CSV rows, nested values as JSON."""
+
+    def __init__(self, path, fields, codec, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.fields = fields
+        self._dumps = codec.dumps
+        self._file = io.open(
+            path, 'w', encoding='utf-8', newline='', buffering=buffer_size
+        )
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(fields)
+
+    def write(self, record):
+        dumps = self._dumps
+        self._writer.writerow([
+            _flat(record.get(field), dumps) for field in self.fields
+        ])
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesWriter(object):
+    """Write records as one JSON document per line."""
+
+    def __init__(self, path, fields, codec, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.fields = fields
+        self._dumps = codec.dumps
+        self._file = io.open(path, 'wb', buffering=buffer_size)
+
+    def write(self, record):
+        self._file.write(self._dumps(record) + b'\n')
+
+    def close(self):
+        self._file.close()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required to export to parquet, "
+            "install it with `pip install pyarrow`"
+        )
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetWriter(object):
+    """Write records to a Parquet file by row groups of batch_size rows.
+
+    The schema is inferred from the first batch, columns without any
+    value in it are strings. Nested values are kept as JSON.
+    """
+
+    def __init__(self, path, fields, codec, batch_size=DEFAULT_BATCH_SIZE):
+        self._pyarrow, self._parquet = _import_pyarrow()
+        self.path = path
+        self.fields = fields
+        self.batch_size = batch_size
+        self._dumps = codec.dumps
+        self._rows = []
+        self._writer = None
+        self._schema = None
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        pyarrow = self._pyarrow
+        dumps = self._dumps
+        table = pyarrow.Table.from_pydict(dict(
+            (field, [_flat(row.get(field), dumps) for row in self._rows])
+            for field in self.fields
+        ))
+        self._rows = []
+        if self._schema is None:
+            self._schema = pyarrow.schema([
+                pyarrow.field(
+                    column.name,
+                    pyarrow.string() if pyarrow.types.is_null(column.type)
+                    else column.type
+                )
+                for column in table.schema
+            ])
+            self._writer = self._parquet.ParquetWriter(
+                self.path, self._schema
+            )
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._rows or self._writer is None:
+            self._flush()
+        self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'jsonl': JsonLinesWriter,
+    'parquet': ParquetWriter,
+}
+
+
+class _ExportFile(object):
+    """Temporary file of an export, renamed over its destination once
+    complete. The writer is created with the first record, whose fields
+    are the columns unless options has 'display'."""
+
+    def __init__(self, path, export_format, options, codec, writer_options):
+        self.path = path
+        self.export_format = export_format
+        self.options = options
+        self.codec = codec
+        self.writer_options = writer_options
+        self.count = 0
+        self._writer = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, self._tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.pospyt-export-',
+            suffix=os.path.splitext(path)[1]
+        )
+        os.close(fd)
+
+    def _open(self, record):
+        return WRITERS[self.export_format](
+            self._tmp_path, columns_of(self.options, record), self.codec,
+            **self.writer_options
+        )
+
+    def write(self, record):
+        if self._writer is None:
+            self._writer = self._open(record)
+        self._writer.write(record)
+        self.count += 1
+
+    def commit(self):
+        if self._writer is None:
+            # no record, the file only has the columns of display
+            self._writer = self._open({})
+        writer, self._writer = self._writer, None
+        writer.close()
+        with open(self._tmp_path, 'rb') as exported:
+            os.fsync(exported.fileno())
+        replace_file(self._tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def _export_file(client, path, export_format, options, buffer_size,
+                 batch_size):
+    export_format = export_format or format_of(path)
+    if export_format not in WRITERS:
+        raise ValueError(
+            "export_format must be one of %s" % (', '.join(FORMATS),)
+        )
+    if export_format == 'parquet':
+        _import_pyarrow()
+        writer_options = {'batch_size': batch_size}
+    else:
+        writer_options = {'buffer_size': buffer_size}
+    codec = getattr(client, 'codec', None) or StdlibCodec()
+    return _ExportFile(path, export_format, options, codec, writer_options)
+
+
+def _result(export, started):
+    return {
+        'path': export.path,
+        'format': export.export_format,
+        'records': export.count,
+        'bytes': os.path.getsize(export.path),
+        'seconds': time.monotonic() - started,
+    }
+
+
+def export_resource(client, resource, path, export_format=None,
+                    options=None, page_size=500, prefetch=2, stream=False,
+                    buffer_size=DEFAULT_BUFFER_SIZE,
+                    batch_size=DEFAULT_BATCH_SIZE):
+    """Export every record of a resource to a file.
+
+    :param client: PosWebServiceDict listing the resource
+    :param resource: string of the resource like 'order', 'product'
+    :param path: path of the file written
+    :param export_format: 'csv', 'jsonl' or 'parquet', default to the
+        extension of path
+    :param options: optional dict of parameters of the list requests
+        (one or more of 'filter', 'display', 'sort', 'date'), the columns
+        are id + display, or the fields of the first record
+    :param page_size: number of records requested per page
+    :param prefetch: number of pages requested while the previous ones
+        are written, 0 to alternate requests and writes
+    :param stream: stream the records of each page instead of
+        prefetching pages, memory is then bounded by one record
+    :param buffer_size: size of the write buffer of csv and jsonl
+    :param batch_size: number of rows of a Parquet row group
+    :return: dict with the path, format, number of records, size of
+        the file and duration of the export
+    """
+    export = _export_file(
+        client, path, export_format, options, buffer_size, batch_size
+    )
+    started = time.monotonic()
+    if stream:
+        records = client.iter_list(resource, options, page_size, stream=True)
+    else:
+        records = client.iter_list(
+            resource, options, page_size, prefetch=prefetch
+        )
+    try:
+        for record in records:
+            export.write(record)
+        export.commit()
+    except BaseException:
+        export.abort()
+        raise
+    finally:
+        close = getattr(records, 'close', None)
+        if close is not None:
+            close()
+    return _result(export, started)
+
+
+async def aexport_resource(client, resource, path, export_format=None,
+                           options=None, page_size=500, prefetch=2,
+                           stream=False, buffer_size=DEFAULT_BUFFER_SIZE,
+                           batch_size=DEFAULT_BATCH_SIZE):
+    """Asynchronous version of export_resource.
+
+    :param client: AsyncPosWebServiceDict listing the resource
+    """
+    export = _export_file(
+        client, path, export_format, options, buffer_size, batch_size
+    )
+    started = time.monotonic()
+    if stream:
+        records = client.iter_list(resource, options, page_size, stream=True)
+    else:
+        records = client.iter_list(
+            resource, options, page_size, prefetch=prefetch
+        )
+    try:
+        async for record in records:
+            export.write(record)
+        export.commit()
+    except BaseException:
+        export.abort()
+        raise
+    finally:
+        await records.aclose()
+    return _result(export, started)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m pospyt.export',
+        description='Export every record of a Pos resource to a file.',
+    )
+    parser.add_argument('resource', help="resource, e.g. 'order'")
+    parser.add_argument('path', help='file written, .csv, .jsonl or .parquet')
+    parser.add_argument('--format', choices=FORMATS, dest='export_format',
+                        help='export format, default to the extension')
+    parser.add_argument('--base-url',
+                        default=os.environ.get('POSPYT_BASE_URL'),
+                        help='root URL of the webservice '
+                             '(default: $POSPYT_BASE_URL)')
+    parser.add_argument('--api-key',
+                        default=os.environ.get('POSPYT_API_KEY'),
+                        help='authentication key (default: $POSPYT_API_KEY)')
+    parser.add_argument('--display',
+                        help='comma-separated fields, e.g. id,name,price')
+    parser.add_argument('--filter', type=json.loads,
+                        help='JSON filter, e.g. '
+                             '\'{"price": {"operator": "lt", "value": 40000}}\'')
+    parser.add_argument('--sort', type=json.loads,
+                        help='JSON sort, e.g. \'{"id": "asc"}\'')
+    parser.add_argument('--date-start', type=parse_datetime,
+                        help='ISO date or datetime')
+    parser.add_argument('--date-end', type=parse_datetime,
+                        help='ISO date or datetime')
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--prefetch', type=int, default=2,
+                        help='pages requested while writing')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream each page instead of prefetching')
+    args = parser.parse_args(argv)
+    if not args.base_url or not args.api_key:
+        parser.error('--base-url and --api-key are required')
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    from .pospyt import PosWebServiceDict
+
+    options = {}
+    if args.display:
+        options['display'] = [
+            field.strip() for field in args.display.split(',') if field.strip()
+        ]
+    if args.filter:
+        options['filter'] = args.filter
+    if args.sort:
+        options['sort'] = args.sort
+    if args.date_start or args.date_end:
+        options['date'] = {'start': args.date_start, 'end': args.date_end}
+
+    client = PosWebServiceDict(args.base_url, args.api_key, retry=True)
+    result = export_resource(
+        client, args.resource, args.path,
+        export_format=args.export_format,
+        options=options,
+        page_size=args.page_size,
+        prefetch=args.prefetch,
+        stream=args.stream,
+    )
+    sys.stderr.write(
+        "%(records)d records written to %(path)s "
+        "(%(bytes)d bytes, %(seconds).1fs)\n" % result
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,13 +2,15 @@ from .base import BaseModule
 
 
 class Invoice(BaseModule):
+    resource = "invoice"
+
     def create(self, invoice_data):
         """
         Use this call to add an invoice.
         :param invoice_data:
         :return:
         """
-        return self.client._execute("invoice", "create", "POST", invoice_data)
+        return self.client._execute("invoice", "POST", "create", invoice_data)
     
     def read(self, options=None):
         """
@@ -16,7 +18,7 @@ class Invoice(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("invoice", "read", "GET", options)
+        return self.client._execute("invoice", "GET", "read", options)
     
     def delete(self, options=None):
         """
@@ -24,7 +26,7 @@ class Invoice(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("invoice", "delete", "POST", options)
+        return self.client._execute("invoice", "POST", "delete", options)
 
     def update(self, options=None):
         """
@@ -32,7 +34,7 @@ class Invoice(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("invoice", "update", "PUT", options)
+        return self.client._execute("invoice", "PUT", "update", options)
     
     def list(self, options=None):
         """
@@ -40,4 +42,4 @@ class Invoice(BaseModule):
         :param options:
         :return:
         """
-        return self.client._execute("invoice", "list", "GET", options)
\ No newline at end of file
+        return self.client._execute("invoice", "GET", "list", options)
\ No newline at end of file
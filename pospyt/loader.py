@@ -0,0 +1,222 @@
+"""Batching of the lookups of records by id, DataLoader style.
+
+Code walking orders and looking up the product of every line with
+find() sends one request per line. A Loader collects the ids asked
+within a short window, or until dispatch() is called, and retrieves
+them with one find_many call, i.e. one list request filtered on id per
+batch. Every id is retrieved once per loader: create one loader per
+unit of work (a web request, a job) so results do not outlive it.
+"""
+import threading
+from concurrent.futures import Future, wait
+
+from .pospyt import PosWebServiceError
+
+# seconds a load waits for other ids before its batch is sent
+DEFAULT_WINDOW = 0.002
+
+
+class Loader(object):
+    """Batch and memoize the find calls of one resource across threads.
+
+    Records are shared by the loads of the same id and must be treated
+    as read-only.
+    """
+
+    def __init__(self, client, resource, options=None, window=DEFAULT_WINDOW,
+                 max_batch_size=100, max_workers=8, memoize=True):
+        """
+        :param client: PosWebServiceDict retrieving the records
+        :param resource: string of the resource like 'product', 'user'
+        :param options: optional dict of parameters of the requests
+            (one or more of 'display', 'date')
+        :param window: seconds a load waits for other ids before its
+            batch is sent, 0 to send it at once
+        :param max_batch_size: number of ids sent at once, a full batch
+            is sent without waiting for the window
+        :param max_workers: number of find calls in flight when the
+            server can't filter by id, see find_many
+        :param memoize: keep the records loaded, a later load of the same
+            id is answered without request
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be a positive integer")
+        self.client = client
+        self.resource = resource
+        self.options = options
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+        self.memoize = memoize
+
+        self._futures = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        self.loads = 0
+        self.memoized = 0
+        self.batches = 0
+
+    @staticmethod
+    def _key(resource_id):
+        # 42 and '42' are the same record, like find_many
+        return str(resource_id)
+
+    def _new_future(self):
+        return Future()
+
+    def submit(self, resource_id):
+        """Queue an id in the current batch.
+
+        :return: Future of the record, None when it does not exist;
+            resolved once the batch is sent, see dispatch
+        """
+        key = self._key(resource_id)
+        with self._lock:
+            self.loads += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self.memoized += 1
+                return future
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending[1]
+            future = self._new_future()
+            if self.memoize:
+                self._futures[key] = future
+            self._pending[key] = (resource_id, future)
+            size = len(self._pending)
+        self._queued(size)
+        return future
+
+    def _queued(self, size):
+        if size >= self.max_batch_size:
+            self.dispatch()
+
+    def _is_pending(self, resource_id, future):
+        with self._lock:
+            pending = self._pending.get(self._key(resource_id))
+            return pending is not None and pending[1] is future
+
+    def load(self, resource_id):
+        """Return the record of an id, sent in a batch with the ids
+        loaded by other threads within the window.
+
+        A record which does not exist is memoized like the others, a
+        failed batch is not: the next load of its ids asks again.
+
+        :param resource_id: id of the record
+        :return: the record as dict, raise PosWebServiceError 404 if
+            it does not exist, or the error of the batch
+        """
+        future = self.submit(resource_id)
+        if not future.done():
+            if self.window:
+                wait([future], timeout=self.window)
+            # unless another thread sent the batch meanwhile
+            if self._is_pending(resource_id, future):
+                self.dispatch()
+        return self._found(future.result())
+
+    def load_many(self, ids):
+        """Return the records of several ids, sent without waiting.
+
+        :param ids: iterable of ids
+        :return: list of records in the order of ids, None for the ids
+            which do not exist
+        """
+        futures = [self.submit(resource_id) for resource_id in ids]
+        self.dispatch()
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _found(record):
+        if record is None:
+            raise PosWebServiceError('Not Found', 404)
+        return record
+
+    def _take_batch(self):
+        with self._lock:
+            batch = list(self._pending.values())
+            self._pending = {}
+            if batch:
+                self.batches += 1
+        return batch
+
+    def _fetch_args(self, batch):
+        return (
+            self.resource,
+            [resource_id for resource_id, _ in batch],
+            self.max_batch_size,
+            self.max_workers,
+            self.options,
+        )
+
+    def _resolve(self, batch, records, missing):
+        # only the ids find_many reports missing (answered 404) resolve
+        # to None, and are memoized as such
+        missing = set(self._key(resource_id) for resource_id in missing)
+        unanswered = []
+        for resource_id, future in batch:
+            record = records.get(resource_id)
+            if record is None and self._key(resource_id) not in missing:
+                unanswered.append((resource_id, future))
+            elif not future.done():
+                future.set_result(record)
+        if unanswered:
+            ids = ', '.join(str(resource_id) for resource_id, _ in unanswered)
+            self._fail(unanswered, PosWebServiceError(
+                'Neither a record nor a 404 for the ids %s' % ids
+            ))
+
+    def _fail(self, batch, error):
+        # errors are not memoized, a later load asks again
+        with self._lock:
+            for resource_id, future in batch:
+                key = self._key(resource_id)
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def dispatch(self):
+        """Send the ids queued so far in one batch and resolve them."""
+        batch = self._take_batch()
+        if not batch:
+            return
+        try:
+            records, missing = self.client.find_many(
+                *self._fetch_args(batch)
+            )
+        except BaseException as err:
+            self._fail(batch, err)
+            if not isinstance(err, Exception):
+                raise
+            return
+        self._resolve(batch, records, missing)
+
+    def prime(self, record):
+        """Remember a record already known, e.g. from a list response."""
+        future = self._new_future()
+        future.set_result(record)
+        with self._lock:
+            self._futures[self._key(record['id'])] = future
+
+    def clear(self, resource_id=None):
+        """Forget the record of an id, or every record."""
+        with self._lock:
+            if resource_id is None:
+                self._futures.clear()
+            else:
+                self._futures.pop(self._key(resource_id), None)
+
+    def stats(self):
+        """Return the counters of the loader as a dict."""
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'memoized': self.memoized,
+                'batches': self.batches,
+                'pending': len(self._pending),
+            }
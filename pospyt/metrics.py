@@ -0,0 +1,257 @@
+"""Metrics of the requests sent by the clients, by resource and action.
+
+A Metrics registry passed to one or more clients (metrics=True creates
+one per client) records for every resource, action and method: the
+requests and their status codes, a latency histogram, the request and
+response bytes, a JSON parse time histogram and the errors by kind.
+Clients without registry only pay an `is None` check per request.
+
+    metrics = Metrics()
+    client = PosWebServiceDict(base_url, api_key, metrics=metrics)
+    ...
+    metrics.snapshot()     # dict, e.g. for a health endpoint
+    metrics.prometheus()   # text exposition format, to be scraped
+"""
+import threading
+from bisect import bisect_left
+
+from .cache import resource_of
+
+# upper bounds of the latency buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# upper bounds of the JSON parse time buckets, in seconds
+PARSE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# error kinds
+CONNECTION = 'connection'
+TIMEOUT = 'timeout'
+HTTP = 'http'
+PARSE = 'parse'
+
+
+class Histogram(object):
+    """Cumulative histogram with fixed bucket bounds, not thread-safe."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def buckets(self):
+        """List of (upper bound, cumulative count), the last one +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'buckets': self.buckets(),
+        }
+
+
+class _Series(object):
+    __slots__ = ('requests', 'statuses', 'errors', 'latency',
+                 'request_bytes', 'response_bytes', 'parse')
+
+    def __init__(self, buckets, parse_buckets):
+        self.requests = 0
+        self.statuses = {}
+        self.errors = {}
+        self.latency = Histogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.parse = Histogram(parse_buckets)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Metrics(object):
+    """Thread-safe registry of the metrics of the requests."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, parse_buckets=PARSE_BUCKETS,
+                 namespace='pospyt'):
+        """
+        :param buckets: upper bounds of the latency buckets in seconds
+        :param parse_buckets: upper bounds of the parse time buckets
+        :param namespace: prefix of the Prometheus metric names
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.parse_buckets = tuple(sorted(parse_buckets))
+        self.namespace = namespace
+
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get(self, uri, action, method):
+        key = (resource_of(uri or ''), action or '', method)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(
+                key, _Series(self.buckets, self.parse_buckets)
+            )
+        return series
+
+    def observe_request(self, uri, action, method, status_code, seconds,
+                        request_bytes=0, response_bytes=0):
+        """Record one attempt which received a response.
+
+        :param status_code: HTTP status of the response
+        :param seconds: time until the response was received
+        """
+        with self._lock:
+            series = self._get(uri, action, method)
+            series.requests += 1
+            series.statuses[status_code] = \
+                series.statuses.get(status_code, 0) + 1
+            series.latency.observe(seconds)
+            series.request_bytes += request_bytes
+            series.response_bytes += response_bytes
+            if status_code >= 400:
+                series.errors[HTTP] = series.errors.get(HTTP, 0) + 1
+
+    def observe_error(self, uri, action, method, kind, seconds=None,
+                      request_bytes=0):
+        """Record an attempt which failed without response, or a
+        response which could not be parsed.
+
+        :param kind: CONNECTION, TIMEOUT or PARSE
+        :param seconds: time until the failure, None for PARSE
+        """
+        with self._lock:
+            series = self._get(uri, action, method)
+            series.errors[kind] = series.errors.get(kind, 0) + 1
+            if seconds is not None:
+                series.requests += 1
+                series.latency.observe(seconds)
+                series.request_bytes += request_bytes
+
+    def observe_parse(self, uri, action, method, seconds):
+        """Record the time spent decoding a response body."""
+        with self._lock:
+            self._get(uri, action, method).parse.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """Return the metrics as a list of dict, one per resource,
+        action and method.
+
+        'requests' counts the attempts, with or without response, and
+        'statuses' the responses by status code.
+        """
+        with self._lock:
+            return [
+                {
+                    'resource': resource,
+                    'action': action,
+                    'method': method,
+                    'requests': series.requests,
+                    'statuses': dict(series.statuses),
+                    'errors': dict(series.errors),
+                    'latency': series.latency.as_dict(),
+                    'request_bytes': series.request_bytes,
+                    'response_bytes': series.response_bytes,
+                    'parse': series.parse.as_dict(),
+                }
+                for (resource, action, method), series
+                in sorted(self._series.items())
+            ]
+
+    def prometheus(self):
+        """Return the metrics in the Prometheus text exposition format,
+        served with PROMETHEUS_CONTENT_TYPE."""
+        name = self.namespace
+        series = self.snapshot()
+        lines = []
+
+        def header(metric, kind, text):
+            lines.append('# HELP %s_%s %s' % (name, metric, text))
+            lines.append('# TYPE %s_%s %s' % (name, metric, kind))
+
+        def sample(metric, labels, value):
+            lines.append('%s_%s{%s} %s' % (
+                name, metric,
+                ','.join('%s="%s"' % (label, _escape(label_value))
+                         for label, label_value in labels),
+                _format_value(value),
+            ))
+
+        def labels_of(entry):
+            return [('resource', entry['resource']),
+                    ('action', entry['action']),
+                    ('method', entry['method'])]
+
+        def histogram(metric, key, text):
+            header(metric, 'histogram', text)
+            for entry in series:
+                labels = labels_of(entry)
+                values = entry[key]
+                for bound, count in values['buckets']:
+                    sample(metric + '_bucket',
+                           labels + [('le', _format_value(bound))], count)
+                sample(metric + '_sum', labels, values['sum'])
+                sample(metric + '_count', labels, values['count'])
+
+        header('requests_total', 'counter',
+               'Requests which received a response, by status code.')
+        for entry in series:
+            for status_code, count in sorted(entry['statuses'].items()):
+                sample('requests_total',
+                       labels_of(entry) + [('code', status_code)], count)
+
+        header('errors_total', 'counter',
+               'Failed requests by kind: connection, timeout, http, parse.')
+        for entry in series:
+            for kind, count in sorted(entry['errors'].items()):
+                sample('errors_total',
+                       labels_of(entry) + [('kind', kind)], count)
+
+        histogram('request_duration_seconds', 'latency',
+                  'Time until the response was received.')
+
+        header('request_bytes_total', 'counter', 'Bytes of request bodies.')
+        for entry in series:
+            sample('request_bytes_total', labels_of(entry),
+                   entry['request_bytes'])
+
+        header('response_bytes_total', 'counter',
+               'Bytes of response bodies.')
+        for entry in series:
+            sample('response_bytes_total', labels_of(entry),
+                   entry['response_bytes'])
+
+        histogram('parse_duration_seconds', 'parse',
+                  'Time spent decoding JSON responses.')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,455 @@
+"""Local SQLite replica of webservice resources.
+
+Records are stored as JSON with their id and timestamps in indexed
+columns, and the options accepted by _validate_query_options ('filter',
+'sort', 'display', 'limit', 'page', 'date') are evaluated with SQL, so
+PosWebServiceDict.list/search can be answered without the network.
+"""
+import json
+import re
+import sqlite3
+import threading
+
+from .cache import resource_of
+from .pagination import aiter_pages, iter_pages
+from .ultil import parse_datetime
+
+DEFAULT_RESOURCES = ('product', 'category', 'store', 'user')
+
+# operator of a filter -> SQL operator
+OPERATORS = {
+    'eq': '=',
+    '=': '=',
+    'ne': '!=',
+    'neq': '!=',
+    '!=': '!=',
+    'lt': '<',
+    '<': '<',
+    'lte': '<=',
+    'le': '<=',
+    '<=': '<=',
+    'gt': '>',
+    '>': '>',
+    'gte': '>=',
+    'ge': '>=',
+    '>=': '>=',
+    'like': 'LIKE',
+    'in': 'IN',
+    'not_in': 'NOT IN',
+}
+
+_FIELD = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def _check_field(field):
+    if not _FIELD.match(str(field)):
+        raise ValueError("Invalid field name: %r" % (field,))
+    return field
+
+
+def _number(value):
+    """Value as int or float if it is a number or a numeric string,
+    like the decimals of the webservice ('32000.00'), None otherwise."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        if number.is_integer() and re.match(r'^\s*-?\d+\s*$', value):
+            return int(number)
+        return number
+    return None
+
+
+def _numbers(values):
+    """values as numbers if they all are, None otherwise."""
+    numbers = [_number(value) for value in values]
+    if any(number is None for number in numbers):
+        return None
+    return numbers
+
+
+def _numeric_column(column, numbers):
+    # ids are compared as integers, other fields as reals, like the
+    # numeric comparisons of the server
+    if column == 'id' and all(
+        float(number).is_integer() for number in numbers
+    ):
+        return 'CAST(id AS INTEGER)', [int(number) for number in numbers]
+    return 'CAST(%s AS REAL)' % column, [float(number) for number in numbers]
+
+
+def _sort_key(column, direction):
+    """ORDER BY terms of a json field, numeric values sorted numerically."""
+    numeric = (
+        "typeof({0}) IN ('integer', 'real') OR ({0} GLOB '[0-9-]*' "
+        "AND {0} NOT GLOB '?*[^0-9.]*')"
+    ).format(column)
+    return 'CASE WHEN %s THEN CAST(%s AS REAL) END %s, %s %s' % (
+        numeric, column, direction, column, direction
+    )
+
+
+def _timestamp(value):
+    parsed = parse_datetime(value)
+    return parsed.strftime(_TIMESTAMP_FORMAT) if parsed else None
+
+
+class LocalMirror(object):
+    """Indexed SQLite replica of selected resources."""
+
+    def __init__(self, path=':memory:', resources=DEFAULT_RESOURCES,
+                 indexes=None, date_field='updated_at'):
+        """
+        :param path: path of the SQLite file, ':memory:' for no file
+        :param resources: resources replicated
+        :param indexes: dict of fields indexed by resource,
+            e.g. {'product': ['price', 'name']}
+        :param date_field: field compared to the 'date' option,
+            'updated_at' or 'created_at'
+        """
+        if date_field not in ('updated_at', 'created_at'):
+            raise ValueError("date_field must be updated_at or created_at")
+        self.path = path
+        self.resources = tuple(_check_field(r) for r in resources)
+        self.indexes = dict(indexes or {})
+        self.date_field = date_field
+
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS "_checkpoint" '
+                '(key TEXT PRIMARY KEY, value TEXT)'
+            )
+            for resource in self.resources:
+                self._create_table(resource)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _create_table(self, table, resource=None):
+        resource = resource or table
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS "%s" ('
+            'id TEXT PRIMARY KEY, updated_at TEXT, created_at TEXT, '
+            'data TEXT NOT NULL)' % table
+        )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS "%s__updated_at" '
+            'ON "%s" (updated_at)' % (table, table)
+        )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS "%s__created_at" '
+            'ON "%s" (created_at)' % (table, table)
+        )
+        for field in self.indexes.get(resource, ()):
+            _check_field(field)
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS "%s__%s" ON "%s" '
+                '(json_extract(data, \'$.%s\'))' % (table, field, table, field)
+            )
+
+    def _table(self, resource):
+        resource = resource_of(resource)
+        if resource not in self.resources:
+            raise KeyError("Resource %r is not mirrored" % (resource,))
+        return resource
+
+    def has(self, resource):
+        return resource_of(resource) in self.resources
+
+    @staticmethod
+    def _row(record):
+        return (
+            str(record['id']),
+            _timestamp(record.get('updated_at')),
+            _timestamp(record.get('created_at')),
+            json.dumps(record),
+        )
+
+    def upsert(self, resource, records):
+        """Insert or replace records of a resource."""
+        table = self._table(resource)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO "%s" (id, updated_at, created_at, data) '
+                'VALUES (?, ?, ?, ?)' % table,
+                [self._row(record) for record in records]
+            )
+
+    # checkpoint store interface, used by incremental refreshes
+    def load(self, key):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM "_checkpoint" WHERE key = ?', (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, key, checkpoint):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO "_checkpoint" (key, value) '
+                'VALUES (?, ?)', (key, json.dumps(checkpoint))
+            )
+
+    def refresh(self, client, resource=None, incremental=False,
+                page_size=500):
+        """Refresh the replica of a resource, or of every resource.
+
+        A full refresh builds a staging table while the current replica
+        keeps answering, then swaps it in. An incremental refresh only
+        upserts the records changed since the last refresh (deleted
+        records are kept until the next full refresh).
+
+        :param client: PosWebServiceDict used to list the resources
+        :param resource: resource to refresh, None for every resource
+        :param incremental: only fetch the records changed since the
+            previous refresh
+        :param page_size: number of records requested per page
+        :return: dict of number of records fetched by resource
+        """
+        resources = [self._table(resource)] if resource else self.resources
+        fetched = {}
+        for name in resources:
+            if incremental:
+                result = client.sync(
+                    name,
+                    lambda records, name=name: self.upsert(name, records),
+                    self,
+                    page_size=page_size,
+                    key='mirror:%s' % name,
+                )
+                fetched[name] = result['records']
+            else:
+                fetched[name] = self._full_refresh(client, name, page_size)
+        return fetched
+
+    async def arefresh(self, client, resource=None, incremental=False,
+                       page_size=500):
+        """Asynchronous version of refresh.
+
+        :param client: AsyncPosWebServiceDict used to list the resources
+        """
+        resources = [self._table(resource)] if resource else self.resources
+        fetched = {}
+        for name in resources:
+            if incremental:
+                result = await client.sync(
+                    name,
+                    lambda records, name=name: self.upsert(name, records),
+                    self,
+                    page_size=page_size,
+                    key='mirror:%s' % name,
+                )
+                fetched[name] = result['records']
+                continue
+
+            async def fetch(page_options, name=name):
+                return await client.list(name, page_options, source='remote')
+
+            self._begin_staging(name)
+            newest = None
+            count = 0
+            async for records in aiter_pages(fetch, {}, page_size):
+                count, newest = self._stage(name, records, count, newest)
+            self._swap_staging(name, newest)
+            fetched[name] = count
+        return fetched
+
+    def _begin_staging(self, resource):
+        staging = '%s__staging' % resource
+        with self._lock, self._connection:
+            self._connection.execute('DROP TABLE IF EXISTS "%s"' % staging)
+            self._connection.execute(
+                'CREATE TABLE "%s" (id TEXT PRIMARY KEY, updated_at TEXT, '
+                'created_at TEXT, data TEXT NOT NULL)' % staging
+            )
+
+    def _stage(self, resource, records, count, newest):
+        """Insert a page in the staging table.
+
+        :return: tuple with (records staged, newest updated_at)
+        """
+        rows = [self._row(record) for record in records]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO "%s__staging" '
+                '(id, updated_at, created_at, data) '
+                'VALUES (?, ?, ?, ?)' % resource, rows
+            )
+        for row in rows:
+            if row[1] and (newest is None or row[1] > newest):
+                newest = row[1]
+        return count + len(rows), newest
+
+    def _swap_staging(self, resource, newest):
+        staging = '%s__staging' % resource
+        with self._lock, self._connection:
+            self._connection.execute('DROP TABLE "%s"' % resource)
+            self._connection.execute(
+                'ALTER TABLE "%s" RENAME TO "%s"' % (staging, resource)
+            )
+            self._create_table(resource)
+            checkpoint = None
+            if newest is not None:
+                checkpoint = {'updated_at': newest.replace(' ', 'T'), 'ids': []}
+            self._connection.execute(
+                'INSERT OR REPLACE INTO "_checkpoint" (key, value) '
+                'VALUES (?, ?)',
+                ('mirror:%s' % resource, json.dumps(checkpoint))
+            )
+
+    def _full_refresh(self, client, resource, page_size):
+        self._begin_staging(resource)
+        count = 0
+        newest = None
+        pages = iter_pages(
+            lambda page_options: client.list(
+                resource, page_options, source='remote'
+            ),
+            {},
+            page_size
+        )
+        for records in pages:
+            count, newest = self._stage(resource, records, count, newest)
+        self._swap_staging(resource, newest)
+        return count
+
+    def _filters(self, options):
+        """Yield (field, condition) of the 'filter' and 'filter[field]' options."""
+        for key, value in options.items():
+            if key == 'filter':
+                for field, condition in (value or {}).items():
+                    yield field, condition
+            elif key.startswith('filter['):
+                yield key[len('filter['):].rstrip(']'), value
+
+    def _where(self, options):
+        clauses = []
+        params = []
+
+        for field, condition in self._filters(options):
+            _check_field(field)
+            if isinstance(condition, dict):
+                operator = str(condition.get('operator', 'eq')).lower()
+                value = condition.get('value')
+            else:
+                operator, value = 'eq', condition
+            if operator not in OPERATORS:
+                raise ValueError("Unsupported filter operator: %r" % operator)
+            sql_operator = OPERATORS[operator]
+
+            column = "json_extract(data, '$.%s')" % field
+            if field == 'id':
+                column = 'id'
+
+            if sql_operator in ('IN', 'NOT IN'):
+                values = list(value or [])
+                if not values:
+                    clauses.append('0' if sql_operator == 'IN' else '1')
+                    continue
+                numbers = _numbers(values)
+                if numbers is not None:
+                    column, values = _numeric_column(column, numbers)
+                elif field == 'id':
+                    values = [str(v) for v in values]
+                clauses.append('%s %s (%s)' % (
+                    column, sql_operator, ', '.join('?' * len(values))
+                ))
+                params.extend(values)
+                continue
+
+            number = _number(value) if sql_operator != 'LIKE' else None
+            if number is not None:
+                # the webservice returns decimals as strings like '32000.00'
+                column, (value,) = _numeric_column(column, [number])
+            elif field == 'id':
+                value = str(value)
+            clauses.append('%s %s ?' % (column, sql_operator))
+            params.append(value)
+
+        date = options.get('date')
+        if isinstance(date, dict):
+            if date.get('start') is not None:
+                clauses.append('%s >= ?' % self.date_field)
+                params.append(_timestamp(date['start']))
+            if date.get('end') is not None:
+                clauses.append('%s <= ?' % self.date_field)
+                params.append(_timestamp(date['end']))
+
+        return clauses, params
+
+    def _order_by(self, options):
+        sort = options.get('sort') or {}
+        terms = []
+        for field, direction in sort.items():
+            _check_field(field)
+            direction = 'DESC' if str(direction).lower() == 'desc' else 'ASC'
+            if field == 'id':
+                terms.append('CAST(id AS INTEGER) %s, id %s' % (direction, direction))
+            elif field in ('updated_at', 'created_at'):
+                terms.append('%s %s' % (field, direction))
+            else:
+                terms.append(_sort_key(
+                    "json_extract(data, '$.%s')" % field, direction
+                ))
+        terms.append('CAST(id AS INTEGER), id')
+        return ', '.join(terms)
+
+    def query(self, resource, options=None, columns='data'):
+        """Evaluate list options on the replica.
+
+        :param resource: mirrored resource, e.g. 'product'
+        :param options: dict of options, same as PosWebServiceDict.list
+        :param columns: 'data' for the records, 'id' for their ids only
+        :return: list of records as dict, or list of ids
+        """
+        table = self._table(resource)
+        options = options or {}
+        clauses, params = self._where(options)
+
+        sql = 'SELECT %s FROM "%s"' % (
+            'id' if columns == 'id' else 'data', table
+        )
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ' + self._order_by(options)
+
+        limit = options.get('limit')
+        if limit is not None:
+            page = int(options.get('page') or 1)
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([int(limit), (page - 1) * int(limit)])
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        if columns == 'id':
+            return [row[0] for row in rows]
+
+        records = [json.loads(row[0]) for row in rows]
+        display = options.get('display')
+        if display:
+            fields = ['id'] + [field for field in display if field != 'id']
+            records = [
+                dict((field, record.get(field)) for field in fields)
+                for record in records
+            ]
+        return records
+
+    def find(self, resource, resource_id):
+        """Return the record of an id, None if it is not mirrored."""
+        table = self._table(resource)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM "%s" WHERE id = ?' % table,
+                (str(resource_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
@@ -2,6 +2,8 @@ from .base import BaseModule
 
 
 class Order(BaseModule):
+    resource = "order"
+
     def create(self, order_data):
         """
         Use this call to add an order.
@@ -0,0 +1,211 @@
+from collections import deque
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _page_ends_walk(count, served):
+    """Tell whether a page of count records is the last one.
+
+    The server may cap 'limit' below the page size asked, so the size of
+    the pages it serves is taken from the first page: a shorter page
+    after it is the last one. An empty page always is.
+
+    :param served: records of the first page, None for the first page
+    :return: tuple with (last page, records per page served)
+    """
+    if not count:
+        return True, served
+    if served is None:
+        return False, count
+    return count < served, served
+
+
+def _resolve_page_size(options, page_size):
+    if page_size is None:
+        page_size = options.get('limit') or DEFAULT_PAGE_SIZE
+    page_size = int(page_size)
+    if page_size <= 0:
+        raise ValueError("page_size must be a positive integer")
+    return page_size
+
+
+def iter_pages(fetch, options=None, page_size=None, prefetch=0,
+               max_workers=None):
+    """Walk the 'page' option until the server runs dry.
+
+    The walk ends on an empty page, or on a page shorter than the first
+    one (the server may serve fewer records than page_size). Without
+    prefetch, only the page being consumed is kept in memory,
+    the next one is requested when the caller asks for it.
+
+    :param fetch: callable taking a dict of options and returning
+        the list of records of that page
+    :param options: dict of options shared by every page
+        (one or more of 'filter', 'display', 'sort', 'date')
+    :param page_size: number of records per page, default to the
+        'limit' option or DEFAULT_PAGE_SIZE
+    :param prefetch: number of pages kept in flight ahead of the
+        consumer, 0 to fetch pages one after the other
+    :param max_workers: size of the thread pool used to prefetch,
+        default to prefetch
+    :return: generator of list of records, in page order
+    """
+    options = dict(options or {})
+    page_size = _resolve_page_size(options, page_size)
+    page = int(options.get('page') or 1)
+
+    if prefetch:
+        return _iter_prefetched_pages(
+            fetch, options, page_size, page, prefetch, max_workers
+        )
+    return _iter_sequential_pages(fetch, options, page_size, page)
+
+
+def _iter_sequential_pages(fetch, options, page_size, page):
+    served = None
+    while True:
+        records = fetch(dict(options, page=page, limit=page_size))
+        last, served = _page_ends_walk(len(records or ()), served)
+        if records:
+            yield records
+        if last:
+            return
+        page += 1
+
+
+def _iter_prefetched_pages(fetch, options, page_size, page, prefetch,
+                           max_workers):
+    """Keep `prefetch` pages in flight and hand them over in page order.
+
+    The total is unknown, so pages are requested speculatively: the
+    page ending the walk (see _page_ends_walk) cancels or discards the
+    requests still in flight after it.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or prefetch)
+    pending = deque()
+    served = None
+    try:
+        while True:
+            while len(pending) < prefetch:
+                pending.append(executor.submit(
+                    fetch, dict(options, page=page, limit=page_size)
+                ))
+                page += 1
+            records = pending.popleft().result()
+            last, served = _page_ends_walk(len(records or ()), served)
+            if records:
+                yield records
+            if last:
+                return
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_records(fetch, options=None, page_size=None, prefetch=0,
+                 max_workers=None):
+    """Same as iter_pages but yield the records one at a time.
+
+    :return: generator of records
+    """
+    for records in iter_pages(fetch, options, page_size, prefetch,
+                              max_workers):
+        for record in records:
+            yield record
+
+
+def iter_streamed_records(fetch, options=None, page_size=None):
+    """Same as iter_records for a fetch which streams the records.
+
+    The records of each page are yielded as they are decoded and never
+    collected, so memory is bounded by one record instead of one page.
+
+    :param fetch: callable taking a dict of options and returning an
+        iterator over the records of that page
+    :return: generator of records
+    """
+    options = dict(options or {})
+    page_size = _resolve_page_size(options, page_size)
+    page = int(options.get('page') or 1)
+    served = None
+
+    while True:
+        count = 0
+        for record in fetch(dict(options, page=page, limit=page_size)):
+            count += 1
+            yield record
+        last, served = _page_ends_walk(count, served)
+        if last:
+            return
+        page += 1
+
+
+async def aiter_pages(fetch, options=None, page_size=None, prefetch=0):
+    """Asynchronous version of iter_pages.
+
+    :param fetch: coroutine function taking a dict of options and
+        returning the list of records of that page
+    :param prefetch: number of pages kept in flight as asyncio tasks
+    :return: asynchronous generator of list of records, in page order
+    """
+    import asyncio
+
+    options = dict(options or {})
+    page_size = _resolve_page_size(options, page_size)
+    page = int(options.get('page') or 1)
+    prefetch = max(int(prefetch or 0), 1)
+
+    pending = deque()
+    served = None
+    try:
+        while True:
+            while len(pending) < prefetch:
+                pending.append(asyncio.ensure_future(
+                    fetch(dict(options, page=page, limit=page_size))
+                ))
+                page += 1
+            records = await pending.popleft()
+            last, served = _page_ends_walk(len(records or ()), served)
+            if records:
+                yield records
+            if last:
+                return
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def aiter_records(fetch, options=None, page_size=None, prefetch=0):
+    """Same as aiter_pages but yield the records one at a time.
+
+    :return: asynchronous generator of records
+    """
+    async for records in aiter_pages(fetch, options, page_size, prefetch):
+        for record in records:
+            yield record
+
+
+async def aiter_streamed_records(fetch, options=None, page_size=None):
+    """Asynchronous version of iter_streamed_records.
+
+    :param fetch: callable taking a dict of options and returning an
+        asynchronous iterator over the records of that page
+    :return: asynchronous generator of records
+    """
+    options = dict(options or {})
+    page_size = _resolve_page_size(options, page_size)
+    page = int(options.get('page') or 1)
+    served = None
+
+    while True:
+        count = 0
+        async for record in fetch(dict(options, page=page, limit=page_size)):
+            count += 1
+            yield record
+        last, served = _page_ends_walk(count, served)
+        if last:
+            return
+        page += 1
@@ -1,31 +1,56 @@
 import copy
 import time
-import json
-from requests import Request, Session, exceptions
-from http.client import HTTPConnection
+from requests import PreparedRequest, exceptions
+from requests.cookies import RequestsCookieJar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import (
+    check_header_validity, get_auth_from_url, to_native_string
+)
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE
 from urllib.parse import urlencode
-import mimetypes
-from bs4 import BeautifulSoup
 from datetime import datetime
-
-from .ultil import convert_to_valid_format
-from .store import Store
-from .user import User
-from .product import Product
-from .order import Order
-from .category import Category
-from .invoice import Invoice
-
-# installed sub-module
+from importlib import import_module
+from operator import itemgetter
+
+from .ultil import convert_to_valid_format, extract_html_title
+from .codec import get_codec
+from .streaming import DEFAULT_CHUNK_SIZE, DataStream
+from .pagination import iter_records, iter_streamed_records
+from .cache import (
+    CACHEABLE_ACTIONS, BlankCache, ResponseCache, Revalidator, make_key,
+    resource_of
+)
+from .records import RESULT_FORMATS, format_records
+from .bulk import (
+    BulkItemResult, BulkResult, batch_results, chunk_items, retry_items
+)
+from .snapshot import RecordCache, diff_fields, unmodified_since
+from .singleflight import SingleFlight
+from .metrics import CONNECTION, PARSE, TIMEOUT, Metrics
+from .session import make_session, pool_stats, shared_session
+from .retry import RetryPolicy, circuit_breaker_for
+from .ratelimit import AdaptiveConcurrency, RateLimiter
+from .sync import incremental_sync
+
+# installed sub-module, as a class or the import path of the class,
+# imported on first use
 registered_module = {
-    "store":Store,
-    "category": Category,
-    "product": Product,
-    "user":User,
-    "invoice":Invoice,
-    "order": Order
+    "store": "pospyt.store.Store",
+    "category": "pospyt.category.Category",
+    "product": "pospyt.product.Product",
+    "user": "pospyt.user.User",
+    "invoice": "pospyt.invoice.Invoice",
+    "order": "pospyt.order.Order"
 }
 
+
+def load_module_class(installed):
+    """Return the class of a registered module, importing it if needed."""
+    if isinstance(installed, str):
+        module_path, class_name = installed.rsplit('.', 1)
+        installed = getattr(import_module(module_path), class_name)
+    return installed
+
 class ClientMeta(type):
     def __new__(mcs, name, bases, dct):
         klass = super(ClientMeta, mcs).__new__(mcs, name, bases, dct)
@@ -54,11 +79,25 @@ class PosWebServiceError(Exception):
 class PosAuthenticationError(PosWebServiceError):
     pass
 
+class PosCircuitOpenError(PosWebServiceError):
+    """Raised without sending the request while the circuit is open."""
+    pass
+
+class PosConflictError(PosWebServiceError):
+    """Raised when the server refuses a write on a modified record."""
+    pass
+
 class PosWebservice(object, metaclass=ClientMeta):
     __metaclass__ = ClientMeta
 
     def __init__(self, base_url, api_key, debug=False, session=None,
-                 verbose=False):
+                 verbose=False, cache=None, revalidate=False,
+                 pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 keep_alive=True, tcp_keepalive=False, shared_pool=False,
+                 retry=None, circuit_breaker=None, rate_limiter=None,
+                 concurrency=None, codec=None, single_flight=False,
+                 metrics=None):
         """
         Create an instance of PrestashopWebService.
 
@@ -88,6 +127,37 @@ class PosWebservice(object, metaclass=ClientMeta):
         :param session: pass a custom requests Session
         :param verbose: activate logging of the requests/responses (but no
         responses body)
+        :param cache: True or a ResponseCache to cache the GET find, list,
+        search and read responses, any write on a resource invalidates
+        its entries
+        :param revalidate: True or a Revalidator to send GET requests
+        conditionally (If-None-Match/If-Modified-Since) and reuse the
+        parsed body on 304 Not Modified
+        :param pool_connections: number of per-host connection pools kept
+        :param pool_maxsize: maximum number of connections kept to the host
+        :param pool_block: wait for a free connection when the pool is full
+        instead of opening one that is dropped afterwards
+        :param keep_alive: reuse connections, False sends 'Connection: close'
+        :param tcp_keepalive: enable SO_KEEPALIVE on pooled sockets
+        :param shared_pool: share one session, and its connection pool,
+        with every client of the same host and pool options
+        (the pool options are ignored when a session is passed)
+        :param retry: True or a RetryPolicy to retry failed requests,
+        only GET and HEAD unless the policy allows POST
+        :param circuit_breaker: True to share a CircuitBreaker with every
+        client of base_url, or a CircuitBreaker
+        :param rate_limiter: number of requests per second, or a RateLimiter
+        (shared between clients for a global budget)
+        :param concurrency: True or an AdaptiveConcurrency to limit the
+        requests in flight and adapt the limit to latency and 429/5xx
+        :param codec: JSON codec of request bodies and responses, 'orjson',
+        'ujson', 'json' or a codec object, default to the fastest installed
+        :param single_flight: True or a SingleFlight to share one request
+        between the threads sending the same GET or HEAD at the same time,
+        each of them gets its own copy of the response
+        :param metrics: True or a Metrics registry (shared between clients
+        for global figures) recording the requests, status codes,
+        latency, bytes, parse time and errors by resource and action
         """
         self._api_key = api_key
         self._base_url = base_url
@@ -97,14 +167,38 @@ class PosWebservice(object, metaclass=ClientMeta):
         self.verbose = verbose
 
         if session is None:
-            self.client = Session()
+            pool_options = {
+                'pool_connections': pool_connections,
+                'pool_maxsize': pool_maxsize,
+                'pool_block': pool_block,
+                'keep_alive': keep_alive,
+                'tcp_keepalive': tcp_keepalive,
+            }
+            if shared_pool:
+                self.client = shared_session(base_url, **pool_options)
+            else:
+                self.client = make_session(base_url, **pool_options)
         else:
             self.client = session
 
         if not self.client.auth:
             self.client.auth = (api_key, '')
 
+        self.cache = self._make_cache(cache)
+        self.revalidator = self._make_revalidator(revalidate)
+        self.retry = self._make_retry(retry)
+        self.circuit_breaker = self._make_circuit_breaker(
+            base_url, circuit_breaker
+        )
+        self.rate_limiter = self._make_rate_limiter(rate_limiter)
+        self.concurrency = self._make_concurrency(concurrency)
+        self.codec = get_codec(codec)
+        self.single_flight = self._make_single_flight(single_flight)
+        self.metrics = self._make_metrics(metrics)
+
         self.CACHED_MODULE = {}
+        self._url_cache = {}
+        self._headers_template = None
     
     def __getattr__(self, name):
         try:
@@ -115,6 +209,140 @@ class PosWebservice(object, metaclass=ClientMeta):
                 raise e
         return value
         
+    @staticmethod
+    def _make_cache(cache):
+        if cache is True:
+            return ResponseCache()
+        return cache or None
+
+    @staticmethod
+    def _make_revalidator(revalidate):
+        if revalidate is True:
+            return Revalidator()
+        return revalidate or None
+
+    @staticmethod
+    def _make_metrics(metrics):
+        if metrics is True:
+            return Metrics()
+        return metrics or None
+
+    @staticmethod
+    def _make_single_flight(single_flight):
+        if single_flight is True:
+            return SingleFlight()
+        return single_flight or None
+
+    @staticmethod
+    def _make_retry(retry):
+        if retry is True:
+            return RetryPolicy()
+        return retry or None
+
+    @staticmethod
+    def _make_circuit_breaker(base_url, circuit_breaker):
+        if circuit_breaker is True:
+            return circuit_breaker_for(base_url)
+        return circuit_breaker or None
+
+    @staticmethod
+    def _make_rate_limiter(rate_limiter):
+        if isinstance(rate_limiter, (int, float)) \
+                and not isinstance(rate_limiter, bool):
+            return RateLimiter(rate=rate_limiter)
+        return rate_limiter or None
+
+    @staticmethod
+    def _make_concurrency(concurrency):
+        if concurrency is True:
+            return AdaptiveConcurrency()
+        return concurrency or None
+
+    def _check_circuit(self):
+        """Raise PosCircuitOpenError while the circuit breaker is open."""
+        if self.circuit_breaker is not None \
+                and not self.circuit_breaker.allow():
+            raise PosCircuitOpenError(
+                'Circuit open for %s, retry in %.1fs' % (
+                    self._base_url, self.circuit_breaker.retry_in()
+                )
+            )
+
+    def _record_outcome(self, status_code):
+        """Report the outcome of a request to the circuit breaker.
+
+        :param status_code: status of the response, None when the
+            request failed before a response was received
+        """
+        if self.circuit_breaker is None:
+            return
+        if status_code is None or status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def _release_circuit(self):
+        """End a request without outcome for the circuit breaker, e.g.
+        interrupted or failed with an unexpected exception."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release()
+
+    def _retry_delay(self, method, attempt, status_code=None,
+                     retry_after=None):
+        if self.retry is None:
+            return None
+        return self.retry.next_delay(method, attempt, status_code, retry_after)
+
+    def _conditional_request(self, uri, method, action, data, add_headers):
+        """Add the validators of a previous response to a GET request.
+
+        :return: tuple with (revalidation key, headers), the key is None
+            when the request is not revalidated
+        """
+        if self.revalidator is None or method != 'GET':
+            return None, add_headers
+        key = make_key(uri, action, data)
+        headers = self.revalidator.conditional_headers(key)
+        if headers:
+            add_headers = dict(add_headers or {}, **headers)
+        return key, add_headers
+
+    def _cache_lookup(self, uri, method, action, data):
+        """Look a request up in the response cache.
+
+        :return: tuple with (cache key, cached body), the key is None
+            when the request can't be cached
+        """
+        if (self.cache is None or method != 'GET'
+                or action not in CACHEABLE_ACTIONS):
+            return None, None
+        key = make_key(uri, action, data)
+        return key, self.cache.get(key)
+
+    def _cache_store(self, key, result, content):
+        if key is None:
+            return
+        if isinstance(result, dict) and result.get('success') is False:
+            return
+        self.cache.set(key, content)
+
+    def _cache_invalidate(self, uri, method):
+        """Drop the cached responses of the resource written by a request."""
+        if method in ('GET', 'HEAD'):
+            return
+        if self.cache is not None:
+            self.cache.invalidate(uri)
+        if self.revalidator is not None:
+            self.revalidator.invalidate(uri)
+
+    def pool_stats(self):
+        """Describe the utilization of the connection pools of the session.
+
+        :return: list of dict with the host, maxsize, in_use and idle
+            connections of each pool
+        """
+        return pool_stats(self.client)
+
     def _make_timestamp(self):
         return int(time.time())
     
@@ -123,54 +351,125 @@ class PosWebservice(object, metaclass=ClientMeta):
             "timestamp": self._make_timestamp()
         }
 
+    def _build_url(self, uri, action):
+        """Return the prepared url of a resource/action.
+
+        Urls are parsed and quoted once per resource/action then cached.
+
+        :return: tuple with (url, prepared url or None when the url
+            holds credentials and has to be prepared on every call)
+        """
+        key = (self._base_url, uri, action)
+        cached = self._url_cache.get(key)
+        if cached is None:
+            base_url = self._base_url
+
+            if base_url.endswith('/'):
+                url = base_url + uri
+            else:
+                url = base_url + '/' + uri
+
+            if action is not None:
+                url = f"{url}/{action}"
+
+            prepared = PreparedRequest()
+            prepared.prepare_url(url, None)
+            if any(get_auth_from_url(prepared.url)):
+                cached = (url, None)
+            else:
+                cached = (url, prepared.url)
+            self._url_cache[key] = cached
+        return cached
+
+    def _header_template(self):
+        """Return the validated session headers and X-API-Key header.
+
+        The template is built again only when the session headers change.
+        """
+        snapshot = tuple(self._session_headers().items())
+        cached = self._headers_template
+        if cached is None or cached[0] != snapshot:
+            template = CaseInsensitiveDict()
+            for header in snapshot:
+                check_header_validity(header)
+                template[to_native_string(header[0])] = header[1]
+            authenticate_header = ("X-API-Key", self._api_key)
+            check_header_validity(authenticate_header)
+            cached = (snapshot, template, authenticate_header)
+            self._headers_template = cached
+        return cached[1], cached[2]
+
     def _build_request(self, uri, method, action, headers, data):
+        """Build the prepared request sent by _execute.
+
+        Only the 'date' sub-dict of data is copied, to convert its
+        'start/end' to strings, the rest of data is serialized as is.
+
+        :param headers: additional headers merged onto session headers
+        :return: requests PreparedRequest
+        """
         method = method.upper()
-        url = ""
-        base_url = self._base_url
- 
-        if base_url.endswith('/'):
-            url = base_url + uri
-        else:
-            url = base_url + '/' + uri
-        
-        if action is not None:
-            url = f"{url}/{action}"
-        
-        authenticate_headers = {
-            "X-API-Key": self._api_key
-        }
-        
-        if headers is not None:
-            headers.update(authenticate_headers)
-        
-        request = Request(method, url, headers=headers)
+        request_data = data
 
         # Convert 'start/end' from datetime object to ISO 8601 string if not None
-        if data:
-            # Deep copy ensures that not change original data
-            request_data = copy.deepcopy(data)
-
-            if 'date' in request_data and isinstance(request_data['date'], dict):                
-                if request_data['date'].get('start') is not None:
-                    start = request_data['date']['start']
-                    if isinstance(request_data['date']['start'], datetime):
-                        request_data['date']['start'] = convert_to_valid_format(start)
-                    else:
-                        raise PosWebServiceError("start value in date dictionary must be datetime")
-                
-                if request_data['date'].get('end') is not None:
-                    end = request_data['date']['end']
-                    if isinstance(end, datetime):
-                        request_data['date']['end'] = convert_to_valid_format(end)
-                    else:
-                        raise PosWebServiceError("end value in date dictionary must be datetime")
-
-            if request.method in ["POST", "PUT", "PATCH"]:
-                request.json = request_data
+        if data and isinstance(data, dict) \
+                and isinstance(data.get('date'), dict):
+            date = dict(data['date'])
+
+            if date.get('start') is not None:
+                start = date['start']
+                if isinstance(start, datetime):
+                    date['start'] = convert_to_valid_format(start)
+                else:
+                    raise PosWebServiceError("start value in date dictionary must be datetime")
+
+            if date.get('end') is not None:
+                end = date['end']
+                if isinstance(end, datetime):
+                    date['end'] = convert_to_valid_format(end)
+                else:
+                    raise PosWebServiceError("end value in date dictionary must be datetime")
+
+            request_data = dict(data)
+            request_data['date'] = date
+
+        json_data = None
+        params = None
+        if request_data:
+            if method in ["POST", "PUT", "PATCH"]:
+                json_data = request_data
             elif isinstance(request_data, dict):
-                request.json = request_data
+                json_data = request_data
             else:
-                request.params = request_data
+                params = request_data
+
+        url, prepared_url = self._build_url(uri, action)
+        template, authenticate_header = self._header_template()
+
+        request = PreparedRequest()
+        request.method = to_native_string(method)
+        if prepared_url is None or params:
+            request.prepare_url(url, params)
+        else:
+            request.url = prepared_url
+
+        request.headers = template.copy()
+        if headers:
+            for header in headers.items():
+                check_header_validity(header)
+                request.headers[to_native_string(header[0])] = header[1]
+        request.headers[authenticate_header[0]] = authenticate_header[1]
+
+        # the cookie jar is empty, only needed if the request is redirected
+        request._cookies = RequestsCookieJar()
+        if json_data is not None:
+            request.prepare_body(self.codec.dumps(json_data), None)
+            if 'Content-Type' not in request.headers:
+                request.headers['Content-Type'] = 'application/json'
+        else:
+            request.prepare_body(None, None)
+        if prepared_url is None:
+            request.prepare_auth(None, url)
 
         return request
 
@@ -181,7 +480,7 @@ class PosWebservice(object, metaclass=ClientMeta):
             installed = self.registered_module.get(key)
             if not installed:
                 return None
-            CACHED_MODULE = installed(self)
+            CACHED_MODULE = load_module_class(installed)(self)
             self.CACHED_MODULE.setdefault(key, CACHED_MODULE)
         return CACHED_MODULE
 
@@ -204,19 +503,14 @@ class PosWebservice(object, metaclass=ClientMeta):
             return (code, message)
         else:
             # Assuming the content is in HTML format (Laravel)
-            # Extract the error message from the HTML content
-            soup = BeautifulSoup(content, 'html.parser')
-            title_tag = soup.title
-            if title_tag is not None:
-                error_message = title_tag.string
-            else:
-                error_message = None
-            return (None, error_message)
+            # Extract the error message from the title of the page
+            return (None, extract_html_title(content))
 
     def _check_status_code(self, status_code, content):
         """Take the status code and check it.
 
-        Throw an exception if the server didn't return 200 or 201 code.
+        Throw an exception if the server didn't return 200 or 201 code,
+        or 304 to a conditional request.
 
         :param status_code: status code returned by the server
         :return: True or raise an exception PrestaShopWebServiceError
@@ -226,9 +520,11 @@ class PosWebservice(object, metaclass=ClientMeta):
                            401: 'Unauthorized',
                            404: 'Not Found',
                            405: 'Method Not Allowed',
+                           409: 'Conflict',
+                           412: 'Precondition Failed',
                            500: 'Internal Server Error',
                            }
-        if status_code in (200, 201):
+        if status_code in (200, 201, 304):
             return True
         elif status_code == 401:
             # the content is empty for auth errors
@@ -236,6 +532,14 @@ class PosWebservice(object, metaclass=ClientMeta):
                 message_by_code[status_code],
                 status_code
             )
+        elif status_code in (409, 412):
+            ps_error_code, ps_error_msg = self._parse_error(content)
+            raise PosConflictError(
+                message_by_code[status_code],
+                status_code,
+                ps_error_msg=ps_error_msg,
+                ps_error_code=ps_error_code,
+            )
         elif status_code in message_by_code:
             ps_error_code, ps_error_msg = self._parse_error(content)
             raise PosWebServiceError(
@@ -256,15 +560,15 @@ class PosWebservice(object, metaclass=ClientMeta):
     def _parse(self, content):
         """Parse the response of the webservice.
 
-        :param content: response from the webservice
+        :param content: raw bytes of the response from the webservice
         :return: an json object of the content
         """
         if not content:
             raise PosWebServiceError('HTTP response is empty')
 
         try:
-            parsed_content = json.loads(content)
-        except json.JSONDecodeError as err:
+            parsed_content = self.codec.loads(content)
+        except ValueError as err:
             raise PosWebServiceError(
                 'HTTP Json response is not parsable : %s' % (err,)
             )
@@ -279,13 +583,14 @@ class PosWebservice(object, metaclass=ClientMeta):
         """
 
         if method == "HEAD":
-            if resp.status_code / 100 == 2:
+            if resp.status_code // 100 == 2:
                 return resp.headers
             else:
                 return {"request_id": None, "error": resp.status_code, "msg": "HTTP error code"}
 
-        if resp.status_code / 100 == 2:
-            body = self._parse(resp.text)
+        if resp.status_code // 100 == 2:
+            # decode the bytes, resp.text would guess the charset first
+            body = self._parse(resp.content)
         else:
             body = {"request_id": None, "error": resp.status_code, "msg": "HTTP error code"}
 
@@ -320,23 +625,21 @@ class PosWebservice(object, metaclass=ClientMeta):
             )
         return True
     
+    @staticmethod
     def _make_default_option():
         return {
                 'limit': 10,
                 'page': 1
             }
 
-    def _execute(self, uri, method, action=None, data=None, add_headers=None):
-        """Execute a request on the PrestaShop Webservice.
+    def _prepare_execute(self, uri, method, action=None, data=None,
+                         add_headers=None):
+        """Build the request of _execute without sending it.
 
-        :param url: full URL to call
-        :param method: GET, POST, PUT, DELETE, HEAD
-        :param body: for PUT (edit) and POST (add) only,
-                        the JSON data sent to PrestaShop
-        :param add_headers: additional headers merged onto instance's headers.
-        :return: tuple with (status code, header, content) of the response.
-        """
+        Shared by the synchronous and asynchronous clients.
 
+        :return: tuple with (prepared request, timeout)
+        """
         method_with_default_options = ["GET", "HEAD"]
         if data is None and method in method_with_default_options:
             data = self._make_default_option()
@@ -349,34 +652,404 @@ class PosWebservice(object, metaclass=ClientMeta):
         if self.debug:
             data.update({'debug': True})
 
-        if add_headers is None:
-            add_headers = {}
-
-        request_headers = self.client.headers.copy()
-        request_headers.update(add_headers)
-
         request = self._build_request(
             uri,
             method,
             action,
-            headers=request_headers,
+            headers=add_headers,
             data=data
         )
+        return request, timeout
+
+    def _session_headers(self):
+        return self.client.headers
+
+    def _handle_response(self, method, response, revalidation_key=None):
+        """Check the status of the response and decode its body.
+
+        :param method: HTTP method of the request
+        :param response: requests Response
+        :param revalidation_key: key of a conditional request
+        :return: the response as a dict
+        """
+        self._check_status_code(response.status_code, response.content)
+
+        if response.status_code == 304:
+            body = None
+            if revalidation_key is not None:
+                body = self.revalidator.revalidated(revalidation_key)
+            if body is None:
+                raise PosWebServiceError(
+                    'Not Modified without a stored response',
+                    response.status_code
+                )
+            return body
+
+        body = self._build_response(method, response)
+        if revalidation_key is not None:
+            self.revalidator.store(revalidation_key, response.headers, body)
+        return body
+
+    def _execute(self, uri, method, action=None, data=None, add_headers=None):
+        """Execute a request on the PrestaShop Webservice.
+
+        :param url: full URL to call
+        :param method: GET, POST, PUT, DELETE, HEAD
+        :param body: for PUT (edit) and POST (add) only,
+                        the JSON data sent to PrestaShop
+        :param add_headers: additional headers merged onto instance's headers.
+        :return: tuple with (status code, header, content) of the response.
+        """
+        cache_key, cached = self._cache_lookup(uri, method, action, data)
+        if cached is not None:
+            return self._parse(cached)
+
+        flight_key = self._flight_key(uri, method, action, data, add_headers)
+        if flight_key is None:
+            return self._execute_once(
+                uri, method, action, data, add_headers, cache_key
+            )[0]
+        (result, content), leader = self.single_flight.do(
+            flight_key,
+            lambda: self._execute_once(
+                uri, method, action, data, add_headers, cache_key
+            )
+        )
+        if leader:
+            return result
+        return self._shared_copy(result, content)
+
+    def _flight_key(self, uri, method, action, data, add_headers):
+        """Key shared by identical idempotent requests, None otherwise."""
+        if self.single_flight is None or method not in ('GET', 'HEAD'):
+            return None
+        headers = tuple(sorted((add_headers or {}).items()))
+        return (method, headers) + make_key(uri, action, data)
+
+    def _shared_copy(self, result, content):
+        """Copy of the result of a request sent by another caller."""
+        if content and isinstance(result, (dict, list)):
+            # parsing again is faster than a deep copy
+            return self._parse(content)
+        return copy.deepcopy(result)
+
+    def _execute_once(self, uri, method, action, data, add_headers,
+                      cache_key):
+        """Send the request of _execute.
+
+        :return: tuple with (result, raw body of the response)
+        """
+        revalidation_key, add_headers = self._conditional_request(
+            uri, method, action, data, add_headers
+        )
+        prepped, timeout = self._prepare_execute(
+            uri, method, action, data, add_headers
+        )
 
         if self.verbose:
+            from http.client import HTTPConnection
             currentlevel = HTTPConnection.debuglevel
             HTTPConnection.debuglevel = 1
         try:
-            prepped = request.prepare()
-            response = self.client.send(prepped, timeout=timeout)
+            response = self._send(prepped, timeout, uri, action)
         finally:
             if self.verbose:
                 HTTPConnection.debuglevel = currentlevel
+            self._cache_invalidate(uri, method)
 
-        self._check_status_code(response.status_code, response.content)
-        response = self._build_response(method, response)
+        if self.metrics is None:
+            result = self._handle_response(method, response, revalidation_key)
+        else:
+            result = self._observe_response(
+                uri, action, method, response, revalidation_key
+            )
+        if response.status_code != 304:
+            self._cache_store(cache_key, result, response.content)
+            return result, response.content
+        return result, None
+
+    def _observe_response(self, uri, action, method, response,
+                          revalidation_key=None):
+        """_handle_response recording the parse time in the metrics."""
+        started = time.perf_counter()
+        try:
+            result = self._handle_response(method, response, revalidation_key)
+        except PosWebServiceError as err:
+            if err.error_code is None:
+                self.metrics.observe_error(uri, action, method, PARSE)
+            raise
+        if method != 'HEAD' and response.status_code // 100 == 2:
+            self.metrics.observe_parse(
+                uri, action, method, time.perf_counter() - started
+            )
+        return result
+
+    @staticmethod
+    def _error_kind(error):
+        return TIMEOUT if isinstance(error, exceptions.Timeout) \
+            else CONNECTION
+
+    def _observe_attempt(self, prepped, uri, action, started, response=None,
+                         error=None, stream=False):
+        """Record an attempt of _send in the metrics."""
+        seconds = time.perf_counter() - started
+        body = prepped.body
+        request_bytes = len(body) if body else 0
+        if response is None:
+            self.metrics.observe_error(
+                uri, action, prepped.method, self._error_kind(error),
+                seconds, request_bytes
+            )
+            return
+        if stream:
+            response_bytes = int(response.headers.get('Content-Length') or 0)
+        else:
+            response_bytes = len(response.content or b'')
+        self.metrics.observe_request(
+            uri, action, prepped.method, response.status_code, seconds,
+            request_bytes, response_bytes
+        )
 
-        return response
+    def _send(self, prepped, timeout, uri=None, action=None, stream=False):
+        """Send a prepared request, retrying it according to the policy.
+
+        Every attempt goes through the rate limiter and the concurrency
+        limit of the client.
+
+        :param prepped: requests PreparedRequest
+        :param timeout: timeout of each attempt in seconds
+        :param uri: resource of the request, used by the rate limiter
+        :param action: action of the request, used by the rate limiter
+        :param stream: do not read the body of the response
+        :return: requests Response of the last attempt
+        """
+        attempt = 0
+        while True:
+            self._check_circuit()
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(uri or '', action)
+                if self.metrics is not None:
+                    started = time.perf_counter()
+                response = self._send_once(prepped, timeout, stream)
+            except (exceptions.ConnectionError, exceptions.Timeout) as err:
+                self._record_outcome(None)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, error=err
+                    )
+                delay = self._retry_delay(prepped.method, attempt)
+                if delay is None:
+                    raise
+            except exceptions.RequestException as err:
+                self._record_outcome(None)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, error=err
+                    )
+                raise
+            except BaseException:
+                self._release_circuit()
+                raise
+            else:
+                self._record_outcome(response.status_code)
+                if self.metrics is not None:
+                    self._observe_attempt(
+                        prepped, uri, action, started, response,
+                        stream=stream
+                    )
+                delay = self._retry_delay(
+                    prepped.method,
+                    attempt,
+                    response.status_code,
+                    response.headers.get('Retry-After')
+                )
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_once(self, prepped, timeout, stream=False):
+        if self.concurrency is None:
+            return self.client.send(prepped, stream=stream, timeout=timeout)
+
+        self.concurrency.acquire()
+        started = time.monotonic()
+        status_code = None
+        try:
+            response = self.client.send(
+                prepped, stream=stream, timeout=timeout
+            )
+            status_code = response.status_code
+            return response
+        finally:
+            self.concurrency.release(time.monotonic() - started, status_code)
+
+    def _stream(self, uri, method='GET', action=None, data=None,
+                add_headers=None, chunk_size=None):
+        """Execute a request and yield the items of its 'data' one by one.
+
+        The body is read and decoded chunk by chunk, the success of the
+        response is checked once it has been read entirely. The response
+        cache and conditional requests are not used.
+
+        :param chunk_size: number of bytes read at once
+        :return: generator of the items of the 'data' array
+        """
+        prepped, timeout = self._prepare_execute(
+            uri, method, action, data, add_headers
+        )
+        response = self._send(prepped, timeout, uri, action, stream=True)
+        try:
+            status_code = response.status_code
+            self._check_status_code(
+                status_code,
+                None if status_code in (200, 201) else response.content
+            )
+            stream = DataStream()
+            try:
+                for chunk in response.iter_content(
+                        chunk_size or DEFAULT_CHUNK_SIZE):
+                    for item in stream.feed(chunk):
+                        yield item
+                items = stream.close()
+            except ValueError as err:
+                raise PosWebServiceError(
+                    'HTTP Json response is not parsable : %s' % (err,)
+                )
+            for item in items:
+                yield item
+        finally:
+            response.close()
+
+        if stream.envelope is not None:
+            # the items of a list are gone, only a single record is left
+            data = self._unwrap_data(stream.envelope)
+            if data and not isinstance(data, list):
+                yield data
+
+    def _unwrap_data(self, response):
+        """Extract the 'data' of a response and check it succeeded.
+
+        :param response: response returned by _execute
+        :return: the data of the response, or the response itself
+            when it is not a dict envelope
+        """
+        if not isinstance(response, dict):
+            return response
+
+        data = response.get('data', [])
+        success = response.get('success', False)
+        message = response.get('message', 'No message')
+
+        if not success:
+            raise PosWebServiceError(f"{message}: {data}")
+
+        return data
+
+    def _iter_records(self, fetch, options=None, page_size=None,
+                      prefetch=0, max_workers=None, stream=False):
+        """Iterate over the records of every page returned by fetch.
+
+        :param fetch: callable taking a dict of options and returning
+            the response of one page, or an iterator over its records
+            when stream is True
+        :param options: dict of options shared by every page
+        :param page_size: number of records per page
+        :param prefetch: number of pages kept in flight, the requests
+            share the connection pool of the session
+        :param max_workers: size of the thread pool used to prefetch
+        :param stream: fetch streams the records of each page
+        :return: generator of records
+        """
+        if stream:
+            if prefetch:
+                raise PosWebServiceError('Streamed pages are not prefetched')
+            return iter_streamed_records(fetch, options, page_size)
+
+        return iter_records(
+            lambda page_options: self._unwrap_data(fetch(page_options)),
+            options,
+            page_size,
+            prefetch,
+            max_workers
+        )
+
+    # errors recorded as the result of an item of a bulk write, other
+    # errors (authentication, bugs) abort the bulk
+    _bulk_errors = (PosWebServiceError, exceptions.RequestException)
+
+    def _bulk(self, items, send_one=None, send_batch=None, chunk_size=100,
+              max_workers=4, idempotent=True):
+        """Send a write for every item and collect a result per item.
+
+        With send_batch, items are sent by chunks of chunk_size in one
+        request each, and a failed chunk is sent again item by item with
+        send_one to know which items failed, unless the writes are not
+        idempotent and the chunk may have been applied (see retry_items):
+        every item of the chunk then gets the error of the chunk. Without
+        it, every item is sent with its own request. At most max_workers
+        requests are in flight.
+
+        :param items: iterable of records or ids
+        :param send_one: callable sending one item, returning the response
+        :param send_batch: callable sending a list of items in one request
+        :param chunk_size: number of items of a batch request
+        :param max_workers: number of requests in flight
+        :param idempotent: the items can be written twice safely
+        :return: BulkResult
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        chunks = chunk_items(items, chunk_size if send_batch else 1)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = [
+            executor.submit(
+                self._bulk_chunk, offset, chunk, send_one, send_batch,
+                idempotent
+            )
+            for offset, chunk in chunks
+        ]
+        results = []
+        try:
+            for future in futures:
+                results.extend(future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+        return BulkResult(results)
+
+    def _bulk_chunk(self, offset, chunk, send_one, send_batch,
+                    idempotent=True):
+        if send_batch is not None:
+            try:
+                data = self._unwrap_data(send_batch(chunk))
+            except PosAuthenticationError:
+                raise
+            except self._bulk_errors as err:
+                if send_one is None or not retry_items(err, idempotent):
+                    return [
+                        BulkItemResult(offset + position, item, error=err)
+                        for position, item in enumerate(chunk)
+                    ]
+            else:
+                return batch_results(offset, chunk, data)
+
+        results = []
+        for position, item in enumerate(chunk):
+            try:
+                data = self._unwrap_data(send_one(item))
+            except PosAuthenticationError:
+                raise
+            except self._bulk_errors as err:
+                results.append(
+                    BulkItemResult(offset + position, item, error=err)
+                )
+            else:
+                results.append(BulkItemResult(offset + position, item, data))
+        return results
 
     def _encode_multipart_formdata(self, files):
         """Encode files to an http multipart/form-data.
@@ -411,6 +1084,7 @@ class PosWebservice(object, metaclass=ClientMeta):
         :param filename: file name.
         :return: mimetype.
         """
+        import mimetypes
         return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
     
     def search(self, resource, options=None):
@@ -500,7 +1174,7 @@ class PosWebservice(object, metaclass=ClientMeta):
                 multipart_data.append(('files[]', (filename, value, file_type)))
 
             if options is not None:
-                multipart_data.append(('data', json.dumps(options)))
+                multipart_data.append(('data', self.codec.dumps(options)))
             
             return self._execute(uri=resource, method='POST', action=action, data=multipart_data)
 
@@ -558,7 +1232,97 @@ class PosWebservice(object, metaclass=ClientMeta):
 class PosWebServiceDict(PosWebservice):
     """Interacts with the Pos WebService API, use dict for messages."""
 
-    def search(self, resource, options=None):
+    SOURCES = ('remote', 'local', 'auto')
+
+    # GET action answering the blank envelope (default record) of a resource
+    BLANK_ACTION = 'blank'
+
+    def __init__(self, *args, **kwargs):
+        """
+        Create an instance of PosWebServiceDict.
+
+        Same arguments as PosWebservice, plus:
+
+        :param mirror: LocalMirror replicating some resources
+        :param source: default source of list, search and find:
+            'remote' for the webservice, 'local' for the mirror,
+            'auto' for the mirror when it replicates the resource
+        :param record_cache: RecordCache keeping the records of find and
+            list as snapshots of partial_edit, True for a default one
+        :param mirror_snapshots: use the records of the mirror as
+            snapshots of partial_edit, they are as old as the last
+            refresh of the mirror
+        :param blank_ttl: time to live in seconds of the blank envelopes
+            cached by partial_add, None to keep them until refreshed,
+            0 to fetch one for every record
+        :param prewarm_blanks: fetch the blank envelope of every
+            registered module now, see prewarm_blanks
+        """
+        mirror = kwargs.pop('mirror', None)
+        source = kwargs.pop('source', 'remote')
+        record_cache = kwargs.pop('record_cache', None)
+        mirror_snapshots = kwargs.pop('mirror_snapshots', False)
+        blank_ttl = kwargs.pop('blank_ttl', 3600)
+        prewarm = kwargs.pop('prewarm_blanks', False)
+        super(PosWebServiceDict, self).__init__(*args, **kwargs)
+        self._init_source(mirror, source)
+        self._init_record_cache(record_cache, mirror_snapshots)
+        self.blanks = BlankCache(blank_ttl)
+        if prewarm:
+            self.prewarm_blanks()
+
+    def _init_source(self, mirror, source):
+        if source not in self.SOURCES:
+            raise PosWebServiceError(
+                'source must be one of %s' % (', '.join(self.SOURCES),)
+            )
+        self.mirror = mirror
+        self.source = source
+
+    def _init_record_cache(self, record_cache, mirror_snapshots=False):
+        if record_cache is True:
+            record_cache = RecordCache()
+        self.record_cache = record_cache or None
+        self.mirror_snapshots = mirror_snapshots
+
+    def _remember(self, resource, records):
+        """Keep records received from the webservice as snapshots."""
+        if self.record_cache is None:
+            return
+        if isinstance(records, dict):
+            self.record_cache.put(resource, records)
+        elif isinstance(records, list):
+            self.record_cache.put_many(resource, records)
+
+    def _use_mirror(self, resource, source=None):
+        """Tell whether a read on resource is answered by the mirror."""
+        source = source or self.source
+        if source == 'remote':
+            return False
+        mirrored = self.mirror is not None and self.mirror.has(resource)
+        if source == 'local' and not mirrored:
+            raise PosWebServiceError(
+                f"Resource {resource} is not replicated in the local mirror"
+            )
+        return mirrored
+
+    def refresh_mirror(self, resource=None, incremental=False,
+                       page_size=500):
+        """Refresh the local mirror from the webservice.
+
+        :param resource: resource to refresh, None for every resource
+        :param incremental: only fetch the records changed since the
+            previous refresh
+        :param page_size: number of records requested per page
+        :return: dict of number of records fetched by resource
+        """
+        if self.mirror is None:
+            raise PosWebServiceError('No local mirror configured')
+        return self.mirror.refresh(
+            self, resource, incremental=incremental, page_size=page_size
+        )
+
+    def search(self, resource, options=None, source=None):
         """Retrieve (GET) a resource and return a list of its ids.
 
         Is not supposed to be called with an id
@@ -568,49 +1332,96 @@ class PosWebServiceDict(PosWebservice):
         :param resource: string of the resource to search like,
             ie: 'addresses', 'products', 'manufacturers', etc.
         :param kwargs: optional dict of parameters to filter the search
-            (one or more of 'filter', 'sort', 'limit', 'page')
+            (one or more of 'filter', 'sort', 'limit', 'page'), only the
+            id is asked unless 'display' is given
+        :param source: 'remote', 'local' or 'auto', default to the
+            source of the client
         :return: list of ids as int/string
         """
-        def _parse_php_unique_id(unique_id):
-            return str(unique_id)
+        options = self._search_options(options)
+        if self._use_mirror(resource, source):
+            return self._parse_ids(
+                {'id': resource_id}
+                for resource_id in self.mirror.query(resource, options, 'id')
+            )
 
-        # Check if action is none, and set action is search
-        if not options.get('action') or options.get('action') is None:
-            options['action'] = 'search'
-        elif len(options) == 0 or options == {}:
-            options['action'] = 'search'
+        response = super(PosWebServiceDict, self).search(resource, options)
+        return self._parse_ids(self._unwrap_data(response))
 
+    @staticmethod
+    def _with_action(options, action):
+        """Set the default action of options when it is missing."""
         if options is None:
             options = {}
 
         if options.get('action') is None:
-            options.update({ 'action': 'search' })
+            options.update({ 'action': action })
 
-        response = super(PosWebServiceDict, self).search(resource, options)
-        data = response
-        
-        if isinstance(response, dict):
-            data = response.get('data', [])
-            success = response.get('success', False)
-            message = response.get('message', 'No message')
+        return options
 
-            if not success:
-                raise PosWebServiceError(f"{message}: {data}") 
+    @classmethod
+    def _search_options(cls, options):
+        """Options of a search: only the id is displayed by default."""
+        options = cls._with_action(options, 'search')
+        if not options.get('display'):
+            options = dict(options, display=['id'])
+        return options
 
-        ids = []
+    @staticmethod
+    def _parse_ids(data):
+        """Extract the ids of a list of records as int/string.
 
-        for item in data:
-            try:
-                # Try converting to integer
-                id_value = int(item['id'])
-            except ValueError:
-                # Fallback to alternate parsing method
-                id_value = _parse_php_unique_id(item['id'])
-            ids.append(id_value)
+        Numeric ids are returned as int, PHP unique ids like
+        '5f4e1a2b3c' as string.
+        """
+        raw_ids = list(map(itemgetter('id'), data))
+        try:
+            # pages of numeric ids, the usual case, in a single pass
+            return list(map(int, raw_ids))
+        except ValueError:
+            pass
 
+        ids = []
+        append = ids.append
+        for id_value in raw_ids:
+            if type(id_value) is int:
+                append(id_value)
+            elif not isinstance(id_value, str) or id_value.isdecimal():
+                append(int(id_value))
+            else:
+                # signed or padded numbers are still ids as int
+                digits = id_value.strip()
+                if digits[:1] in ('-', '+'):
+                    digits = digits[1:]
+                append(int(id_value) if digits.isdecimal() else id_value)
         return ids
 
-    def list(self, resource, options=None):
+    def iter_search(self, resource, options=None, page_size=None,
+                    prefetch=0, max_workers=None):
+        """Retrieve (GET) the ids of every page of a resource.
+
+        :param resource: string of the resource to search like,
+            ie: 'product', 'order', etc.
+        :param options: optional dict of parameters to filter the search
+            (one or more of 'filter', 'sort', 'date')
+        :param page_size: number of ids requested per page,
+            default to the 'limit' option
+        :param prefetch: number of pages kept in flight ahead of
+            the consumer, ids still come back in page order
+        :param max_workers: size of the thread pool used to prefetch,
+            default to prefetch
+        :return: generator of ids as int/string
+        """
+        return self._iter_records(
+            lambda page_options: self.search(resource, page_options),
+            options,
+            page_size,
+            prefetch,
+            max_workers
+        )
+
+    def list(self, resource, options=None, source=None,
+             result_format='dicts'):
         """Retrieve (GET) a resource and return a list of its data.
 
         Is not supposed to be called with an id
@@ -621,30 +1432,105 @@ class PosWebServiceDict(PosWebservice):
             ie: 'addresses', 'products', 'manufacturers', etc.
         :param kwargs: optional dict of parameters to filter the search
             (one or more of 'filter', 'display', 'sort', 'limit', 'page')
-        :return: list of data as dictionary
+        :param source: 'remote', 'local' or 'auto', default to the
+            source of the client
+        :param result_format: 'dicts' for a list of dict, 'records' for a
+            list of compact read-only rows (record['name'], record.name),
+            'columns' for a dict of one array per field
+        :return: list of data as dictionary, or its result_format form
         """
+        self._check_result_format(result_format)
 
         # Check if action is none, and set action is list
-        if options is None:
-            options = {}
+        options = self._with_action(options, 'list')
+        if self._use_mirror(resource, source):
+            records = self.mirror.query(resource, options)
+        else:
+            response = super(PosWebServiceDict, self).search(
+                resource, options
+            )
+            records = self._unwrap_data(response)
+            self._remember(resource, records)
+        return self._format_records(resource, records, options, result_format)
 
-        if options.get('action') is None:
-            options.update({ 'action': 'list' })
+    @staticmethod
+    def _check_result_format(result_format):
+        if result_format not in RESULT_FORMATS:
+            raise PosWebServiceError(
+                'result_format must be one of %s'
+                % (', '.join(RESULT_FORMATS),)
+            )
 
-        response = super(PosWebServiceDict, self).search(resource, options)
-        data = response
-        
-        if isinstance(response, dict):
-            data = response.get('data', [])
-            success = response.get('success', False)
-            message = response.get('message', 'No message')
+    @staticmethod
+    def _format_records(resource, records, options, result_format):
+        if result_format == 'dicts' or not isinstance(records, list):
+            return records
+        return format_records(
+            resource_of(resource), records, result_format,
+            options.get('display')
+        )
 
-            if not success:
-                raise PosWebServiceError(f"{message}: {data}") 
+    def stream_list(self, resource, options=None, chunk_size=None):
+        """Retrieve (GET) a page of a resource, streaming its records.
 
-        return data
+        Same as list but the records are yielded as the body is read
+        and decoded, only the record being decoded is kept in memory.
+        The success of the response is checked once the body has been
+        read, an error is raised after the records already yielded.
+        The mirror and the response cache are not used.
+
+        :param resource: string of the resource to list like,
+            ie: 'product', 'order', etc.
+        :param options: optional dict of parameters to filter the list
+            (one or more of 'filter', 'display', 'sort', 'limit', 'page')
+        :param chunk_size: number of bytes read at once
+        :return: generator of data as dictionary
+        """
+        options = self._with_action(options, 'list')
+        self._validate_query_options(options)
+        return self._stream(
+            resource, 'GET', options['action'], options,
+            chunk_size=chunk_size
+        )
+
+    def iter_list(self, resource, options=None, page_size=None,
+                  prefetch=0, max_workers=None, stream=False):
+        """Retrieve (GET) every page of a resource, one record at a time.
+
+        Walk the 'page' option until the server runs dry, only the
+        current page is kept in memory, or only the current record
+        when the pages are streamed.
+
+        :param resource: string of the resource to list like,
+            ie: 'product', 'order', etc.
+        :param options: optional dict of parameters to filter the list
+            (one or more of 'filter', 'display', 'sort', 'date')
+        :param page_size: number of records requested per page,
+            default to the 'limit' option
+        :param prefetch: number of pages kept in flight ahead of
+            the consumer, records still come back in page order
+        :param max_workers: size of the thread pool used to prefetch,
+            default to prefetch
+        :param stream: stream the records of each page, see stream_list,
+            pages are then not prefetched
+        :return: generator of data as dictionary
+        """
+        if stream:
+            return self._iter_records(
+                lambda page_options: self.stream_list(resource, page_options),
+                options,
+                page_size,
+                stream=True
+            )
+        return self._iter_records(
+            lambda page_options: self.list(resource, page_options),
+            options,
+            page_size,
+            prefetch,
+            max_workers
+        )
     
-    def find(self, resource, resource_id, options=None):
+    def find(self, resource, resource_id, options=None, source=None):
         """Retrieve (GET) a resource and return a list of its data.
 
         Is not supposed to be called with an id
@@ -653,62 +1539,457 @@ class PosWebServiceDict(PosWebservice):
 
         :param resource: string of the resource to search like,
             ie: 'addresses', 'products', 'manufacturers', etc.
+        :param source: 'remote', 'local' or 'auto', default to the
+            source of the client
         :return: get of data as dictionary
         """
 
         # Check if action is none, and set action is find
+        options = self._with_action(options, 'find')
+        if self._use_mirror(resource, source):
+            record = self.mirror.find(resource, resource_id)
+            if record is None:
+                raise PosWebServiceError('Not Found', 404)
+            return record
 
-        if options is None:
-            options = {}
+        response = super(PosWebServiceDict, self).get(resource=resource, resource_id=resource_id, options=options)
+        record = self._unwrap_data(response)
+        self._remember(resource, record)
+        return record
+
+    def find_many(self, resource, ids, batch_size=100, max_workers=8,
+                  options=None):
+        """Retrieve (GET) several records of a resource by id.
+
+        The ids are split into chunks and each chunk is asked with one
+        list request filtered on id. When the server can't filter by id
+        (it ignores the filter, or rejects it with a 4xx), the records
+        are retrieved with parallel find calls instead. Other errors are
+        raised, only the ids answered 404 are missing.
+
+        :param resource: string of the resource like 'product', 'order'
+        :param ids: iterable of ids to retrieve
+        :param batch_size: number of ids asked per list request
+        :param max_workers: number of find calls in flight when
+            the server can't filter by id
+        :param options: optional dict of parameters shared by every request
+            (one or more of 'display', 'date')
+        :return: tuple with (dict of records keyed by id, list of missing ids)
+        """
+        wanted = self._unique_ids(ids)
+        records = {}
+        filter_by_id = True
+
+        for chunk in self._chunk_ids(wanted, batch_size):
+            found = None
+            if filter_by_id:
+                try:
+                    data = self.list(
+                        resource, self._id_filter_options(options, chunk)
+                    )
+                except PosWebServiceError as err:
+                    if not self._is_filter_rejected(err):
+                        raise
+                    data = None
+                found = self._match_chunk(chunk, data)
+                filter_by_id = found is not None
+            if found is None:
+                found = self._find_each(resource, chunk, max_workers, options)
+            records.update(found)
+
+        missing = [resource_id for resource_id in wanted
+                   if resource_id not in records]
+        return records, missing
+
+    def loader(self, resource, options=None, window=0.002,
+               max_batch_size=100, max_workers=8, memoize=True):
+        """Return a Loader batching the find calls of resource.
+
+        loader.load(resource_id) returns the same record as find, but
+        the ids loaded by every thread within window seconds are
+        retrieved together with find_many, and each id only once.
+
+            products = service.loader('product')
+            for line in order['lines']:
+                product = products.load(line['product_id'])
+
+        :param resource: string of the resource like 'product', 'user'
+        :param options: optional dict of parameters of the requests
+            (one or more of 'display', 'date')
+        :param window: seconds a load waits for other ids
+        :param max_batch_size: number of ids sent at once
+        :param max_workers: see find_many
+        :param memoize: answer the loads of an id already loaded
+            without request
+        :return: Loader
+        """
+        from .loader import Loader
+        return Loader(
+            self, resource, options=options, window=window,
+            max_batch_size=max_batch_size, max_workers=max_workers,
+            memoize=memoize
+        )
 
-        if options.get('action') is None:
-            options.update({ 'action': 'find' })
+    @staticmethod
+    def _unique_ids(ids):
+        unique = {}
+        for resource_id in ids:
+            unique.setdefault(str(resource_id), resource_id)
+        return list(unique.values())
+
+    @staticmethod
+    def _chunk_ids(ids, batch_size):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size]
+
+    @staticmethod
+    def _id_filter_options(options, chunk):
+        options = dict(options or {})
+        filters = dict(options.get('filter') or {})
+        filters['id'] = {'operator': 'in', 'value': list(chunk)}
+        options.update({
+            'filter': filters,
+            'limit': len(chunk),
+            'page': 1,
+            'action': 'list',
+        })
+        return options
+
+    @staticmethod
+    def _match_chunk(chunk, data):
+        """Key the records of data by the requested ids of chunk.
+
+        :return: dict of records, None when data is not the answer of
+            an id filter (request failed or filter ignored by the server)
+        """
+        if not isinstance(data, (list, tuple)):
+            return None
+        by_key = dict((str(resource_id), resource_id) for resource_id in chunk)
+        found = {}
+        for record in data:
+            resource_id = by_key.get(str(record.get('id')))
+            if resource_id is None:
+                return None
+            found[resource_id] = record
+        return found
+
+    @staticmethod
+    def _is_filter_rejected(err):
+        """Tell whether an id filtered list failed because the server
+        can't filter by id, rather than for a transient reason."""
+        return (not isinstance(err, PosAuthenticationError)
+                and isinstance(err.error_code, int)
+                and 400 <= err.error_code < 500
+                and err.error_code not in (408, 429))
+
+    @staticmethod
+    def _is_missing_error(err):
+        # circuit open, unparsable or unsuccessful responses have no
+        # error_code, they say nothing about the record
+        return err.error_code == 404
+
+    def _find_each(self, resource, chunk, max_workers, options=None):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def find(resource_id):
+            try:
+                return self.find(resource, resource_id, dict(options or {}))
+            except PosWebServiceError as err:
+                if self._is_missing_error(err):
+                    return None
+                raise
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(find, chunk))
+
+        return dict(
+            (resource_id, record)
+            for resource_id, record in zip(chunk, results)
+            if record
+        )
 
-        response = super(PosWebServiceDict, self).get(resource=resource, resource_id=resource_id, options=options)
-        data = response
-        
-        if isinstance(response, dict):
-            data = response.get('data', [])
-            success = response.get('success', False)
-            message = response.get('message', 'No message')
+    def _batch_sender(self, resource, batch_action):
+        """Send a chunk with the batch action of the server, if any."""
+        if batch_action is None:
+            return None
+        return lambda chunk: self._execute(
+            resource, 'POST', batch_action, {'data': list(chunk)}
+        )
 
-            if not success:
-                raise PosWebServiceError(f"{message}: {data}") 
+    def bulk_create(self, resource, items, chunk_size=100, max_workers=4,
+                    batch_action=None):
+        """Create (POST) several records, with a result per record.
+
+        :param resource: string of the resource like 'product', 'order'
+        :param items: iterable of records as dict
+        :param chunk_size: number of records of a batch request
+        :param max_workers: number of requests in flight
+        :param batch_action: action of the server creating a list of
+            records sent as {'data': [...]}, None to send one request
+            per record
+        :return: BulkResult, with an error for each failed record
+        """
+        return self._bulk(
+            items,
+            lambda item: self._execute(resource, 'POST', 'create', item),
+            self._batch_sender(resource, batch_action),
+            chunk_size,
+            max_workers,
+            idempotent=False
+        )
 
-        return data
+    def bulk_update(self, resource, items, chunk_size=100, max_workers=4,
+                    batch_action=None):
+        """Update (PUT) several records, with a result per record.
+
+        :param resource: string of the resource like 'product', 'order'
+        :param items: iterable of records as dict, with their id
+        :param chunk_size: number of records of a batch request
+        :param max_workers: number of requests in flight
+        :param batch_action: action of the server updating a list of
+            records sent as {'data': [...]}, None to send one request
+            per record
+        :return: BulkResult, with an error for each failed record
+        """
+        return self._bulk(
+            items,
+            lambda item: self._execute(resource, 'PUT', 'update', item),
+            self._batch_sender(resource, batch_action),
+            chunk_size,
+            max_workers
+        )
+
+    def bulk_delete(self, resource, ids, chunk_size=100, max_workers=4):
+        """Delete several records by chunks of ids, with a result per id.
+
+        A chunk which fails is deleted again id by id to report which
+        ids failed.
+
+        :param resource: string of the resource like 'product', 'order'
+        :param ids: iterable of ids
+        :param chunk_size: number of ids of a delete request
+        :param max_workers: number of requests in flight
+        :return: BulkResult, with an error for each id not deleted
+        """
+        return self._bulk(
+            ids,
+            lambda resource_id: self.delete(resource, [resource_id]),
+            lambda chunk: self.delete(resource, list(chunk)),
+            chunk_size,
+            max_workers
+        )
+
+    def sync(self, resource, sink, checkpoint_store, options=None,
+             page_size=100, field='updated_at', key=None):
+        """Deliver to sink the records changed since the last checkpoint.
+
+        Only the records whose updated_at is after the stored watermark
+        are listed, page by page, and the checkpoint advances after each
+        page handed to the sink, so an interrupted sync resumes where
+        it stopped.
+
+        :param resource: string of the resource like 'product', 'order'
+        :param sink: callable, or object with a write method, receiving
+            each page of changed records
+        :param checkpoint_store: store of the watermarks,
+            e.g. pospyt.FileCheckpointStore('checkpoints.json')
+        :param options: optional dict of parameters to filter the list
+            (one or more of 'filter', 'display')
+        :param page_size: number of records requested per page
+        :param field: timestamp field of the watermark
+        :param key: key of the checkpoint, default to the resource
+        :return: dict with the number of records and pages delivered
+            and the last checkpoint
+        """
+        return incremental_sync(
+            self, resource, sink, checkpoint_store, options=options,
+            page_size=page_size, field=field, key=key
+        )
+
+    def export(self, resource, path, export_format=None, options=None,
+               page_size=500, prefetch=2, stream=False):
+        """Export every record of a resource to a CSV, JSON Lines or
+        Parquet file, written atomically as pages are received.
+
+        :param resource: string of the resource like 'order', 'product'
+        :param path: path of the file, its extension gives the format
+        :param export_format: 'csv', 'jsonl' or 'parquet' (needs pyarrow)
+        :param options: optional dict of parameters to filter the list
+            (one or more of 'filter', 'display', 'sort', 'date')
+        :param page_size: number of records requested per page
+        :param prefetch: number of pages requested while writing
+        :param stream: stream each page instead of prefetching pages
+        :return: dict with the path, format, number of records, size of
+            the file and duration of the export
+        """
+        from .export import export_resource
+        return export_resource(
+            self, resource, path, export_format=export_format,
+            options=options, page_size=page_size, prefetch=prefetch,
+            stream=stream
+        )
+
+    def blank_envelope(self, resource, refresh=False):
+        """Return the blank envelope (default record) of a resource.
+
+        Envelopes are cached for blank_ttl seconds, each call returns a
+        copy which can be filled freely.
+
+        :param resource: type of resource, e.g. 'product'
+        :param refresh: fetch the envelope again even if it is cached
+        :return: dict of the default values of the resource
+        """
+        if not refresh:
+            envelope = self.blanks.get(resource)
+            if envelope is not None:
+                return envelope
+        envelope = self._unwrap_data(
+            self._execute(resource, 'GET', self.BLANK_ACTION)
+        )
+        self.blanks.set(resource, envelope)
+        return envelope
+
+    def _registered_resources(self):
+        return [
+            load_module_class(installed).resource or name
+            for name, installed in sorted(self.registered_module.items())
+        ]
+
+    def prewarm_blanks(self, resources=None, max_workers=4):
+        """Fetch and cache the blank envelopes of several resources.
+
+        A resource without blank envelope does not stop the others.
+
+        :param resources: resources to warm, default to the resources of
+            every registered module
+        :param max_workers: number of requests in flight
+        :return: dict of the error of each resource which failed
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        resources = list(resources or self._registered_resources())
+
+        def fetch(resource):
+            try:
+                self.blank_envelope(resource, refresh=True)
+            except PosAuthenticationError:
+                raise
+            except (PosWebServiceError, exceptions.RequestException) as err:
+                return err
+            return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            errors = list(executor.map(fetch, resources))
+        return dict(
+            (resource, error)
+            for resource, error in zip(resources, errors)
+            if error is not None
+        )
 
     def partial_add(self, resource, fields):
         """Add (POST) a resource without necessary all the content.
 
-        Retrieve the full empty envelope
-        and merge the given fields in this envelope.
+        The given fields are merged in the blank envelope of the
+        resource, cached after the first call, so adding a record is
+        one request once the envelope is known.
 
         :param resource: type of resource to create
         :param fields: dict of fields of the resource to create
         :return: response of the server
         """
-        blank_envelope = self.get(resource, options={'page': 'blank'})
-        complete_content = dict(blank_envelope, **fields)
-        return self.add(resource=resource, options=complete_content)
-    
-    def partial_edit(self, resource, resource_id, fields):
-        """Edit (PUT) partially a resource.
-
-        Standard REST PUT means a full replacement of the resource.
-        Allows to edit only only some fields of the resource with
-        a perf penalty. It will read on prestashop,
-        then modify the keys in content,
-        and write on prestashop.
+        record = self.blank_envelope(resource)
+        record.update(fields)
+        return self._execute(resource, 'POST', 'create', record)
+
+    def partial_edit(self, resource, resource_id, fields, snapshot=None,
+                     check_conflict=True):
+        """Edit (PUT) only the fields of a resource which changed.
+
+        The fields are compared with a snapshot of the record: the one
+        given, else the one of the record cache (if not older than its
+        max_age) or, with mirror_snapshots, of the local mirror, else
+        the record read from the webservice. Only the changed fields are
+        sent, and nothing at all when none changed: a stale snapshot
+        equal to the fields skips a write the record needed.
+
+        With check_conflict and an 'updated_at' in the snapshot, the
+        write is conditioned by If-Unmodified-Since: a server honoring
+        it refuses to overwrite a record modified since the snapshot,
+        which raises PosConflictError.
 
         :param resource: type of resource to edit
         :param resource_id: id of the resource to edit
         :param fields: dict containing the field name as key
             and the values of the files to modify
-        :return: the response as a dict
+        :param snapshot: known state of the record as dict
+        :param check_conflict: send the If-Unmodified-Since header
+        :return: the response as a dict, None when nothing changed
         """
-        complete_content = self.get(resource, resource_id)
-        for key in complete_content:
-            if fields.get(key):
-                complete_content[key].update(fields[key])
-        return self.edit(resource, complete_content)
+        if snapshot is None:
+            snapshot = self._snapshot_of(resource, resource_id)
+        if snapshot is None:
+            snapshot = self.find(resource, resource_id, source='remote')
+        return self._write_changes(
+            resource, resource_id, fields, snapshot, check_conflict
+        )
+
+    def _snapshot_of(self, resource, resource_id):
+        if self.record_cache is not None:
+            snapshot = self.record_cache.get(resource, resource_id)
+            if snapshot is not None:
+                return snapshot
+        if self.mirror_snapshots and self._use_mirror(resource, 'auto'):
+            return self.mirror.find(resource, resource_id)
+        return None
+
+    def _edit_request(self, resource_id, fields, snapshot, check_conflict):
+        """Changes, body and headers of a partial edit, None if no-op."""
+        changes = diff_fields(snapshot, fields)
+        changes.pop('id', None)
+        if not changes:
+            return None
+        body = dict(changes, id=resource_id)
+        headers = None
+        if check_conflict:
+            since = unmodified_since(snapshot)
+            if since is not None:
+                headers = {'If-Unmodified-Since': since}
+        return changes, body, headers
+
+    def _edit_done(self, resource, resource_id, snapshot, changes, response):
+        """Keep the written record as the next snapshot."""
+        if self.record_cache is None:
+            return
+        data = self._unwrap_data(response)
+        record = dict(snapshot, **changes)
+        record['id'] = resource_id
+        if isinstance(data, dict) and data.get('id') == resource_id \
+                and data.get('updated_at'):
+            record.update(data)
+        else:
+            # the new updated_at is unknown, a stale one would make the
+            # next conditional write fail
+            record.pop('updated_at', None)
+        self.record_cache.put(resource, record)
+
+    def _write_changes(self, resource, resource_id, fields, snapshot,
+                       check_conflict):
+        request = self._edit_request(
+            resource_id, fields, snapshot, check_conflict
+        )
+        if request is None:
+            return None
+        changes, body, headers = request
+        try:
+            response = self._execute(
+                resource, 'PUT', 'update', body, add_headers=headers
+            )
+        except PosConflictError:
+            if self.record_cache is not None:
+                self.record_cache.discard(resource, resource_id)
+            raise
+        self._edit_done(resource, resource_id, snapshot, changes, response)
+        return response
 
@@ -2,6 +2,8 @@ from .base import BaseModule
 
 
 class Product(BaseModule):
+    resource = "product"
+
     def create(self, product_data):
         """
         Use this call to add a product.
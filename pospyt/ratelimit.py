@@ -0,0 +1,199 @@
+import threading
+import time
+
+from .cache import resource_of
+
+
+class TokenBucket(object):
+    """Token bucket refilled at `rate` tokens per second.
+
+    Tokens are reserved in advance, so a caller only has to wait for
+    the delay returned by reserve, whether it sleeps in a thread or in
+    an asyncio task.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: tokens added per second
+        :param capacity: maximum burst of tokens, default to rate
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take tokens and return the seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter(object):
+    """Request budget of a client, global and per resource/action.
+
+    Share one instance between clients to enforce a process-wide budget.
+    """
+
+    def __init__(self, rate=None, burst=None, limits=None):
+        """
+        :param rate: requests per second allowed for every request,
+            None for no global limit
+        :param burst: burst of the global limit, default to rate
+        :param limits: dict of limits by 'resource' or 'resource/action',
+            e.g. {'order': 5, 'product/list': (2, 4)}, a value is the rate
+            or a tuple with (rate, burst)
+        """
+        self._global = TokenBucket(rate, burst) if rate else None
+        self._buckets = {}
+        for key, limit in (limits or {}).items():
+            if not isinstance(limit, (tuple, list)):
+                limit = (limit, None)
+            self._buckets[key] = TokenBucket(*limit)
+
+        self.waited = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _buckets_of(self, uri, action):
+        resource = resource_of(uri)
+        buckets = [self._global]
+        buckets.append(self._buckets.get(resource))
+        if action is not None:
+            buckets.append(self._buckets.get('%s/%s' % (resource, action)))
+        return [bucket for bucket in buckets if bucket is not None]
+
+    def reserve(self, uri, action=None):
+        """Reserve a request and return the seconds to wait before it."""
+        delay = 0.0
+        for bucket in self._buckets_of(uri, action):
+            delay = max(delay, bucket.reserve())
+        if delay:
+            with self._lock:
+                self.throttled += 1
+                self.waited += delay
+        return delay
+
+    def acquire(self, uri, action=None):
+        """Block until a request on uri/action is allowed."""
+        delay = self.reserve(uri, action)
+        if delay:
+            time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return {'throttled': self.throttled, 'waited': self.waited}
+
+
+class AdaptiveConcurrency(object):
+    """Limit the requests in flight and adapt the limit to the backend.
+
+    Additive increase, multiplicative decrease: the limit shrinks when
+    the recent latency rises above latency_tolerance times the long-term
+    latency, or when the server answers 429/5xx, and grows back by about
+    one slot per limit successful requests otherwise. The limit shrinks
+    at most once per recent latency so that a burst of failures of the
+    requests already in flight counts once.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64,
+                 latency_tolerance=2.0, decrease_factor=0.7,
+                 smoothing=0.2, baseline_smoothing=0.02):
+        """
+        :param initial_limit: requests in flight allowed at start
+        :param min_limit: lowest limit
+        :param max_limit: highest limit
+        :param latency_tolerance: ratio of the recent latency over the
+            long-term latency above which the limit shrinks
+        :param decrease_factor: factor applied to the limit when it shrinks
+        :param smoothing: weight of the last latency in the recent average
+        :param baseline_smoothing: weight of the last latency in the
+            long-term average
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+        self.baseline_smoothing = baseline_smoothing
+
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.latency = None
+        self.baseline_latency = None
+        self._decreased_at = None
+
+        self._condition = threading.Condition()
+
+    def try_acquire(self):
+        """Take a slot if one is free, return True on success."""
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a slot is free and take it."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, status_code=None):
+        """Free a slot and adapt the limit to the outcome of the request.
+
+        :param latency: duration of the request in seconds
+        :param status_code: status of the response, None when the
+            request failed before a response was received
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if self.latency is None:
+                self.latency = self.baseline_latency = latency
+            else:
+                self.latency += self.smoothing * (latency - self.latency)
+                self.baseline_latency += self.baseline_smoothing * (
+                    latency - self.baseline_latency
+                )
+
+            overloaded = (
+                status_code is None
+                or status_code == 429
+                or status_code >= 500
+                or self.latency > self.baseline_latency * self.latency_tolerance
+            )
+            now = time.monotonic()
+            if overloaded:
+                if self._decreased_at is None \
+                        or now - self._decreased_at >= self.latency:
+                    self.limit = max(
+                        float(self.min_limit),
+                        self.limit * self.decrease_factor
+                    )
+                    self._decreased_at = now
+            else:
+                self.limit = min(
+                    float(self.max_limit), self.limit + 1.0 / self.limit
+                )
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'latency': self.latency,
+                'baseline_latency': self.baseline_latency,
+            }
@@ -0,0 +1,215 @@
+"""Compact representations of the records of a list response.
+
+'records' turns each dict into a tuple-based row of a class generated
+once per resource and field set, the field names being stored on the
+class instead of in every row. 'columns' turns the records into one
+array per field, NumPy arrays when NumPy is installed.
+"""
+import keyword
+import threading
+from operator import itemgetter
+
+RESULT_FORMATS = ('dicts', 'records', 'columns')
+
+
+class Record(tuple):
+    """Read-only row of a list result, indexed by field name or position.
+
+    Fields which are valid identifiers are also attributes, e.g.
+    record.name or record['name'].
+    """
+
+    __slots__ = ()
+
+    _resource = None
+    _fields = ()
+    _index = {}
+
+    def __new__(cls, values):
+        return tuple.__new__(cls, values)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, field):
+        return field in self._index
+
+    def __getnewargs__(self):
+        return (tuple(self),)
+
+    def get(self, field, default=None):
+        index = self._index.get(field)
+        if index is None:
+            return default
+        return tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def as_dict(self):
+        return dict(zip(self._fields, self))
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (field, value)
+            for field, value in zip(self._fields, self)
+        ))
+
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+
+def record_class(resource, fields):
+    """Return the Record class of a resource and field set.
+
+    Classes are generated once and shared by every result with the same
+    resource and fields, in the same order.
+
+    :param resource: name of the resource, e.g. 'product'
+    :param fields: sequence of field names
+    :return: Record subclass
+    """
+    key = (resource, tuple(fields))
+    record_type = _classes.get(key)
+    if record_type is not None:
+        return record_type
+
+    fields = key[1]
+    namespace = {
+        '__slots__': (),
+        '_resource': resource,
+        '_fields': fields,
+        '_index': dict((field, index) for index, field in enumerate(fields)),
+    }
+    for index, field in enumerate(fields):
+        if field.isidentifier() and not keyword.iskeyword(field) \
+                and not field.startswith('_') and not hasattr(Record, field):
+            namespace[field] = property(itemgetter(index))
+
+    name = ''.join(
+        part.capitalize() for part in str(resource or 'record').split('_')
+    ) + 'Record'
+    if not name.isidentifier():
+        name = 'Record'
+    with _classes_lock:
+        return _classes.setdefault(key, type(name, (Record,), namespace))
+
+
+def fields_of(records, display=None):
+    """Field names of records, in order of first appearance.
+
+    With a display option, the fields are the id followed by the
+    displayed fields, like the server answers.
+    """
+    if display:
+        return ['id'] + [field for field in display if field != 'id']
+    fields = {}
+    for record in records:
+        for field in record:
+            fields.setdefault(field, None)
+    return list(fields)
+
+
+def _shared(values):
+    """Replace equal strings of values by a single instance.
+
+    Timestamps, statuses or prices repeat across the rows of a page, but
+    the JSON decoder creates a new string for every occurrence.
+    """
+    share = {}.setdefault
+    return [
+        share(value, value) if type(value) is str else value
+        for value in values
+    ]
+
+
+def to_records(resource, records, fields=None):
+    """Convert records to rows of the Record class of their field set.
+
+    Equal strings of a field are shared by the rows.
+
+    :param resource: name of the resource
+    :param records: list of records as dict
+    :param fields: field names, default to every field of records
+    :return: list of Record
+    """
+    fields = fields or fields_of(records)
+    record_type = record_class(resource, fields)
+    columns = [
+        _shared([record.get(field) for record in records])
+        for field in fields
+    ]
+    new = tuple.__new__
+    if not fields:
+        return [new(record_type, ()) for _ in records]
+    return [new(record_type, row) for row in zip(*columns)]
+
+
+def _numpy_column(values):
+    import numpy
+
+    kinds = set(type(value) for value in values)
+    if kinds == {int}:
+        try:
+            return numpy.array(values, dtype=numpy.int64)
+        except OverflowError:
+            pass
+    elif kinds and kinds <= {int, float}:
+        return numpy.array(values, dtype=numpy.float64)
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def to_columns(records, fields=None):
+    """Convert records to a dict of one array per field.
+
+    Columns of ints or floats become int64/float64 NumPy arrays, the
+    other ones object arrays, when NumPy is installed; they are lists
+    otherwise. Missing values are None, equal strings of a column are
+    shared.
+
+    :param records: list of records as dict
+    :param fields: field names, default to every field of records
+    :return: dict of columns by field
+    """
+    fields = fields or fields_of(records)
+    columns = dict(
+        (field, _shared([record.get(field) for record in records]))
+        for field in fields
+    )
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return columns
+    return dict(
+        (field, _numpy_column(values)) for field, values in columns.items()
+    )
+
+
+def format_records(resource, records, result_format='dicts', display=None):
+    """Convert the records of a list result to result_format.
+
+    :param resource: name of the resource
+    :param records: list of records as dict
+    :param result_format: 'dicts' (unchanged), 'records' or 'columns'
+    :param display: display option of the request, which fixes the
+        fields even when there is no record
+    :return: list of dict, list of Record or dict of columns
+    """
+    if result_format == 'dicts':
+        return records
+    fields = fields_of(records, display)
+    if result_format == 'records':
+        return to_records(resource, records, fields)
+    if result_format == 'columns':
+        return to_columns(records, fields)
+    raise ValueError(
+        'result_format must be one of %s' % (', '.join(RESULT_FORMATS),)
+    )
@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header to a number of seconds.
+
+    :param value: delay in seconds or HTTP date
+    :return: seconds to wait, None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryPolicy(object):
+    """Decide whether and when a failed request is sent again.
+
+    Only idempotent methods are retried unless retry_post is set.
+    Delays grow exponentially with full jitter, a Retry-After sent by
+    the server takes precedence.
+    """
+
+    def __init__(self, total=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, status_forcelist=RETRY_STATUS,
+                 methods=IDEMPOTENT_METHODS, retry_post=False,
+                 respect_retry_after=True, max_retry_after=120):
+        """
+        :param total: maximum number of retries of a request
+        :param backoff_factor: base delay in seconds, the n-th retry
+            waits up to backoff_factor * 2 ** n
+        :param max_backoff: maximum computed delay in seconds
+        :param jitter: draw the delay uniformly between 0 and the
+            computed backoff to spread the retries of several workers
+        :param status_forcelist: status codes that are retried
+        :param methods: methods that are retried
+        :param retry_post: also retry POST, PUT, PATCH and DELETE
+        :param respect_retry_after: wait for the Retry-After header
+        :param max_retry_after: maximum Retry-After delay honored
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.retry_post = retry_post
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def is_retryable_method(self, method):
+        return self.retry_post or method.upper() in self.methods
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.status_forcelist
+
+    def backoff(self, attempt):
+        """Delay before the retry number attempt (starting at 0)."""
+        delay = min(self.backoff_factor * (2 ** attempt), self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def next_delay(self, method, attempt, status_code=None, retry_after=None):
+        """Return the delay before retrying, None to give up.
+
+        :param method: HTTP method of the request
+        :param attempt: number of retries already done
+        :param status_code: status of the response, None when the
+            request failed with a connection error or a timeout
+        :param retry_after: value of the Retry-After header
+        """
+        if attempt >= self.total or not self.is_retryable_method(method):
+            return None
+        if status_code is not None and not self.is_retryable_status(status_code):
+            return None
+
+        delay = self.backoff(attempt)
+        if self.respect_retry_after:
+            wait = parse_retry_after(retry_after)
+            if wait is not None:
+                delay = max(delay, min(wait, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker(object):
+    """Fail fast while the webservice keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests are refused for recovery_timeout seconds. Then a single
+    trial request is let through: a success closes the circuit, a
+    failure opens it again. A trial which ends without outcome (e.g.
+    cancelled) is released, one which neither ends nor is released is
+    given up after recovery_timeout seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        """
+        :param failure_threshold: consecutive failures opening the circuit
+        :param recovery_timeout: seconds before a trial request is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a request can be sent."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            now = time.monotonic()
+            if self._trial_in_flight \
+                    and now - self._trial_started < self.recovery_timeout:
+                return False
+            self._trial_in_flight = True
+            self._trial_started = now
+            return True
+
+    def release(self):
+        """End a request allowed without recording an outcome, so that
+        a half-open circuit lets another trial through."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def retry_in(self):
+        """Seconds before the circuit lets a trial request through."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            elapsed = time.monotonic() - self.opened_at
+            return max(self.recovery_timeout - elapsed, 0.0)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker_for(base_url, **options):
+    """Return the CircuitBreaker shared by every client of base_url.
+
+    :param options: keyword arguments of CircuitBreaker, only used
+        when the breaker is created
+    """
+    key = base_url.rstrip('/')
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(**options)
+            _breakers[key] = breaker
+        return breaker
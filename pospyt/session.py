@@ -0,0 +1,116 @@
+import socket
+import threading
+from urllib.parse import urlsplit
+
+from requests import Session
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+
+_shared_sessions = {}
+_shared_lock = threading.Lock()
+
+
+def origin_of(url):
+    """Scheme and host of an url, e.g. 'https://pos.example.com'."""
+    parts = urlsplit(url)
+    return '%s://%s' % (parts.scheme, parts.netloc)
+
+
+class PoolAdapter(HTTPAdapter):
+    """HTTPAdapter with optional TCP keep-alive on pooled sockets."""
+
+    def __init__(self, tcp_keepalive=False, **kwargs):
+        self.tcp_keepalive = tcp_keepalive
+        super(PoolAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            from urllib3.connection import HTTPConnection
+
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super(PoolAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def make_session(base_url=None, pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 keep_alive=True, tcp_keepalive=False):
+    """Create a requests Session with a tuned connection pool.
+
+    :param base_url: when given, the host of the url gets its own
+        adapter so its pool is sized independently of other hosts
+    :param pool_connections: number of per-host pools kept
+    :param pool_maxsize: maximum number of connections kept per host
+    :param pool_block: wait for a free connection instead of opening
+        (and dropping) an extra one when the pool is full
+    :param keep_alive: reuse connections between requests, False sends
+        'Connection: close'
+    :param tcp_keepalive: enable SO_KEEPALIVE on the sockets
+    :return: requests Session
+    """
+    session = Session()
+    adapter = PoolAdapter(
+        tcp_keepalive=tcp_keepalive,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    if base_url:
+        session.mount(origin_of(base_url), adapter)
+    else:
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def shared_session(base_url, **pool_options):
+    """Return the Session shared by every client of the same host.
+
+    Clients created with the same host and pool options share one
+    connection pool instead of opening their own connections.
+
+    :param base_url: Root URL of the webservice
+    :param pool_options: keyword arguments of make_session
+    :return: requests Session
+    """
+    key = (origin_of(base_url), tuple(sorted(pool_options.items())))
+    with _shared_lock:
+        session = _shared_sessions.get(key)
+        if session is None:
+            session = make_session(base_url, **pool_options)
+            _shared_sessions[key] = session
+        return session
+
+
+def pool_stats(session):
+    """Describe the utilization of the connection pools of a Session.
+
+    :return: list of dict, one per host pool
+    """
+    stats = []
+    adapters = set(session.adapters.values())
+    for adapter in adapters:
+        poolmanager = getattr(adapter, 'poolmanager', None)
+        if poolmanager is None:
+            continue
+        for key in list(poolmanager.pools.keys()):
+            pool = poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            queue = pool.pool
+            if queue is None:
+                continue
+            available = queue.qsize()
+            idle = sum(1 for conn in list(queue.queue) if conn is not None)
+            stats.append({
+                'host': '%s://%s:%s' % (pool.scheme, pool.host, pool.port),
+                'maxsize': queue.maxsize,
+                'in_use': queue.maxsize - available,
+                'idle': idle,
+                'connections_created': pool.num_connections,
+                'requests': pool.num_requests,
+                'block': pool.block,
+            })
+    return stats
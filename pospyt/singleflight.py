@@ -0,0 +1,92 @@
+"""Coalescing of identical requests in flight.
+
+Concurrent callers of the same key share one execution: the first one
+(the leader) runs the call, the others wait for its result or its
+exception. Callers receive the shared result as is, copying it is up to
+the client.
+"""
+import copy
+import threading
+
+
+def raise_shared(error):
+    # every waiter raises its own copy, raising one instance from
+    # several threads would mix their tracebacks
+    try:
+        error = copy.copy(error)
+    except Exception:
+        pass
+    raise error
+
+
+class _Call(object):
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Share one in-flight call between the threads asking the same key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """Run function, or wait for the running call of key.
+
+        :param key: hashable key of the call
+        :param function: callable without argument
+        :return: tuple with (result, leader), leader is False when the
+            result comes from the call of another thread
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as err:
+                call.error = err
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+            return call.result, True
+
+        call.event.wait()
+        if call.error is not None:
+            raise_shared(call.error)
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """Return the counters of the coalescing as a dict."""
+        with self._lock:
+            calls = self.executed + self.coalesced
+            return {
+                'calls': calls,
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'coalescing_ratio': (
+                    float(self.coalesced) / calls if calls else 0.0
+                ),
+                'in_flight': len(self._calls),
+            }
+
@@ -0,0 +1,162 @@
+"""Snapshots of records used by partial_edit to only send what changed.
+
+A snapshot is the last known state of a record: given by the caller,
+kept by a RecordCache fed by find/list responses and by the writes of
+partial_edit, or read from the local mirror when the client allows it.
+A stale snapshot can hide a change made by someone else, a write equal
+to the snapshot then being skipped: cached records expire after max_age
+seconds.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal, InvalidOperation
+from email.utils import format_datetime
+
+from .ultil import convert_to_valid_format, parse_datetime
+
+
+class RecordCache(object):
+    """In-process LRU cache of records by resource and id.
+
+    Records are copied in and out, callers never share the same object.
+    """
+
+    def __init__(self, max_entries=10000, max_age=60):
+        """
+        :param max_entries: maximum number of records kept
+        :param max_age: seconds a record is used as snapshot after it was
+            received, None to keep records until they are evicted
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, resource, resource_id):
+        """Return a copy of the record, None if it is not cached."""
+        key = (resource, resource_id)
+        with self._lock:
+            entry = self._records.get(key)
+            if entry is not None and self.max_age is not None \
+                    and entry[1] + self.max_age < time.monotonic():
+                del self._records[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._records.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def put(self, resource, record):
+        """Store a record, it needs an 'id'."""
+        if not isinstance(record, dict) or record.get('id') is None:
+            return
+        key = (resource, record['id'])
+        entry = (copy.deepcopy(record), time.monotonic())
+        with self._lock:
+            self._records.pop(key, None)
+            self._records[key] = entry
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+                self.evictions += 1
+
+    def put_many(self, resource, records):
+        for record in records or ():
+            self.put(resource, record)
+
+    def discard(self, resource, resource_id):
+        with self._lock:
+            self._records.pop((resource, resource_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def stats(self):
+        """Return the counters of the cache as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self._records),
+                'evictions': self.evictions,
+                'expired': self.expired,
+            }
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) \
+        and not isinstance(value, bool)
+
+
+def same_value(old, new):
+    """Tell whether writing new over old would change the record.
+
+    Besides equal values, a number equals its decimal string ('32000.00'
+    and 32000, as the server returns decimals) and a datetime equals the
+    string of the same second.
+    """
+    if old == new:
+        return True
+    if old is None or new is None:
+        return False
+    if _is_number(old) or _is_number(new):
+        try:
+            return Decimal(str(old)) == Decimal(str(new))
+        except InvalidOperation:
+            return False
+    if isinstance(new, (datetime, date)) or isinstance(old, (datetime, date)):
+        try:
+            return convert_to_valid_format(old, strict=True) \
+                == convert_to_valid_format(new, strict=True)
+        except ValueError:
+            return False
+    return False
+
+
+def diff_fields(snapshot, fields):
+    """Fields of fields whose value differs from snapshot.
+
+    Nested dicts are compared key by key, a changed one is returned
+    whole, merged over its snapshot value. Fields missing from the
+    snapshot are changed.
+
+    :param snapshot: known record as dict
+    :param fields: dict of the new values
+    :return: dict of the changed fields, empty when nothing changed
+    """
+    changes = {}
+    for field, value in fields.items():
+        if field not in snapshot:
+            changes[field] = value
+            continue
+        old = snapshot[field]
+        if isinstance(value, dict) and isinstance(old, dict):
+            if diff_fields(old, value):
+                changes[field] = dict(old, **value)
+        elif not same_value(old, value):
+            changes[field] = value
+    return changes
+
+
+def unmodified_since(snapshot, field='updated_at'):
+    """If-Unmodified-Since header value of the snapshot, None if unknown."""
+    try:
+        updated_at = parse_datetime(snapshot.get(field))
+    except (TypeError, ValueError):
+        return None
+    if updated_at is None:
+        return None
+    return format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
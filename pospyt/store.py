@@ -2,6 +2,8 @@ from .base import BaseModule
 
 
 class Store(BaseModule):
+    resource = "store"
+
     def create(self, store_data):
         """
         Use this call to add a store.
@@ -0,0 +1,191 @@
+"""Incremental decoding of the 'data' array of a JSON response.
+
+The body is fed chunk by chunk and every item of the array is handed
+over as soon as it is complete, so only the item being decoded and the
+unread part of the last chunk are kept in memory. The other keys of the
+envelope ('success', 'message', ...) are kept to be checked once the
+body has been read.
+"""
+import codecs
+import json
+import re
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# characters which can follow the part of a number decoded so far
+_NUMBER_CHARS = frozenset('.eE+-0123456789')
+
+# states of the parser
+_START = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_NEXT_KEY = 4
+_ITEM = 5
+_NEXT_ITEM = 6
+_END = 7
+
+
+class DataStream(object):
+    """Push parser yielding the items of the 'data' array of a response.
+
+    A response which is a bare JSON array has its items yielded and no
+    envelope.
+    """
+
+    def __init__(self, key='data'):
+        """
+        :param key: key of the array streamed in the envelope
+        """
+        self.key = key
+        self.envelope = None
+
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8-sig')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+        self._current_key = None
+        self._top_array = False
+        self._eof = False
+        # size the buffer must reach before an incomplete value is
+        # decoded again, so that a large value is not decoded once per chunk
+        self._retry_at = 0
+
+    def feed(self, chunk):
+        """Add a chunk of the body.
+
+        :param chunk: bytes or str
+        :return: list of the items completed by the chunk
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._retry_at -= self._pos
+        self._pos = 0
+        if len(self._buffer) < self._retry_at:
+            return []
+        return self._parse()
+
+    def close(self):
+        """Signal the end of the body.
+
+        :return: list of the last items
+        :raise ValueError: if the body is not a complete JSON document
+        """
+        self._buffer = self._buffer[self._pos:] \
+            + self._text.decode(b'', final=True)
+        self._pos = 0
+        self._eof = True
+        items = self._parse()
+        if self._state != _END:
+            raise ValueError('Truncated JSON document')
+        return items
+
+    def _skip_whitespace(self):
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+
+    def _decode(self):
+        """Decode the value at the current position.
+
+        :return: (True, value), or (False, None) when more input is needed
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            if self._eof:
+                raise
+            self._retry_at = self._pos + 2 * (len(self._buffer) - self._pos)
+            return False, None
+        # a number may go on in the next chunk: at the end of the buffer,
+        # or cut after its integer part ('0.' decodes as 0, '.' left)
+        if not self._eof and isinstance(value, (int, float)) \
+                and not isinstance(value, bool) \
+                and (end == len(self._buffer)
+                     or self._buffer[end] in _NUMBER_CHARS):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _expect(self, char, expected):
+        if char not in expected:
+            raise ValueError(
+                'Unexpected %r at position %d of the JSON document'
+                % (char, self._pos)
+            )
+
+    def _parse(self):
+        items = []
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                return items
+            char = self._buffer[self._pos]
+            state = self._state
+
+            if state == _START:
+                self._expect(char, '{[')
+                self._pos += 1
+                if char == '{':
+                    self.envelope = {}
+                    self._state = _KEY
+                else:
+                    self._top_array = True
+                    self._state = _ITEM
+
+            elif state == _KEY:
+                if char == '}':
+                    self._pos += 1
+                    self._state = _END
+                    continue
+                self._expect(char, '"')
+                complete, key = self._decode()
+                if not complete:
+                    return items
+                self._current_key = key
+                self._state = _COLON
+
+            elif state == _COLON:
+                self._expect(char, ':')
+                self._pos += 1
+                self._state = _VALUE
+
+            elif state == _VALUE:
+                if char == '[' and self._current_key == self.key:
+                    self._pos += 1
+                    self._state = _ITEM
+                    continue
+                complete, value = self._decode()
+                if not complete:
+                    return items
+                self.envelope[self._current_key] = value
+                self._state = _NEXT_KEY
+
+            elif state == _NEXT_KEY:
+                self._expect(char, ',}')
+                self._pos += 1
+                self._state = _KEY if char == ',' else _END
+
+            elif state in (_ITEM, _NEXT_ITEM):
+                if char == ']':
+                    self._pos += 1
+                    self._state = _END if self._top_array else _NEXT_KEY
+                    continue
+                if state == _NEXT_ITEM:
+                    self._expect(char, ',')
+                    self._pos += 1
+                    self._state = _ITEM
+                    continue
+                complete, item = self._decode()
+                if not complete:
+                    return items
+                items.append(item)
+                self._state = _NEXT_ITEM
+
+            else:
+                raise ValueError(
+                    'Extra data at position %d of the JSON document'
+                    % (self._pos,)
+                )
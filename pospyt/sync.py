@@ -0,0 +1,256 @@
+"""Incremental synchronization of a resource based on updated_at.
+
+The watermark of a resource is the greatest updated_at delivered to the
+sink, with the ids delivered at that exact timestamp. Pages are asked
+from the watermark on, sorted by updated_at then id, and the records
+already delivered are skipped, so records sharing a timestamp are
+neither lost nor delivered twice. The checkpoint is saved after each
+page has been handed to the sink: after a crash the sync resumes from
+the last saved page, and a page may be delivered again if the crash
+happened between the sink and the save, so sinks should be idempotent.
+"""
+import inspect
+import json
+import os
+import tempfile
+import threading
+
+from .ultil import parse_datetime, replace_file
+
+
+class MemoryCheckpointStore(object):
+    """Checkpoint store kept in memory, mostly useful for tests."""
+
+    def __init__(self):
+        self._checkpoints = {}
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            checkpoint = self._checkpoints.get(key)
+            return dict(checkpoint) if checkpoint else None
+
+    def save(self, key, checkpoint):
+        with self._lock:
+            self._checkpoints[key] = dict(checkpoint)
+
+
+class FileCheckpointStore(object):
+    """Checkpoint store persisted as a JSON file.
+
+    The file is rewritten atomically: written to a temporary file of the
+    same directory, flushed to disk, then renamed over the previous one.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path of the JSON file holding every checkpoint
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, key):
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key, checkpoint):
+        with self._lock:
+            checkpoints = self._read()
+            checkpoints[key] = checkpoint
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory, prefix='.pospyt-checkpoint-'
+            )
+            try:
+                with os.fdopen(fd, 'w') as tmp_file:
+                    json.dump(checkpoints, tmp_file)
+                    tmp_file.flush()
+                    os.fsync(tmp_file.fileno())
+                replace_file(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+
+def _deliver(sink, records):
+    write = getattr(sink, 'write', None)
+    if write is not None:
+        return write(records)
+    return sink(records)
+
+
+class _Watermark(object):
+    """State of an incremental sync, shared by the sync and async loops."""
+
+    def __init__(self, resource, checkpoint_store, options, page_size,
+                 field, key):
+        self.key = key or resource
+        self.store = checkpoint_store
+        self.page_size = page_size
+        self.field = field
+
+        options = dict(options or {})
+        display = options.get('display')
+        if display and field not in display:
+            options['display'] = list(display) + [field]
+        self.options = options
+
+        self.checkpoint = checkpoint_store.load(self.key) or {}
+        self.watermark = parse_datetime(self.checkpoint.get(field))
+        self.seen = set(
+            str(resource_id) for resource_id in self.checkpoint.get('ids', [])
+        )
+        self.delivered = 0
+        self.pages = 0
+        self.page = 1
+        # records per page served, the server may cap 'limit'
+        self.served = None
+
+    def page_options(self):
+        page_options = dict(
+            self.options,
+            sort={self.field: 'asc', 'id': 'asc'},
+            limit=self.page_size,
+            page=self.page,
+            action='list',
+        )
+        if self.watermark is not None:
+            date = dict(self.options.get('date') or {})
+            date['start'] = self.watermark.replace(microsecond=0)
+            page_options['date'] = date
+        return page_options
+
+    def fresh(self, records):
+        """Records of a page not delivered yet, with their timestamp."""
+        watermark, seen = self.watermark, self.seen
+        fresh = []
+        for record in records:
+            updated_at = parse_datetime(record.get(self.field))
+            if watermark is not None and updated_at is not None and (
+                updated_at < watermark
+                or (updated_at == watermark
+                    and str(record.get('id')) in seen)
+            ):
+                continue
+            fresh.append((updated_at, record))
+        return fresh
+
+    def delivered_page(self, fresh):
+        """Move the watermark after fresh was delivered and save it.
+
+        :return: True if the watermark advanced
+        """
+        self.delivered += len(fresh)
+        self.pages += 1
+        advanced = False
+        for updated_at, record in fresh:
+            if updated_at is None:
+                continue
+            if self.watermark is None or updated_at > self.watermark:
+                self.watermark = updated_at
+                self.seen = set()
+                advanced = True
+            if updated_at == self.watermark:
+                self.seen.add(str(record.get('id')))
+
+        self.checkpoint = {
+            self.field: (
+                self.watermark.isoformat() if self.watermark else None
+            ),
+            'ids': sorted(self.seen),
+        }
+        self.store.save(self.key, self.checkpoint)
+        return advanced
+
+    def next_page(self, records, advanced):
+        """Select the next page, return False when the sync is done."""
+        if not records:
+            return False
+        if self.served is None:
+            self.served = len(records)
+        elif len(records) < self.served:
+            return False
+        # a new watermark restarts from its first page, otherwise the
+        # page only held records already delivered and the next one is asked
+        self.page = 1 if advanced else self.page + 1
+        return True
+
+    def result(self):
+        return {
+            'records': self.delivered,
+            'pages': self.pages,
+            'checkpoint': self.checkpoint,
+        }
+
+
+def incremental_sync(client, resource, sink, checkpoint_store, options=None,
+                     page_size=100, field='updated_at', key=None):
+    """Deliver to sink the records changed since the last checkpoint.
+
+    :param client: PosWebServiceDict used to list the resource
+    :param resource: string of the resource like 'product', 'order'
+    :param sink: callable, or object with a write method, receiving
+        each page of changed records as a list
+    :param checkpoint_store: object with load(key) and save(key, checkpoint)
+        methods, e.g. FileCheckpointStore
+    :param options: optional dict of parameters of the list requests
+        (one or more of 'filter', 'display')
+    :param page_size: number of records requested per page
+    :param field: timestamp field of the watermark
+    :param key: key of the checkpoint, default to the resource
+    :return: dict with the number of records and pages delivered
+        and the last checkpoint
+    """
+    state = _Watermark(
+        resource, checkpoint_store, options, page_size, field, key
+    )
+    while True:
+        records = client.list(resource, state.page_options(), source='remote')
+        if not records:
+            break
+        fresh = state.fresh(records)
+        advanced = False
+        if fresh:
+            _deliver(sink, [record for _, record in fresh])
+            advanced = state.delivered_page(fresh)
+        if not state.next_page(records, advanced):
+            break
+    return state.result()
+
+
+async def aincremental_sync(client, resource, sink, checkpoint_store,
+                            options=None, page_size=100, field='updated_at',
+                            key=None):
+    """Asynchronous version of incremental_sync.
+
+    :param client: AsyncPosWebServiceDict used to list the resource
+    :param sink: same as incremental_sync, it may also be a coroutine
+        function or have a coroutine write method
+    """
+    state = _Watermark(
+        resource, checkpoint_store, options, page_size, field, key
+    )
+    while True:
+        records = await client.list(
+            resource, state.page_options(), source='remote'
+        )
+        if not records:
+            break
+        fresh = state.fresh(records)
+        advanced = False
+        if fresh:
+            delivered = _deliver(sink, [record for _, record in fresh])
+            if inspect.isawaitable(delivered):
+                await delivered
+            advanced = state.delivered_page(fresh)
+        if not state.next_page(records, advanced):
+            break
+    return state.result()
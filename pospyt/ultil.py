@@ -1,36 +1,197 @@
-from datetime import datetime
-import copy
+from datetime import date, datetime, timezone
+from functools import lru_cache
+import os
+import re
+import stat
 
 from .constant import DATE_FORMAT_FULL, DATE_FORMAT_PARTIAL
 
-def _try_convert_str_to_datetime(str_datetime):
+# timestamp fields of the records returned by list/search
+DATE_FIELDS = ('updated_at', 'created_at')
+
+# only the head of an HTML error page is scanned for its title
+TITLE_SCAN_LIMIT = 16 * 1024
+_TITLE = re.compile(r'<title[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso(text):
+    # fromisoformat covers DATE_FORMAT_PARTIAL and DATE_FORMAT_FULL too,
+    # strptime is only tried for what it rejects
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
     try:
-        # check if str_datetime is partian format -> convert to datetime
-        datetime_partial = datetime.strptime(str_datetime, DATE_FORMAT_PARTIAL)
-        return datetime_partial
+        return datetime.fromisoformat(text)
     except ValueError:
-        # check if str_datetime is full format -> convert to datetime
+        pass
+    for date_format in (DATE_FORMAT_PARTIAL, DATE_FORMAT_FULL):
         try:
-            datetime_full = datetime.strptime(str_datetime, DATE_FORMAT_FULL)
-            return datetime_full
+            return datetime.strptime(text, date_format)
         except ValueError:
-            # by default, return datetime at current timepstap
-            current_datetime = datetime.now()
-            return current_datetime
-                
-def convert_to_valid_format(date):
-    modified_date = copy.deepcopy(date)
+            pass
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _format_naive(value):
+    return value.strftime(DATE_FORMAT_FULL)
+
+
+def _format_datetime(value):
+    # aware datetimes of the same instant are equal (and hash equal)
+    # whatever their timezone, only naive ones can be cached
+    if value.tzinfo is not None:
+        return value.strftime(DATE_FORMAT_FULL)
+    return _format_naive(value)
+
+
+def _try_convert_str_to_datetime(str_datetime, strict=False):
+    parsed = _parse_iso(str_datetime.strip())
+    if parsed is not None:
+        return parsed
+    if strict:
+        raise ValueError("Invalid datetime string: %r" % (str_datetime,))
+    # by default, return datetime at current timepstap
+    return datetime.now()
 
+
+def convert_to_valid_format(date_value, strict=False):
+    """Format a date boundary as DATE_FORMAT_FULL.
+
+    :param date_value: datetime, date or string like '2021-11-11',
+        '2021-11-11 15:09:29' or any ISO 8601 datetime
+    :param strict: raise ValueError for a string which is not a date
+        instead of using the current datetime
+    :return: string like '2021-11-11 15:09:29'
+    """
     # Use strftime to format Python datetime to the desired format
-    if isinstance(modified_date, datetime):
-        formatted_datetime = modified_date.strftime('%Y-%m-%d %H:%M:%S')
-        return formatted_datetime
+    if isinstance(date_value, datetime):
+        return _format_datetime(date_value)
+
+    elif isinstance(date_value, date):
+        return _format_datetime(
+            datetime(date_value.year, date_value.month, date_value.day)
+        )
 
-    elif isinstance(modified_date, str):
-        modified_date_to_datetime = _try_convert_str_to_datetime(modified_date)
-        formatted_datetime = modified_date_to_datetime.strftime('%Y-%m-%d %H:%M:%S')
-        return formatted_datetime
+    elif isinstance(date_value, str):
+        return _format_datetime(
+            _try_convert_str_to_datetime(date_value, strict)
+        )
 
     else:
         raise ValueError("Invalid input. Expected Python datetime object.")
-     
\ No newline at end of file
+
+
+def _to_naive_utc(parsed):
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_datetime(value):
+    """Convert a datetime string returned by the webservice to datetime.
+
+    Accept ISO 8601 strings like '2021-11-11T15:09:29.000000Z' and the
+    DATE_FORMAT_PARTIAL/DATE_FORMAT_FULL formats. Aware values are
+    converted to naive UTC datetimes.
+
+    :param value: string or datetime
+    :return: naive datetime, None if value is empty
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = _parse_iso(value.strip())
+        if parsed is None:
+            raise ValueError("Invalid datetime string: %r" % (value,))
+    return _to_naive_utc(parsed)
+
+
+def parse_datetime_columns(records, fields=DATE_FIELDS, strict=False):
+    """Convert the timestamp fields of records to datetime, in place.
+
+    Meant for the records of list/search responses: each distinct
+    string is parsed once, the records sharing it get the same
+    (immutable) datetime.
+
+    :param records: list of records as dict
+    :param fields: fields converted when present
+    :param strict: raise ValueError for a value which is not a date,
+        otherwise it is left unchanged
+    :return: records
+    """
+    parsed = {}
+    for record in records:
+        for field in fields:
+            value = record.get(field)
+            if not isinstance(value, str):
+                continue
+            converted = parsed.get(value)
+            if converted is None:
+                converted = _parse_iso(value.strip())
+                if converted is None:
+                    if strict:
+                        raise ValueError(
+                            "Invalid datetime string in %s: %r" % (field, value)
+                        )
+                    continue
+                converted = _to_naive_utc(converted)
+                parsed[value] = converted
+            record[field] = converted
+    return records
+
+
+def extract_html_title(content, limit=TITLE_SCAN_LIMIT):
+    """Extract the <title> of an HTML page, e.g. a Laravel error page.
+
+    Only the first `limit` characters are scanned, the title of an
+    error page is in its head, however large the page is.
+
+    :param content: bytes or str of the page
+    :param limit: number of bytes/characters scanned
+    :return: text of the title, None if there is none
+    """
+    if not content:
+        return None
+    head = content[:limit]
+    if isinstance(head, bytes):
+        head = head.decode('utf-8', 'replace')
+    match = _TITLE.search(head)
+    if match is None:
+        return None
+    from html import unescape
+    title = _SPACES.sub(' ', unescape(_TAG.sub('', match.group(1)))).strip()
+    return title or None
+
+
+def _default_file_mode(probe_path):
+    # os.umask can only read the umask by changing it, for every thread
+    # of the process: let the kernel apply it to a file created 0666
+    fd = os.open(probe_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        return stat.S_IMODE(os.fstat(fd).st_mode)
+    finally:
+        os.close(fd)
+        os.remove(probe_path)
+
+
+def replace_file(tmp_path, path):
+    """Rename a temporary file over path, atomically.
+
+    mkstemp creates files readable by their owner only, the temporary
+    file gets the mode of the file it replaces, or the default mode of
+    a new file, first.
+
+    :param tmp_path: complete file of the same directory as path
+    :param path: destination, replaced if it exists
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = _default_file_mode(tmp_path + '.mode')
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
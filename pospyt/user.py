@@ -2,6 +2,8 @@ from .base import BaseModule
 
 
 class User(BaseModule):
+    resource = "user"
+
     def create(self, user_data):
         """
         Use this call to add a user.
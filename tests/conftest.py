@@ -0,0 +1,181 @@
+import asyncio
+import inspect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pospyt import PosWebServiceDict
+
+
+class FakeWebservice(object):
+    """In-memory webservice answering /api/<resource>/<action> like the
+    Laravel backend: JSON bodies, {'success', 'message', 'data'}
+    envelopes, 'date' bounds on updated_at as 'Y-m-d H:M:S'."""
+
+    def __init__(self):
+        self.db = {}
+        self.requests = []
+        # action -> status code answered instead of the action
+        self.failures = {}
+        # status codes answered to the next requests, whatever they are
+        self.fail_next = []
+        # seconds waited before answering
+        self.delay = 0
+        # honor {'filter': {'id': {'operator': 'in', ...}}} in list
+        self.filter_ids = True
+        # records per page served at most, whatever the limit asked
+        self.max_limit = None
+        self.lock = threading.Lock()
+
+    def records(self, resource):
+        return self.db.setdefault(resource, [])
+
+    def answer(self, method, path, body):
+        parts = path.strip('/').split('/')
+        resource = parts[1]
+        action = parts[2] if len(parts) > 2 else None
+        with self.lock:
+            self.requests.append((method, resource, action, body))
+            rows = list(self.records(resource))
+
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            failure = self.fail_next.pop(0) if self.fail_next else None
+        if failure is not None:
+            return failure, None
+        if action in self.failures:
+            return self.failures[action], None
+        if action == 'list':
+            return 200, self._list(rows, body, self.filter_ids,
+                                   self.max_limit)
+        if action == 'find':
+            for row in rows:
+                if str(row['id']) == str(body.get('id')):
+                    return 200, row
+            return 404, None
+        if action == 'blank':
+            return 200, {'name': '', 'price': '0.00'}
+        if action in ('create', 'update', 'delete', 'batch'):
+            return 200, body
+        return 404, None
+
+    @staticmethod
+    def _list(rows, body, filter_ids=True, max_limit=None):
+        id_filter = (body.get('filter') or {}).get('id')
+        if filter_ids and id_filter and id_filter['operator'] == 'in':
+            wanted = set(str(value) for value in id_filter['value'])
+            rows = [r for r in rows if str(r['id']) in wanted]
+        date = body.get('date') or {}
+        if date.get('start'):
+            start = date['start'].replace(' ', 'T')
+            rows = [r for r in rows if r['updated_at'][:19] >= start]
+        if date.get('end'):
+            end = date['end'].replace(' ', 'T')
+            rows = [r for r in rows if r['updated_at'][:19] <= end]
+        for field, direction in reversed(list((body.get('sort') or {}).items())):
+            rows = sorted(rows, key=lambda r: r[field],
+                          reverse=direction == 'desc')
+        limit = int(body.get('limit', 10))
+        if max_limit:
+            limit = min(limit, max_limit)
+        page = int(body.get('page', 1))
+        rows = rows[(page - 1) * limit:page * limit]
+        display = body.get('display')
+        if display:
+            rows = [
+                dict((f, r.get(f)) for f in ['id'] + list(display))
+                for r in rows
+            ]
+        return rows
+
+
+def _handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def handle_any(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            body = json.loads(raw) if raw else {}
+            status, data = service.answer(self.command, self.path, body)
+            envelope = {'success': status == 200, 'message': 'ok', 'data': data}
+            content = json.dumps(envelope).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = do_DELETE = handle_any
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients closing their keep-alive connections are not errors
+        pass
+
+
+@pytest.fixture
+def webservice():
+    service = FakeWebservice()
+    server = _Server(('127.0.0.1', 0), _handler(service))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service.url = 'http://127.0.0.1:%d/api' % server.server_address[1]
+    yield service
+    server.shutdown()
+    server.server_close()
+
+
+def sync_client(url, **kwargs):
+    return PosWebServiceDict(url, 'key', **kwargs)
+
+
+def async_client(url, **kwargs):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+    return AsyncPosWebServiceDict(url, 'key', **kwargs)
+
+
+@pytest.fixture(params=[sync_client, async_client], ids=['sync', 'async'])
+def make_client(request):
+    """Build a PosWebServiceDict, then an AsyncPosWebServiceDict."""
+    return request.param
+
+
+@pytest.fixture
+def make_async_client():
+    return async_client
+
+
+def _call(client, method, *args, **kwargs):
+    function = getattr(client, method)
+    if not hasattr(client, '__aenter__'):
+        return function(*args, **kwargs)
+
+    async def run():
+        async with client:
+            # some methods are inherited and return a coroutine
+            result = function(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def call():
+    """Call a method of a client, awaited in an event loop closing the
+    session of an asynchronous client."""
+    return _call
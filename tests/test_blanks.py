@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from pospyt import PosWebServiceDict
+
+
+def blanks_sent(webservice):
+    return sorted(r[1] for r in webservice.requests if r[2] == 'blank')
+
+
+def test_prewarm_blanks_when_created(webservice):
+    client = PosWebServiceDict(webservice.url, 'key', prewarm_blanks=True)
+    resources = blanks_sent(webservice)
+    assert 'product' in resources
+    client.partial_add('product', {'name': 'Cà Phê'})
+    assert blanks_sent(webservice) == resources
+
+
+def test_async_prewarm_blanks_on_first_use(webservice):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+
+    client = AsyncPosWebServiceDict(webservice.url, 'key', prewarm_blanks=True)
+    assert webservice.requests == []
+
+    async def run():
+        async with client:
+            return await asyncio.gather(*[
+                client.partial_add('product', {'name': 'Product %d' % i})
+                for i in range(5)
+            ])
+
+    responses = asyncio.run(run())
+    assert [r['data']['name'] for r in responses] == \
+        ['Product %d' % i for i in range(5)]
+    # every envelope once, product included, fetched by the prewarm
+    assert blanks_sent(webservice) == \
+        sorted(client._registered_resources())
+    assert 'product' in blanks_sent(webservice)
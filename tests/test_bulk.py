@@ -0,0 +1,34 @@
+ITEMS = [{'id': i, 'name': 'Product %d' % i} for i in range(1, 5)]
+
+
+def sent(webservice, action):
+    return [r for r in webservice.requests if r[2] == action]
+
+
+def bulk(webservice, make_client, call, method):
+    return call(make_client(webservice.url), method, 'product', ITEMS,
+                chunk_size=2, batch_action='batch')
+
+
+def test_failed_create_batch_is_not_sent_again(webservice, make_client,
+                                               call):
+    webservice.failures['batch'] = 500
+    result = bulk(webservice, make_client, call, 'bulk_create')
+    assert [r.error.error_code for r in result.failed] == [500] * 4
+    assert sent(webservice, 'create') == []
+
+
+def test_rejected_create_batch_is_sent_item_by_item(webservice, make_client,
+                                                    call):
+    webservice.failures['batch'] = 422
+    result = bulk(webservice, make_client, call, 'bulk_create')
+    assert result.ok
+    assert len(sent(webservice, 'create')) == 4
+
+
+def test_failed_update_batch_is_sent_item_by_item(webservice, make_client,
+                                                  call):
+    webservice.failures['batch'] = 500
+    result = bulk(webservice, make_client, call, 'bulk_update')
+    assert result.ok
+    assert len(sent(webservice, 'update')) == 4
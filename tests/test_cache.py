@@ -0,0 +1,27 @@
+from pospyt.cache import Revalidator
+
+KEY = ('product', 'list', 'GET', '{}')
+HEADERS = {'ETag': '"v1"'}
+
+
+def test_revalidated_bodies_are_copies():
+    revalidator = Revalidator()
+    body = {'success': True, 'data': [{'id': 1, 'name': 'Cà Phê'}]}
+    revalidator.store(KEY, HEADERS, body)
+
+    # the caller of the first response changes it
+    body['data'][0]['name'] = 'changed'
+    first = revalidator.revalidated(KEY)
+    assert first['data'][0]['name'] == 'Cà Phê'
+
+    first['data'].append({'id': 2})
+    second = revalidator.revalidated(KEY)
+    assert second == {'success': True, 'data': [{'id': 1, 'name': 'Cà Phê'}]}
+    assert second is not first
+
+
+def test_responses_without_validators_are_not_stored():
+    revalidator = Revalidator()
+    revalidator.store(KEY, {}, {'data': []})
+    assert revalidator.revalidated(KEY) is None
+    assert revalidator.conditional_headers(KEY) == {}
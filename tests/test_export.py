@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import stat
+
+import pytest
+
+from pospyt import FileCheckpointStore, PosWebServiceDict
+
+PRODUCTS = [
+    {'id': i, 'name': 'Product %d' % i, 'updated_at': '2021-11-01T08:00:00'}
+    for i in range(1, 8)
+]
+
+
+def export_sync(webservice, path, **kwargs):
+    client = PosWebServiceDict(webservice.url, 'key')
+    return client.export('product', path, page_size=3, **kwargs)
+
+
+def export_async(webservice, path, **kwargs):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+
+    async def run():
+        async with AsyncPosWebServiceDict(webservice.url, 'key') as client:
+            return await client.export('product', path, page_size=3, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.fixture(params=[export_sync, export_async], ids=['sync', 'async'])
+def export(request):
+    return request.param
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.fixture
+def umask(monkeypatch):
+    """Set the umask to 027, then fail any later os.umask call: reading
+    the umask that way would change it for every thread."""
+    previous = os.umask(0o027)
+
+    def forbidden(mask):
+        raise AssertionError('os.umask(%o) called' % mask)
+
+    monkeypatch.setattr(os, 'umask', forbidden)
+    yield 0o027
+    monkeypatch.undo()
+    os.umask(previous)
+
+
+@pytest.mark.parametrize('stream', [False, True], ids=['pages', 'stream'])
+def test_export_writes_every_record(webservice, export, tmp_path, stream):
+    webservice.db['product'] = list(PRODUCTS)
+    path = str(tmp_path / 'products.jsonl')
+    result = export(webservice, path, stream=stream)
+    with open(path) as exported:
+        assert [json.loads(line)['id'] for line in exported] == \
+            [1, 2, 3, 4, 5, 6, 7]
+    assert result['records'] == 7
+    assert os.listdir(str(tmp_path)) == ['products.jsonl']
+
+
+def test_export_file_has_the_default_mode(webservice, export, tmp_path,
+                                          umask):
+    webservice.db['product'] = list(PRODUCTS)
+    path = str(tmp_path / 'products.csv')
+    export(webservice, path)
+    assert mode_of(path) == 0o640
+    assert os.listdir(str(tmp_path)) == ['products.csv']
+
+
+def test_export_keeps_the_mode_of_the_replaced_file(webservice, export,
+                                                    tmp_path):
+    webservice.db['product'] = list(PRODUCTS)
+    path = str(tmp_path / 'products.csv')
+    open(path, 'w').close()
+    os.chmod(path, 0o640)
+    export(webservice, path)
+    assert mode_of(path) == 0o640
+
+
+def test_checkpoint_file_modes(tmp_path, umask):
+    path = str(tmp_path / 'checkpoints.json')
+    store = FileCheckpointStore(path)
+    store.save('product', {'updated_at': '2021-11-01T08:00:00', 'ids': []})
+    assert mode_of(path) == 0o640
+
+    os.chmod(path, 0o604)
+    store.save('order', None)
+    assert mode_of(path) == 0o604
+    assert store.load('product')['updated_at'] == '2021-11-01T08:00:00'
@@ -0,0 +1,72 @@
+import pytest
+
+from pospyt import CircuitBreaker, PosCircuitOpenError, PosWebServiceError
+
+PRODUCTS = [{'id': i, 'name': 'Product %d' % i} for i in range(1, 6)]
+
+
+def actions(webservice):
+    return [r[2] for r in webservice.requests]
+
+
+def find_many(call, client, ids, **kwargs):
+    return call(client, 'find_many', 'product', ids, batch_size=2, **kwargs)
+
+
+def test_ids_are_asked_by_chunks(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    records, missing = find_many(
+        call, make_client(webservice.url), [1, '2', 3, 9, 1]
+    )
+    assert records == {
+        1: PRODUCTS[0], '2': PRODUCTS[1], 3: PRODUCTS[2],
+    }
+    assert missing == [9]
+    assert actions(webservice) == ['list', 'list']
+
+
+@pytest.mark.parametrize('server', ['ignores', 'rejects'])
+def test_finds_when_the_server_cannot_filter(webservice, make_client, call,
+                                             server):
+    webservice.db['product'] = list(PRODUCTS)
+    if server == 'ignores':
+        webservice.filter_ids = False
+    else:
+        webservice.failures['list'] = 422
+    # the first page of an ignored filter does not match the chunk
+    records, missing = find_many(
+        call, make_client(webservice.url), [2, 3, 1, 9]
+    )
+    assert sorted(records) == [1, 2, 3]
+    assert missing == [9]
+    # the filter is not tried again after the first chunk
+    assert actions(webservice).count('list') == 1
+    assert actions(webservice).count('find') == 4
+
+
+def test_transient_list_failure_is_raised(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    webservice.fail_next = [500]
+    with pytest.raises(PosWebServiceError) as error:
+        find_many(call, make_client(webservice.url), [1, 2, 3])
+    assert error.value.error_code == 500
+    assert 'find' not in actions(webservice)
+
+
+def test_find_failure_is_not_a_missing_record(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    webservice.filter_ids = False
+    webservice.failures['find'] = 503
+    with pytest.raises(PosWebServiceError) as error:
+        find_many(call, make_client(webservice.url), [2, 3])
+    assert error.value.error_code == 503
+
+
+def test_open_circuit_is_not_a_missing_record(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    client = make_client(webservice.url, circuit_breaker=breaker)
+    with pytest.raises(PosCircuitOpenError):
+        find_many(call, client, [1, 2])
+    assert webservice.requests == []
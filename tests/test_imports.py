@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ('asyncio', 'sqlite3', 'bs4', 'aiohttp')
+
+
+def loaded_after(code):
+    """Modules of HEAVY_MODULES and pospyt loaded by code in a new
+    interpreter."""
+    script = (
+        code + '\nimport sys\n'
+        'print(" ".join(sorted(name for name in sys.modules\n'
+        '    if name in %r or name.startswith("pospyt."))))' % (HEAVY_MODULES,)
+    )
+    output = subprocess.check_output([sys.executable, '-c', script])
+    return set(output.decode().split())
+
+
+def test_import_does_not_load_heavy_modules():
+    loaded = loaded_after('import pospyt')
+    assert not loaded & set(HEAVY_MODULES)
+    assert 'pospyt.aio' not in loaded
+    assert 'pospyt.mirror' not in loaded
+
+
+def test_resource_modules_are_imported_on_first_access():
+    loaded = loaded_after(
+        'import pospyt\n'
+        'client = pospyt.PosWebservice("http://localhost/api", "key")\n'
+        'client.product'
+    )
+    assert 'pospyt.product' in loaded
+    assert 'pospyt.order' not in loaded
+    assert 'pospyt.category' not in loaded
+
+
+def test_mirror_is_imported_on_first_access():
+    loaded = loaded_after('import pospyt\npospyt.LocalMirror')
+    assert {'sqlite3', 'pospyt.mirror'} <= loaded
+    assert 'asyncio' not in loaded
+
+
+def test_async_client_is_imported_on_first_access():
+    loaded = loaded_after('import pospyt\npospyt.AsyncPosWebServiceDict')
+    assert {'asyncio', 'pospyt.aio'} <= loaded
+    # aiohttp itself is imported by the first session
+    assert 'aiohttp' not in loaded
+
+
+def test_lazy_attributes():
+    import pospyt
+    from pospyt.mirror import LocalMirror
+
+    assert pospyt.LocalMirror is LocalMirror
+    with pytest.raises(AttributeError):
+        pospyt.Missing
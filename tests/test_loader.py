@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from pospyt import CircuitBreaker, PosCircuitOpenError, PosWebServiceError
+
+PRODUCTS = [{'id': i, 'name': 'Product %d' % i} for i in range(1, 21)]
+
+
+def lists(webservice):
+    return sum(1 for r in webservice.requests if r[2] == 'list')
+
+
+def outcome(load, resource_id):
+    try:
+        return load(resource_id)['id']
+    except PosWebServiceError as err:
+        return err
+
+
+def load_each(client, loader, ids):
+    """Load ids one after the other, return the ids or the errors."""
+    if not hasattr(client, '__aenter__'):
+        return [outcome(loader.load, resource_id) for resource_id in ids]
+
+    async def run():
+        results = []
+        for resource_id in ids:
+            try:
+                results.append((await loader.load(resource_id))['id'])
+            except PosWebServiceError as err:
+                results.append(err)
+        await client.close()
+        return results
+    return asyncio.run(run())
+
+
+def test_concurrent_loads_are_batched(webservice, make_client):
+    webservice.db['product'] = list(PRODUCTS)
+    ids = [i % 10 + 1 for i in range(40)]
+    client = make_client(webservice.url)
+    loader = client.loader('product', window=0.05)
+
+    if hasattr(client, '__aenter__'):
+        async def run():
+            async with client:
+                return await asyncio.gather(*[loader.load(i) for i in ids])
+        records = asyncio.run(run())
+    else:
+        with ThreadPoolExecutor(16) as executor:
+            records = list(executor.map(loader.load, ids))
+
+    assert [record['id'] for record in records] == ids
+    assert lists(webservice) <= 2
+    assert loader.stats()['loads'] == 40
+
+
+def test_records_and_misses_are_memoized(webservice, make_client):
+    webservice.db['product'] = list(PRODUCTS)
+    client = make_client(webservice.url)
+    loader = client.loader('product', window=0)
+    results = load_each(client, loader, [3, 3, 99, 99])
+    assert results[:2] == [3, 3]
+    assert [err.error_code for err in results[2:]] == [404, 404]
+    assert lists(webservice) == 2
+
+
+def test_failed_batches_are_not_memoized(webservice, make_client):
+    webservice.db['product'] = list(PRODUCTS)
+    webservice.fail_next = [500]
+    client = make_client(webservice.url)
+    loader = client.loader('product', window=0)
+    [error, record] = load_each(client, loader, [1, 1])
+    assert error.error_code == 500
+    assert record == 1
+
+
+def test_open_circuit_is_not_a_missing_record(webservice, make_client):
+    webservice.db['product'] = list(PRODUCTS)
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    client = make_client(webservice.url, circuit_breaker=breaker)
+    loader = client.loader('product', window=0)
+    [error] = load_each(client, loader, [1])
+    assert isinstance(error, PosCircuitOpenError)
+
+    breaker.record_success()
+    assert load_each(client, loader, [1]) == [1]
@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from pospyt.mirror import LocalMirror
+
+
+def product(product_id, price, updated_at):
+    return {
+        'id': product_id,
+        'name': 'Product %d' % product_id,
+        'price': price,
+        'updated_at': updated_at,
+    }
+
+
+PRODUCTS = [
+    product(1, '100000.00', '2021-11-01T08:00:00.000000Z'),
+    product(2, '32000.00', '2021-11-05T08:00:00.000000Z'),
+    product(3, '5.00', '2021-11-10T08:00:00.000000Z'),
+    product(10, '9000.00', '2021-11-20T08:00:00.000000Z'),
+    product(25, '-3.50', '2021-12-01T08:00:00.000000Z'),
+]
+
+
+@pytest.fixture
+def mirror():
+    mirror = LocalMirror(resources=('product',))
+    mirror.upsert('product', PRODUCTS)
+    yield mirror
+    mirror.close()
+
+
+def ids(records):
+    return [record['id'] for record in records]
+
+
+@pytest.mark.parametrize('value', [2, '2', 2.0])
+def test_id_range_is_numeric(mirror, value):
+    records = mirror.query('product', {
+        'filter': {'id': {'operator': 'gt', 'value': value}},
+    })
+    assert ids(records) == [3, 10, 25]
+
+
+def test_id_in_accepts_ints_and_strings(mirror):
+    records = mirror.query('product', {
+        'filter': {'id': {'operator': 'in', 'value': [10, '25', 7]}},
+    })
+    assert ids(records) == [10, 25]
+    records = mirror.query('product', {
+        'filter': {'id': {'operator': 'not_in', 'value': ['1', 2]}},
+    })
+    assert ids(records) == [3, 10, 25]
+
+
+@pytest.mark.parametrize('value', [40000, '40000', '40000.00'])
+def test_decimal_strings_compare_numerically(mirror, value):
+    records = mirror.query('product', {
+        'filter': {'price': {'operator': 'lt', 'value': value}},
+    })
+    assert ids(records) == [2, 3, 10, 25]
+
+
+def test_decimal_strings_in(mirror):
+    records = mirror.query('product', {
+        'filter': {'price': {'operator': 'in', 'value': [5, '9000']}},
+    })
+    assert ids(records) == [3, 10]
+
+
+def test_sort_decimal_strings_numerically(mirror):
+    records = mirror.query('product', {'sort': {'price': 'asc'}})
+    assert [r['price'] for r in records] == [
+        '-3.50', '5.00', '9000.00', '32000.00', '100000.00'
+    ]
+    records = mirror.query('product', {'sort': {'price': 'desc'}})
+    assert ids(records) == [1, 2, 10, 3, 25]
+
+
+def test_sort_id_numerically(mirror):
+    records = mirror.query('product', {'sort': {'id': 'desc'}})
+    assert ids(records) == [25, 10, 3, 2, 1]
+
+
+def test_sort_text_lexically(mirror):
+    records = mirror.query('product', {'sort': {'name': 'asc'}})
+    assert ids(records) == [1, 10, 2, 25, 3]
+
+
+def test_date_bounds_are_inclusive(mirror):
+    records = mirror.query('product', {'date': {
+        'start': datetime(2021, 11, 5, 8),
+        'end': '2021-11-20 08:00:00',
+    }})
+    assert ids(records) == [2, 3, 10]
+
+
+def test_date_bounds_of_aware_strings(mirror):
+    records = mirror.query('product', {'date': {
+        'start': '2021-11-10T09:00:00+01:00',
+    }})
+    assert ids(records) == [3, 10, 25]
+
+
+def test_pages(mirror):
+    options = {'sort': {'id': 'asc'}, 'limit': 2}
+    assert ids(mirror.query('product', dict(options, page=2))) == [3, 10]
+    assert mirror.query('product', options, columns='id') == ['1', '2']
+
+
+
+def refresh_sync(webservice, change=None):
+    from pospyt import PosWebServiceDict
+
+    mirror = LocalMirror(resources=('product',))
+    client = PosWebServiceDict(webservice.url, 'key', mirror=mirror)
+    client.refresh_mirror(page_size=2)
+    if change:
+        change()
+        client.refresh_mirror(incremental=True, page_size=2)
+    return mirror.query('product')
+
+
+def refresh_async(webservice, change=None):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+
+    mirror = LocalMirror(resources=('product',))
+
+    async def run():
+        async with AsyncPosWebServiceDict(
+            webservice.url, 'key', mirror=mirror
+        ) as client:
+            await client.refresh_mirror(page_size=2)
+            if change:
+                change()
+                await client.refresh_mirror(incremental=True, page_size=2)
+
+    asyncio.run(run())
+    return mirror.query('product')
+
+
+@pytest.mark.parametrize('refresh', [refresh_sync, refresh_async],
+                         ids=['sync', 'async'])
+def test_refresh_mirror(webservice, refresh):
+    webservice.db['product'] = [dict(p) for p in PRODUCTS]
+    assert ids(refresh(webservice)) == [1, 2, 3, 10, 25]
+
+
+@pytest.mark.parametrize('refresh', [refresh_sync, refresh_async],
+                         ids=['sync', 'async'])
+def test_incremental_refresh_mirror(webservice, refresh):
+    webservice.db['product'] = [dict(p) for p in PRODUCTS]
+
+    def change():
+        webservice.db['product'].append(
+            product(30, '1.00', '2021-12-02T08:00:00.000000Z')
+        )
+
+    assert ids(refresh(webservice, change)) == [1, 2, 3, 10, 25, 30]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from pospyt.pagination import (
+    aiter_pages, aiter_records, aiter_streamed_records, iter_pages,
+    iter_records, iter_streamed_records
+)
+
+RECORDS = [{'id': i} for i in range(1, 24)]
+
+
+class Server(object):
+    """Pages of RECORDS, at most cap records per page whatever the limit."""
+
+    def __init__(self, records=RECORDS, cap=None):
+        self.records = records
+        self.cap = cap
+        self.pages = []
+
+    def __call__(self, options):
+        limit = options['limit']
+        if self.cap:
+            limit = min(limit, self.cap)
+        self.pages.append(options['page'])
+        start = (options['page'] - 1) * limit
+        return self.records[start:start + limit]
+
+
+def ids(records):
+    return [record['id'] for record in records]
+
+
+def walk(server, kind, page_size, prefetch=0):
+    if kind == 'pages':
+        return [r for page in iter_pages(server, {}, page_size, prefetch)
+                for r in page]
+    if kind == 'records':
+        return list(iter_records(server, {}, page_size, prefetch))
+    if kind == 'streamed':
+        return list(iter_streamed_records(
+            lambda options: iter(server(options)), {}, page_size
+        ))
+
+    async def fetch(options):
+        return server(options)
+
+    async def stream(options):
+        for record in server(options):
+            yield record
+
+    async def run():
+        if kind == 'apages':
+            return [r async for page in aiter_pages(fetch, {}, page_size,
+                                                    prefetch)
+                    for r in page]
+        if kind == 'arecords':
+            return [r async for r in aiter_records(fetch, {}, page_size,
+                                                   prefetch)]
+        return [r async for r in aiter_streamed_records(stream, {},
+                                                        page_size)]
+    return asyncio.run(run())
+
+
+KINDS = ['pages', 'records', 'streamed', 'apages', 'arecords', 'astreamed']
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_walk_stops_on_the_short_page(kind):
+    server = Server()
+    assert ids(walk(server, kind, 10)) == list(range(1, 24))
+    assert server.pages == [1, 2, 3]
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_walk_stops_on_an_empty_page(kind):
+    server = Server(RECORDS[:20])
+    assert ids(walk(server, kind, 10)) == list(range(1, 21))
+    assert server.pages == [1, 2, 3]
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_limit_capped_by_the_server(kind):
+    server = Server(cap=5)
+    assert ids(walk(server, kind, 500)) == list(range(1, 24))
+    assert server.pages == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_single_short_page(kind):
+    server = Server(RECORDS[:3])
+    assert ids(walk(server, kind, 10)) == [1, 2, 3]
+    # one more page tells a last page from a capped one
+    assert server.pages == [1, 2]
+
+
+@pytest.mark.parametrize('kind', ['pages', 'records', 'apages', 'arecords'])
+def test_prefetched_walk_keeps_page_order(kind):
+    server = Server(cap=4)
+    assert ids(walk(server, kind, 500, prefetch=3)) == list(range(1, 24))
+
+
+def test_invalid_page_size():
+    with pytest.raises(ValueError):
+        list(iter_pages(Server(), {}, 0))
+
+
+def test_page_size_defaults_to_the_limit_option():
+    server = Server()
+    list(iter_pages(server, {'limit': 7, 'page': 2}))
+    assert server.pages == [2, 3, 4]
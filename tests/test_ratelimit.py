@@ -0,0 +1,103 @@
+import pytest
+
+from pospyt import PosWebServiceDict, RateLimiter
+from pospyt import ratelimit
+from pospyt.ratelimit import AdaptiveConcurrency, TokenBucket
+
+
+class FakeTime(object):
+    """Clock of the ratelimit module, sleeping only moves it forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    return clock
+
+
+def test_burst_then_one_token_per_period(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # tokens are reserved ahead, each caller waits for its own
+    assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+
+def test_tokens_refill_with_time(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 1.0
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+
+
+def test_refill_is_capped_at_the_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.reserve()
+    clock.now += 3600
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_limits_by_resource_and_action(clock):
+    limiter = RateLimiter(limits={'order/list': 1, 'product': (1, 2)})
+    assert limiter.reserve('order', 'list') == 0.0
+    assert limiter.reserve('order', 'list') == 1.0
+    assert limiter.reserve('order', 'find') == 0.0
+    assert limiter.reserve('product', 'list') == 0.0
+    assert limiter.reserve('product', 'find') == 0.0
+    assert limiter.reserve('product', 'list') == 1.0
+    assert limiter.reserve('category', 'list') == 0.0
+    assert limiter.stats() == {'throttled': 2, 'waited': 2.0}
+
+
+def test_global_and_resource_limits_add_up(clock):
+    limiter = RateLimiter(rate=10, burst=1, limits={'order': 1})
+    assert limiter.reserve('order') == 0.0
+    # the slower of the two buckets decides
+    assert limiter.reserve('order') == 1.0
+    assert limiter.reserve('product') == pytest.approx(0.2)
+
+
+def test_client_waits_for_its_budget(webservice, clock):
+    webservice.db['product'] = [{'id': 1}]
+    client = PosWebServiceDict(webservice.url, 'key',
+                               rate_limiter=RateLimiter(rate=2, burst=1))
+    for _ in range(3):
+        client.find('product', 1)
+    assert clock.slept == [0.5, 0.5]
+    assert len(webservice.requests) == 3
+
+
+def test_concurrency_limit_shrinks_and_grows_back(clock):
+    concurrency = AdaptiveConcurrency(initial_limit=4, max_limit=5)
+    assert [concurrency.try_acquire() for _ in range(5)] == \
+        [True, True, True, True, False]
+    concurrency.release(0.1, 200)
+    concurrency.release(0.1, 429)
+    assert concurrency.stats()['limit'] == 2
+    # the other requests in flight failing at once count once
+    concurrency.release(0.1, 503)
+    assert concurrency.stats()['limit'] == 2
+
+    concurrency.release(0.1, 200)
+    assert concurrency.stats()['in_flight'] == 0
+    for _ in range(40):
+        assert concurrency.try_acquire()
+        concurrency.release(0.1, 200)
+    assert concurrency.stats()['limit'] == 5
@@ -0,0 +1,187 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pospyt import (
+    CircuitBreaker, PosCircuitOpenError, PosWebServiceDict,
+    PosWebServiceError, RetryPolicy
+)
+from pospyt import retry
+from pospyt.retry import parse_retry_after
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry.time, 'monotonic', clock)
+    return clock
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 < parse_retry_after(format_datetime(later, usegmt=True)) <= 60
+
+
+def test_backoff_grows_exponentially_up_to_max_backoff():
+    policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+    assert [policy.backoff(n) for n in range(4)] == [0.5, 1.0, 2.0, 3]
+
+
+def test_jitter_stays_below_the_backoff():
+    policy = RetryPolicy(backoff_factor=1)
+    assert all(0 <= policy.backoff(2) <= 4 for _ in range(100))
+
+
+def test_next_delay():
+    policy = RetryPolicy(total=2, backoff_factor=1, jitter=False,
+                         max_retry_after=10)
+    assert policy.next_delay('GET', 0) == 1
+    assert policy.next_delay('GET', 1, 503) == 2
+    assert policy.next_delay('GET', 2, 503) is None
+    assert policy.next_delay('GET', 0, 404) is None
+    assert policy.next_delay('POST', 0, 503) is None
+    # Retry-After takes precedence, up to max_retry_after
+    assert policy.next_delay('GET', 0, 429, '5') == 5
+    assert policy.next_delay('GET', 0, 429, '500') == 10
+    assert RetryPolicy(retry_post=True, jitter=False) \
+        .next_delay('POST', 0, 503) == 0.5
+
+
+def test_breaker_opens_then_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # a failed trial opens the circuit again
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def half_open(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.now += breaker.recovery_timeout
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_released_trial_lets_another_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    half_open(breaker, clock)
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_stuck_trial_is_given_up_after_recovery_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    half_open(breaker, clock)
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_client_retries_transient_failures(webservice):
+    webservice.db['product'] = [{'id': 1}]
+    webservice.fail_next = [503, 502]
+    client = PosWebServiceDict(
+        webservice.url, 'key', retry=RetryPolicy(backoff_factor=0)
+    )
+    assert client.find('product', 1)['id'] == 1
+    assert len(webservice.requests) == 3
+
+
+def test_client_gives_up_after_total_retries(webservice):
+    webservice.fail_next = [503] * 3
+    client = PosWebServiceDict(
+        webservice.url, 'key', retry=RetryPolicy(total=2, backoff_factor=0)
+    )
+    with pytest.raises(PosWebServiceError) as error:
+        client.find('product', 1)
+    assert error.value.error_code == 503
+    assert len(webservice.requests) == 3
+
+
+def test_client_fails_fast_while_the_circuit_is_open(webservice):
+    webservice.fail_next = [500, 500]
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = PosWebServiceDict(webservice.url, 'key', circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(PosWebServiceError):
+            client.find('product', 1)
+    with pytest.raises(PosCircuitOpenError):
+        client.find('product', 1)
+    assert len(webservice.requests) == 2
+
+
+def test_trial_failing_unexpectedly_is_released(webservice, clock,
+                                                monkeypatch):
+    webservice.db['product'] = [{'id': 1}]
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    client = PosWebServiceDict(webservice.url, 'key', circuit_breaker=breaker)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('bug in a hook')
+
+    send_once = client._send_once
+    monkeypatch.setattr(client, '_send_once', broken)
+    with pytest.raises(RuntimeError):
+        client.find('product', 1)
+    monkeypatch.setattr(client, '_send_once', send_once)
+    assert client.find('product', 1)['id'] == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_async_trial_is_released(webservice):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+
+    webservice.db['product'] = [{'id': 1}]
+    # the event loop uses time.monotonic too, it is not patched here
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+
+    async def run():
+        async with AsyncPosWebServiceDict(
+            webservice.url, 'key', circuit_breaker=breaker
+        ) as client:
+            webservice.delay = 0.5
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.find('product', 1), 0.05)
+            webservice.delay = 0
+            return await client.find('product', 1)
+
+    assert asyncio.run(run())['id'] == 1
+    assert breaker.state == CircuitBreaker.CLOSED
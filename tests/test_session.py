@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from pospyt import PosWebServiceDict
+
+
+def test_pool_stats(webservice):
+    webservice.db['product'] = [{'id': 1}]
+    client = PosWebServiceDict(webservice.url, 'key', pool_maxsize=4)
+    client.find('product', 1)
+    [stats] = client.pool_stats()
+    assert stats['maxsize'] == 4
+    assert stats['in_use'] == 0
+
+
+def test_async_pool_stats(webservice):
+    pytest.importorskip('aiohttp')
+    from pospyt import AsyncPosWebServiceDict
+
+    webservice.db['product'] = [{'id': 1}]
+
+    async def run():
+        async with AsyncPosWebServiceDict(webservice.url, 'key') as client:
+            before = client.pool_stats()
+            await client.find('product', 1)
+            return before, client.pool_stats()
+
+    before, after = asyncio.run(run())
+    assert before == []
+    assert after == [
+        {'maxsize': 100, 'limit_per_host': None, 'in_use': 0, 'idle': 1}
+    ]
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pospyt import PosWebServiceDict, SingleFlight
+
+
+def _run_together(function, count):
+    barrier = threading.Barrier(count)
+
+    def run(_):
+        barrier.wait()
+        return function()
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(run, range(count)))
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        return 'result'
+
+    def ask():
+        return flight.do('key', slow)
+
+    with ThreadPoolExecutor(4) as executor:
+        leader = executor.submit(ask)
+        entered.wait(5)
+        followers = [executor.submit(ask) for _ in range(3)]
+        while flight.stats()['coalesced'] < 3:
+            pass
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert calls == [1]
+    assert results == [('result', True)] + [('result', False)] * 3
+    assert flight.stats() == {
+        'calls': 4, 'executed': 1, 'coalesced': 3,
+        'coalescing_ratio': 0.75, 'in_flight': 0,
+    }
+    # the call is forgotten once done
+    assert flight.do('key', lambda: 'again') == ('again', True)
+
+
+def test_waiters_raise_their_own_copy_of_the_error():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        entered.set()
+        release.wait(5)
+        raise KeyError('gone')
+
+    def ask():
+        try:
+            flight.do('key', failing)
+        except KeyError as err:
+            return err
+
+    with ThreadPoolExecutor(3) as executor:
+        leader = executor.submit(ask)
+        entered.wait(5)
+        followers = [executor.submit(ask) for _ in range(2)]
+        while flight.stats()['coalesced'] < 2:
+            pass
+        release.set()
+        errors = [leader.result()] + [f.result() for f in followers]
+
+    assert all(err.args == ('gone',) for err in errors)
+    assert len(set(map(id, errors))) == 3
+
+
+def test_client_coalesces_identical_gets(webservice):
+    webservice.db['product'] = [{'id': 1, 'name': 'tea'}]
+    webservice.delay = 0.3
+    client = PosWebServiceDict(webservice.url, 'key', single_flight=True)
+
+    records = _run_together(lambda: client.find('product', 1), 4)
+
+    assert len(webservice.requests) == 1
+    assert client.single_flight.stats()['coalesced'] == 3
+    assert all(record == records[0] for record in records)
+    # every caller owns its result
+    assert len(set(map(id, records))) == 4
+    records[0]['name'] = 'changed'
+    assert [record['name'] for record in records[1:]] == ['tea'] * 3
+
+
+def test_client_does_not_coalesce_writes(webservice):
+    webservice.delay = 0.2
+    client = PosWebServiceDict(webservice.url, 'key', single_flight=True)
+
+    _run_together(
+        lambda: client.add('product', options={'action': 'create'}), 3
+    )
+
+    assert len(webservice.requests) == 3
+
+
+def test_async_client_coalesces_identical_gets(webservice, make_async_client):
+    webservice.db['product'] = [{'id': 1, 'name': 'tea'}]
+    webservice.delay = 0.3
+    client = make_async_client(webservice.url, single_flight=True)
+
+    async def run():
+        async with client:
+            return await asyncio.gather(
+                *[client.find('product', 1) for _ in range(4)]
+            )
+    records = asyncio.run(run())
+
+    assert len(webservice.requests) == 1
+    assert len(set(map(id, records))) == 4
+    records[0]['name'] = 'changed'
+    assert [record['name'] for record in records[1:]] == ['tea'] * 3
+
+
+def test_cancelled_leader_does_not_cancel_the_waiters(webservice,
+                                                      make_async_client):
+    webservice.db['product'] = [{'id': 1, 'name': 'tea'}]
+    webservice.delay = 0.3
+    client = make_async_client(webservice.url, single_flight=True)
+
+    async def run():
+        async with client:
+            leader = asyncio.ensure_future(client.find('product', 1))
+            await asyncio.sleep(0.1)
+            follower = asyncio.ensure_future(client.find('product', 1))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+    assert asyncio.run(run())['name'] == 'tea'
@@ -0,0 +1,79 @@
+import pytest
+
+from pospyt import PosWebServiceDict
+from pospyt import snapshot
+from pospyt.mirror import LocalMirror
+from pospyt.snapshot import RecordCache
+
+PRODUCT = {'id': 1, 'name': 'Cà Phê', 'quantity': 5,
+           'updated_at': '2021-11-01T08:00:00.000000Z'}
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(snapshot.time, 'monotonic', clock)
+    return clock
+
+
+def test_records_expire_after_max_age(clock):
+    cache = RecordCache(max_age=60)
+    cache.put('product', PRODUCT)
+    clock.now += 60
+    assert cache.get('product', 1) == PRODUCT
+    clock.now += 1
+    assert cache.get('product', 1) is None
+    assert cache.stats()['expired'] == 1
+
+
+def test_records_without_max_age_do_not_expire(clock):
+    cache = RecordCache(max_age=None)
+    cache.put('product', PRODUCT)
+    clock.now += 3600 * 24
+    assert cache.get('product', 1) == PRODUCT
+
+
+def updates(webservice):
+    return [r[3] for r in webservice.requests if r[2] == 'update']
+
+
+def test_expired_snapshot_is_read_again(webservice, clock):
+    webservice.db['product'] = [dict(PRODUCT)]
+    client = PosWebServiceDict(webservice.url, 'key',
+                               record_cache=RecordCache(max_age=60))
+    client.find('product', 1)
+
+    # changed by someone else, then set back by us after max_age
+    webservice.db['product'][0]['quantity'] = 2
+    clock.now += 61
+    client.partial_edit('product', 1, {'quantity': 5})
+    assert updates(webservice) == [{'id': 1, 'quantity': 5}]
+
+
+def mirrored_client(webservice, **kwargs):
+    mirror = LocalMirror(resources=('product',))
+    mirror.upsert('product', [dict(PRODUCT)])
+    return PosWebServiceDict(webservice.url, 'key', mirror=mirror,
+                             source='auto', **kwargs)
+
+
+def test_mirror_is_not_a_snapshot_by_default(webservice):
+    webservice.db['product'] = [dict(PRODUCT, quantity=2)]
+    client = mirrored_client(webservice)
+    client.partial_edit('product', 1, {'quantity': 5})
+    assert updates(webservice) == [{'id': 1, 'quantity': 5}]
+
+
+def test_mirror_snapshots_on_opt_in(webservice):
+    webservice.db['product'] = [dict(PRODUCT)]
+    client = mirrored_client(webservice, mirror_snapshots=True)
+    assert client.partial_edit('product', 1, {'quantity': 5}) is None
+    assert webservice.requests == []
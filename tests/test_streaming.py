@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from pospyt.streaming import DataStream
+
+ENVELOPE = {
+    'success': True,
+    'message': 'Đã lấy danh sách',
+    'data': [
+        {'id': 1, 'name': 'Cà Phê Sữa', 'price': 0.1, 'stock': -2500.0},
+        {'id': 2, 'rate': 1e-05, 'big': 12345678901234567890, 'neg': -7},
+        {'id': 3, 'ok': True, 'note': None, 'tags': ['a', 'b'], 'x': 2.5E+3},
+        -0.0,
+        42,
+        [1.25, [], {}],
+    ],
+    'total': 6.0,
+}
+
+
+def stream(chunks):
+    parser = DataStream()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items, parser.envelope
+
+
+def splits(body):
+    for offset in range(len(body) + 1):
+        yield [body[:offset], body[offset:]]
+
+
+@pytest.mark.parametrize('separators', [(',', ':'), (', ', ': ')],
+                         ids=['compact', 'spaced'])
+def test_envelope_split_at_every_offset(separators):
+    body = json.dumps(ENVELOPE, ensure_ascii=False,
+                      separators=separators).encode('utf-8')
+    expected = dict(ENVELOPE)
+    data = expected.pop('data')
+    for chunks in splits(body):
+        items, envelope = stream(chunks)
+        assert items == data, chunks
+        assert envelope == expected, chunks
+
+
+def test_bare_array_split_at_every_offset():
+    body = b'[0.1, -2500.0, 3e2, 4E-1, 10, true, false, null, "0.5"]'
+    for chunks in splits(body):
+        items, envelope = stream(chunks)
+        assert items == [0.1, -2500.0, 300.0, 0.4, 10, True, False, None,
+                         '0.5'], chunks
+        assert envelope is None
+
+
+def test_byte_by_byte():
+    body = json.dumps(ENVELOPE).encode('utf-8')
+    items, _ = stream([body[i:i + 1] for i in range(len(body))])
+    assert items == ENVELOPE['data']
+
+
+def test_items_are_yielded_as_soon_as_complete():
+    parser = DataStream()
+    assert parser.feed(b'{"data": [{"id": 1}, ') == [{'id': 1}]
+    assert parser.feed(b'{"id": 2}, 3.') == [{'id': 2}]
+    assert parser.feed(b'5]}') == [3.5]
+    assert parser.close() == []
+    assert parser.envelope == {}
+
+
+@pytest.mark.parametrize('body', [
+    b'{"data": [1, 2',
+    b'{"data": [1.',
+    b'{"data": [1, 2]',
+    b'[1 2]',
+])
+def test_invalid_documents(body):
+    with pytest.raises(ValueError):
+        stream([body])
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from pospyt import MemoryCheckpointStore
+
+
+def product(product_id, updated_at):
+    return {
+        'id': product_id,
+        'name': 'Product %d' % product_id,
+        'updated_at': updated_at + '.000000Z',
+    }
+
+
+# ids 2, 3, 4 and 5 share a timestamp and straddle pages of 2 records
+PRODUCTS = [
+    product(1, '2021-11-01T08:00:00'),
+    product(2, '2021-11-02T08:00:00'),
+    product(3, '2021-11-02T08:00:00'),
+    product(4, '2021-11-02T08:00:00'),
+    product(5, '2021-11-02T08:00:00'),
+    product(6, '2021-11-03T08:00:00'),
+]
+
+
+class Crash(Exception):
+    pass
+
+
+class Sink(object):
+    def __init__(self, fail_after=None):
+        self.ids = []
+        self.fail_after = fail_after
+
+    def write(self, records):
+        if self.fail_after is not None and len(self.ids) >= self.fail_after:
+            raise Crash()
+        self.ids.extend(record['id'] for record in records)
+
+
+def sync(call, client, sink, store):
+    return call(client, 'sync', 'product', sink, store, page_size=2)
+
+
+def test_sync_delivers_every_record_once(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    sink = Sink()
+    result = sync(call, make_client(webservice.url), sink,
+                  MemoryCheckpointStore())
+    assert sink.ids == [1, 2, 3, 4, 5, 6]
+    assert result['records'] == 6
+
+
+def test_sync_pages_capped_by_the_server(webservice, make_client, call):
+    webservice.db['product'] = list(PRODUCTS)
+    webservice.max_limit = 2
+    sink = Sink()
+    result = call(make_client(webservice.url), 'sync', 'product', sink,
+                  MemoryCheckpointStore(), page_size=100)
+    assert sink.ids == [1, 2, 3, 4, 5, 6]
+    assert result['records'] == 6
+
+
+def test_sync_resumes_inside_a_timestamp_tie(webservice, make_client,
+                                             call):
+    webservice.db['product'] = list(PRODUCTS)
+    store = MemoryCheckpointStore()
+
+    # crash once the page holding ids 2 and 3 has been delivered
+    first = Sink(fail_after=3)
+    with pytest.raises(Crash):
+        sync(call, make_client(webservice.url), first, store)
+    assert first.ids == [1, 2, 3]
+    assert store.load('product') == {
+        'updated_at': '2021-11-02T08:00:00', 'ids': ['2', '3'],
+    }
+
+    second = Sink()
+    sync(call, make_client(webservice.url), second, store)
+    assert second.ids == [4, 5, 6]
+
+    # a record changed at the watermark is delivered, nothing else
+    webservice.db['product'].append(product(7, '2021-11-03T08:00:00'))
+    third = Sink()
+    result = sync(call, make_client(webservice.url), third, store)
+    assert third.ids == [7]
+    assert result['checkpoint'] == {
+        'updated_at': '2021-11-03T08:00:00', 'ids': ['6', '7'],
+    }
+
+
+def test_async_sync_awaits_coroutine_sinks(webservice, make_async_client,
+                                           call):
+    client = make_async_client(webservice.url)
+    webservice.db['product'] = list(PRODUCTS)
+    delivered = []
+
+    async def sink(records):
+        await asyncio.sleep(0)
+        delivered.extend(record['id'] for record in records)
+
+    sync(call, client, sink, MemoryCheckpointStore())
+    assert delivered == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,34 @@
+from datetime import date, datetime, timedelta, timezone
+
+from pospyt.ultil import convert_to_valid_format, extract_html_title
+
+
+def test_naive_and_date_values():
+    assert convert_to_valid_format(datetime(2021, 11, 11, 15, 9, 29)) == \
+        '2021-11-11 15:09:29'
+    assert convert_to_valid_format(date(2021, 11, 11)) == '2021-11-11 00:00:00'
+
+
+def test_same_instant_in_different_timezones():
+    utc = datetime(2021, 11, 11, 8, 0, tzinfo=timezone.utc)
+    hanoi = utc.astimezone(timezone(timedelta(hours=7)))
+    assert utc == hanoi
+    assert convert_to_valid_format(utc) == '2021-11-11 08:00:00'
+    assert convert_to_valid_format(hanoi) == '2021-11-11 15:00:00'
+    assert convert_to_valid_format(utc) == '2021-11-11 08:00:00'
+
+
+def test_title_of_an_html_error_page():
+    page = (b'<!DOCTYPE html><html><head>\n<TITLE class="x">Server\n'
+            b' Error &amp; <b>500</b></TITLE></head>')
+    page += b'<p>trace</p>' * 10 ** 5
+    assert extract_html_title(page) == 'Server Error & 500'
+    assert extract_html_title(page.decode()) == 'Server Error & 500'
+
+
+def test_title_beyond_the_scanned_head():
+    page = b'<html>' + b' ' * 100 + b'<title>Late</title>'
+    assert extract_html_title(page, limit=50) is None
+    assert extract_html_title(page) == 'Late'
+    assert extract_html_title(b'') is None
+    assert extract_html_title(b'{"error": "no html"}') is None